@@ -29,11 +29,17 @@ CURRICULUM_ITEMS_PARAMS = {
     "fields[quiz]": "title,object_index,type",
     "fields[practice]": "title,object_index",
     "fields[chapter]": "title,object_index",
-    "fields[asset]": "title,filename,asset_type,status,is_external,media_license_token,course_is_drmed,media_sources,captions,slides,slide_urls,download_urls,external_url,stream_urls,@min,status,delayed_asset_message,processing_errors,body",
+    "fields[asset]": "title,filename,asset_type,time_estimation,status,is_external,media_license_token,course_is_drmed,media_sources,captions,slides,slide_urls,download_urls,external_url,stream_urls,@min,status,delayed_asset_message,processing_errors,body",
     "caching_intent": True,
     "page_size": os.getenv("UDEMY_CURRICULUM_PAGE_SIZE", "200"),
 }
 
+LECTURE_URL = "https://{portal_name}.udemy.com/api-2.0/users/me/subscribed-courses/{course_id}/lectures/{lecture_id}/"
+LECTURE_PARAMS = {
+    "fields[lecture]": CURRICULUM_ITEMS_PARAMS["fields[lecture]"],
+    "fields[asset]": CURRICULUM_ITEMS_PARAMS["fields[asset]"],
+}
+
 COURSE_URL_PARAMS = {"fields[course]": "title", "use_remote_version": True, "caching_intent": True}
 
 HOME_DIR = os.getcwd()
@@ -1,10 +1,15 @@
 # -*- coding: utf-8 -*-
 import argparse
 import copy
+import errno
+import hashlib
+import io
 import json
 import logging
 import math
 import os
+import queue
+import random
 import re
 import shutil
 import subprocess
@@ -14,7 +19,9 @@ import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from http.cookiejar import MozillaCookieJar
 from pathlib import Path
-from typing import IO, Union, Optional
+from typing import List, Union, Optional
+from urllib.parse import urljoin, urlsplit
+from urllib.request import url2pathname
 
 import browser_cookie3
 import demoji
@@ -29,13 +36,18 @@ from requests.exceptions import ConnectionError as conn_error
 from tqdm import tqdm
 
 from constants import *
+import progress_events
+from subprocess_runner import progress_logger, run_command
 from tls import SSLCiphers
-from utils import extract_kid
-from vtt_to_srt import convert
-from translator import create_translator
+from utils import extract_kid, read_mp4_info, url_expiry
+from vtt_to_srt import iter_srt
+from translator import TranslationJobStore, TranslationQueue, create_translator, merge_cues, resplit_translations
 
 DOWNLOAD_DIR = os.path.join(os.getcwd(), "out_dir")
 TEMP_DIR = os.path.join(os.getcwd(), "temp")
+SCRATCH_DIR = None
+scratch_quota = 0
+background_move = True
 
 retry = 3
 downloader = None
@@ -68,6 +80,15 @@ auto_translate = False
 translation_executor = None
 translation_futures = []
 translation_lock = threading.Lock()
+translation_queues = {}
+translation_jobs = None
+translation_report_scopes = []  # courses whose stats are reported once their translations are done
+translation_outputs = set()  # dual SRTs queued or resumed in this run, each is translated once
+translate_only = False
+translation_scope = None
+caption_workers = 8
+caption_session = None
+caption_session_lock = threading.Lock()
 browser = None
 cj = None
 use_continuous_lecture_numbers = False
@@ -77,7 +98,18 @@ ARIA2C_DOWNLOADER_ARGS = "aria2c:--disable-ipv6 --connect-timeout=10 --timeout=3
 STRICT_MODE = False
 DISABLE_PROXY = False
 STRICT_FAILURES = []
-FAILED_DOWNLOAD_RETRY_LIMIT = 1
+FAILED_DOWNLOAD_RETRY_LIMITS = {"network": 3, "expired": 2, "mux": 1, "move": 3}
+RETRY_BACKOFF_BASE = 5.0
+RETRY_BACKOFF_MAX = 120.0
+space_check = "refuse"
+parsed_lecture_cache = {}
+batch_urls = None
+verify_outputs = False
+VERIFY_MIN_SIZE_RATIO = 0.5
+exact_plan = False
+# typical video + audio bitrate (kbit/s) by rendition height, for sizing lectures without their manifest
+QUICK_PLAN_KBPS = ((1080, 5000), (720, 2500), (480, 1200), (0, 700))
+url_expiry_margin = 600
 
 
 def _curl_cffi_get(url: str, headers: dict, cookies, timeout: tuple[int, int]):
@@ -125,10 +157,54 @@ def _raise_for_status(resp, url: str):
         reason = getattr(resp, "reason", "")
         raise Exception(f"Failed request {url} ({status} {reason})")
 
+_event_context = threading.local()
+
+
+def _stage(stage: str) -> None:
+    _event_context.stage = stage
+    progress_events.emit("stage", lecture_id=getattr(_event_context, "lecture_id", None), stage=stage)
+
+
+def _progress(label: str):
+    """on_progress callback for run_command: a throttled log line plus, at most once a second, a progress event."""
+    log = progress_logger(label)
+    lecture_id = getattr(_event_context, "lecture_id", None)
+    stage = getattr(_event_context, "stage", None)
+    last = [0.0]
+
+    def _on_progress(event: dict) -> None:
+        log(event)
+        now = time.monotonic()
+        if progress_events.stream.enabled and (now - last[0] >= 1.0 or (event.get("percent") or 0) >= 100):
+            last[0] = now
+            progress_events.emit("progress", lecture_id=lecture_id, stage=stage, **event)
+
+    return _on_progress
+
+
+def _min_expiry(*urls) -> Optional[float]:
+    expiries = [url_expiry(u) for u in urls if u]
+    expiries = [e for e in expiries if e is not None]
+    return min(expiries) if expiries else None
+
+
+def _lecture_expires_soon(lecture: dict) -> bool:
+    expires = lecture.get("expires")
+    return expires is not None and expires - time.time() < url_expiry_margin
+
+
+def _lecture_manifest_missing(lecture: dict) -> bool:
+    # the local manifest of a DRM/HLS lecture is gone once an earlier attempt finished with it
+    source = _select_lecture_source(lecture)
+    manifest_path = _local_manifest_path(source.get("download_url")) if source else None
+    return manifest_path is not None and not os.path.isfile(manifest_path)
+
+
 def deEmojify(inputStr: str):
     return demoji.replace(inputStr, "")
 
 def record_strict_failure(lecture_id: str, lecture_title: str, reason: str) -> None:
+    _note_failure(reason)
     if not STRICT_MODE:
         return
     try:
@@ -146,52 +222,168 @@ def _clear_strict_failure(lecture_id: str) -> None:
         pass
 
 
-def _retry_failed_downloads(failed_entries):
-    if not failed_entries:
-        return
-    if FAILED_DOWNLOAD_RETRY_LIMIT <= 0:
-        logger.warning("> Failed lecture retries disabled (limit <= 0). Skipping %d queued lecture(s).", len(failed_entries))
-        return
+_failure_note = threading.local()
 
-    attempt = 1
-    pending = failed_entries
 
-    while pending and attempt <= FAILED_DOWNLOAD_RETRY_LIMIT:
-        logger.info("> Retrying %d failed lecture(s) (attempt %d/%d)...", len(pending), attempt, FAILED_DOWNLOAD_RETRY_LIMIT)
-        next_round = []
-        for entry in pending:
-            lecture_path = entry["lecture_path"]
-            lecture_title = entry["lecture_title"]
-            lecture_id = entry["lecture_id"]
-            chapter_dir = entry["chapter_dir"]
-            lecture_data = copy.deepcopy(entry["lecture_data"])
+def _classify_failure(reason: str) -> Optional[str]:
+    text = str(reason).lower()
+    if "output folder" in text:
+        return "move"
+    if "403" in text or "forbidden" in text or "expired" in text:
+        return "expired"
+    if "key not found" in text or "missing" in text:
+        return "permanent"
+    if any(word in text for word in ("mux", "merge", "encode", "remux", "kid")):
+        return "mux"
+    return None
 
-            try:
-                process_lecture(lecture_data, lecture_path, chapter_dir)
-            except Exception:
-                logger.exception("    > Retry attempt raised an exception for lecture '%s'", lecture_title)
 
-            if os.path.isfile(lecture_path):
-                logger.info("    > Retry succeeded (%s)", lecture_title)
-                _clear_strict_failure(lecture_id)
-            else:
-                next_round.append(entry)
-        pending = next_round
-        attempt += 1
+def _reset_failure_note() -> None:
+    _failure_note.failure_class = None
 
-    if pending:
-        logger.warning("> %d lecture(s) still failed after %d retry attempt(s).", len(pending), FAILED_DOWNLOAD_RETRY_LIMIT)
-        for entry in pending:
-            logger.warning("    > Still missing: %s (%s)", entry["lecture_title"], entry["lecture_id"])
 
-# from https://stackoverflow.com/a/21978778/9785713
-def log_subprocess_output(prefix: str, pipe: IO[bytes]):
-    if pipe:
-        for line in iter(lambda: pipe.read(1), ""):
-            logger.debug("[%s]: %r", prefix, line.decode("utf8").strip())
-        pipe.flush()
+def _note_failure(reason: str) -> None:
+    # the first specific reason of an attempt wins, generic follow-ups ("DRM handler failed") don't overwrite it
+    failure_class = _classify_failure(reason)
+    if failure_class and not getattr(_failure_note, "failure_class", None):
+        _failure_note.failure_class = failure_class
+
+
+def _failure_class() -> str:
+    return getattr(_failure_note, "failure_class", None) or "network"
+
+
+class RetryScheduler(object):
+    """
+    Re-runs failed lectures in the background while the rest of the course keeps downloading.
+
+    Failures are classified (network, expired, mux) and each class has its own retry limit;
+    attempts are spaced out with a jittered exponential backoff.
+    """
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self.backoff_base = RETRY_BACKOFF_BASE
+        self.refresher = None  # re-fetches one lecture's signed URLs, set per course
+        self._cond = threading.Condition()
+        self._executor = None
+        self._active = 0
+        self._attempts = {}
+        self._exhausted = []
+
+    def submit(self, entry: dict, failure_class: str) -> bool:
+        with self._cond:
+            attempt = self._attempts.get(entry["lecture_id"], 0) + 1
+            limit = FAILED_DOWNLOAD_RETRY_LIMITS.get(failure_class, 0)
+            if attempt > limit:
+                self._exhausted.append((entry, failure_class))
+                progress_events.emit(
+                    "lecture_failed",
+                    lecture_id=entry["lecture_id"],
+                    title=entry["lecture_title"],
+                    failure_class=failure_class,
+                    final=True,
+                )
+                return False
+            self._attempts[entry["lecture_id"]] = attempt
+            entry["failure_class"] = failure_class
+            self._active += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="lecture-retry")
+        delay = min(RETRY_BACKOFF_MAX, self.backoff_base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+        expires = entry["lecture_data"].get("expires")
+        if expires is not None and failure_class != "expired":
+            # don't back off past the point where the lecture's URLs stop working
+            delay = min(delay, max(0.0, expires - url_expiry_margin - time.time()))
+        logger.info(
+            "    > Retrying '%s' in %.0fs (%s failure, attempt %d/%d)",
+            entry["lecture_title"],
+            delay,
+            failure_class,
+            attempt,
+            limit,
+        )
+        timer = threading.Timer(delay, self._dispatch, args=(entry,))
+        timer.daemon = True
+        timer.start()
+        return True
 
+    def _dispatch(self, entry: dict) -> None:
+        self._executor.submit(self._retry, entry)
 
+    def _retry(self, entry: dict) -> None:
+        try:
+            # a lecture whose move to the output folder failed is already downloaded
+            move_src = entry.get("move_src")
+            move_only = bool(move_src) and os.path.isfile(move_src)
+            if self.refresher is not None and not move_only and (
+                entry.get("failure_class") == "expired"
+                or _lecture_expires_soon(entry["lecture_data"])
+                or _lecture_manifest_missing(entry["lecture_data"])
+            ):
+                refreshed = self.refresher(entry["lecture_data"])
+                if refreshed is not None:
+                    entry["lecture_data"] = copy.deepcopy(refreshed)
+            _reset_failure_note()
+            if move_only:
+                try:
+                    background_mover.move(move_src, entry["lecture_path"])
+                except OSError as exc:
+                    logger.error("    > Moving '%s' to the output folder failed again: %s", entry["lecture_title"], exc)
+                    _note_failure(f"move to the output folder failed: {exc}")
+            else:
+                try:
+                    process_lecture(copy.deepcopy(entry["lecture_data"]), entry["lecture_path"], entry["chapter_dir"])
+                except Exception as exc:
+                    logger.exception("    > Retry attempt raised an exception for lecture '%s'", entry["lecture_title"])
+                    _note_failure(str(exc))
+
+            if output_index.refresh(entry["lecture_path"]):
+                logger.info("    > Retry succeeded (%s)", entry["lecture_title"])
+                _clear_strict_failure(entry["lecture_id"])
+                progress_events.emit(
+                    "lecture_completed", lecture_id=entry["lecture_id"], title=entry["lecture_title"], retried=True
+                )
+            else:
+                self.submit(entry, _failure_class())
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def drain(self) -> set:
+        """Wait for every scheduled retry; returns the ids of lectures that ran out of attempts."""
+        while True:
+            with self._cond:
+                if self._active:
+                    logger.info(
+                        "> Waiting for %d lecture retr%s to finish...", self._active, "y" if self._active == 1 else "ies"
+                    )
+                while self._active:
+                    self._cond.wait()
+            # a failed background move re-queues its lecture, so the queued moves have to settle too
+            background_mover.wait()
+            with self._cond:
+                if not self._active:
+                    exhausted, self._exhausted = self._exhausted, []
+                    executor, self._executor = self._executor, None
+                    self._attempts.clear()
+                    break
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+        if exhausted:
+            logger.warning("> %d lecture(s) still failed after retrying.", len(exhausted))
+            for entry, failure_class in exhausted:
+                logger.warning(
+                    "    > Still missing: %s (%s, %s failure)", entry["lecture_title"], entry["lecture_id"], failure_class
+                )
+        return {entry["lecture_id"] for entry, _ in exhausted}
+
+
+retry_scheduler = RetryScheduler()
+
+# from https://stackoverflow.com/a/21978778/9785713
 def parse_chapter_filter(chapter_str: str):
     """
     Given a string like "1,3-5,7,9-11", return a set of chapter numbers.
@@ -216,7 +408,7 @@ def parse_chapter_filter(chapter_str: str):
 
 # this is the first function that is called, we parse the arguments, setup the logger, and ensure that required directories exist
 def pre_run():
-    global dl_assets, dl_captions, dl_quizzes, skip_lectures, caption_locale, quality, bearer_token, course_name, keep_vtt, skip_hls, concurrent_downloads, load_from_file, save_to_file, bearer_token, course_url, info, logger, keys, id_as_course_name, LOG_LEVEL, use_h265, h265_crf, h265_preset, use_nvenc, browser, is_subscription_course, DOWNLOAD_DIR, use_continuous_lecture_numbers, chapter_filter, translator, auto_translate, STRICT_MODE, DISABLE_PROXY
+    global dl_assets, dl_captions, dl_quizzes, skip_lectures, caption_locale, quality, bearer_token, course_name, keep_vtt, skip_hls, concurrent_downloads, load_from_file, save_to_file, bearer_token, course_url, info, logger, keys, id_as_course_name, LOG_LEVEL, use_h265, h265_crf, h265_preset, use_nvenc, browser, is_subscription_course, DOWNLOAD_DIR, use_continuous_lecture_numbers, chapter_filter, translator, auto_translate, STRICT_MODE, DISABLE_PROXY, space_check, batch_urls, verify_outputs, TEMP_DIR, SCRATCH_DIR, scratch_quota, background_move, url_expiry_margin, caption_workers, translate_only, exact_plan
 
     # Load environment variables first
     load_dotenv()
@@ -236,7 +428,13 @@ def pre_run():
 
     parser = argparse.ArgumentParser(description="Udemy Downloader")
     parser.add_argument(
-        "-c", "--course-url", dest="course_url", type=str, help="The URL of the course to download", required=True
+        "-c", "--course-url", dest="course_url", type=str, help="The URL of the course to download"
+    )
+    parser.add_argument(
+        "--batch-file",
+        dest="batch_file",
+        type=str,
+        help="Download every course URL listed in this file (one per line, '-' reads from stdin) with a single session",
     )
     parser.add_argument(
         "-b",
@@ -403,9 +601,63 @@ def pre_run():
         action="store_true",
         help="If specified, disable system/environment proxy settings for network requests",
     )
+    parser.add_argument(
+        "--scratch-dir",
+        dest="scratch_dir",
+        type=str,
+        help="Fast local folder (NVMe, tmpfs) for manifests and intermediate files; finished lectures are moved to the output directory",
+    )
+    parser.add_argument(
+        "--scratch-quota",
+        dest="scratch_quota",
+        type=int,
+        help="Maximum size of the scratch folder in MB; lectures wait for room when it is full (Default is no limit)",
+    )
+    parser.add_argument(
+        "--move-bwlimit",
+        dest="move_bwlimit",
+        type=float,
+        help="Bandwidth limit in MB/s for moving finished lectures from the scratch folder to the output folder (Default is no limit)",
+    )
+    parser.add_argument(
+        "--progress-events",
+        dest="progress_events",
+        type=str,
+        help="Write newline-delimited JSON progress events to fd:<N>, unix:<socket path> or a file",
+    )
+    parser.add_argument(
+        "--translate-only",
+        dest="translate_only",
+        action="store_true",
+        help="Only finish the subtitle translations left unfinished by earlier runs, then exit",
+    )
+    parser.add_argument(
+        "--verify",
+        dest="verify",
+        action="store_true",
+        help="If specified, downloaded lecture videos are checked (size, MP4 structure, duration) and broken ones are downloaded again",
+    )
+    parser.add_argument(
+        "--space-check",
+        dest="space_check",
+        choices=["refuse", "wait", "off"],
+        help="What to do when the estimated course size does not fit in the output/temp directories: refuse to start, wait for space, or skip the check (Default is 'refuse')",
+    )
+    parser.add_argument(
+        "--exact-plan",
+        dest="exact_plan",
+        action="store_true",
+        help="If specified, every lecture's manifest is fetched before the download starts so the size plan uses real bitrates instead of an estimate from the lecture length",
+    )
     # parser.add_argument("-v", "--version", action="version", version="You are running version {version}".format(version=__version__))
 
     args = parser.parse_args()
+    if args.translate_only:
+        translate_only = True
+    if not args.course_url and not args.batch_file and not translate_only:
+        parser.error("one of -c/--course-url or --batch-file is required")
+    if args.batch_file and args.load_from_file:
+        parser.error("--load-from-file cannot be combined with --batch-file")
     if args.download_assets:
         dl_assets = True
     if args.lang:
@@ -439,6 +691,10 @@ def pre_run():
         bearer_token = args.bearer_token
     if args.course_url:
         course_url = args.course_url
+    if args.batch_file:
+        batch_urls = ([course_url] if course_url else []) + _read_batch_urls(args.batch_file)
+        if not batch_urls:
+            parser.error(f"no course URLs found in {args.batch_file}")
     if args.info:
         info = args.info
     if args.use_h265:
@@ -471,6 +727,53 @@ def pre_run():
         browser = args.browser
     if args.out:
         DOWNLOAD_DIR = os.path.abspath(args.out)
+    if args.verify:
+        verify_outputs = True
+    scratch_root = args.scratch_dir or os.getenv("UDEMY_SCRATCH_DIR")
+    if scratch_root:
+        SCRATCH_DIR = os.path.abspath(scratch_root)
+    try:
+        scratch_quota = (args.scratch_quota or int(os.getenv("UDEMY_SCRATCH_QUOTA_MB", "0"))) * 1024 * 1024
+    except ValueError:
+        scratch_quota = 0
+    background_move = os.getenv("UDEMY_BACKGROUND_MOVE", "1").strip().lower() not in ("0", "false", "no")
+    try:
+        move_bwlimit = args.move_bwlimit or float(os.getenv("UDEMY_MOVE_BWLIMIT_MB", "0"))
+    except ValueError:
+        move_bwlimit = 0
+    background_mover.bwlimit = int(max(0, move_bwlimit) * 1024 * 1024)
+    progress_events.open_stream(args.progress_events or os.getenv("UDEMY_PROGRESS_EVENTS"))
+    try:
+        caption_workers = max(1, int(os.getenv("UDEMY_CAPTION_WORKERS", "8")))
+    except ValueError:
+        caption_workers = 8
+    try:
+        url_expiry_margin = max(0, int(os.getenv("UDEMY_URL_EXPIRY_MARGIN", "600")))
+    except ValueError:
+        url_expiry_margin = 600
+    for failure_class in FAILED_DOWNLOAD_RETRY_LIMITS:
+        try:
+            FAILED_DOWNLOAD_RETRY_LIMITS[failure_class] = int(
+                os.getenv(f"UDEMY_LECTURE_RETRY_{failure_class.upper()}", str(FAILED_DOWNLOAD_RETRY_LIMITS[failure_class]))
+            )
+        except ValueError:
+            pass
+    try:
+        retry_scheduler.workers = max(1, int(os.getenv("UDEMY_LECTURE_RETRY_WORKERS", "2")))
+    except ValueError:
+        retry_scheduler.workers = 2
+    try:
+        retry_scheduler.backoff_base = max(0.0, float(os.getenv("UDEMY_LECTURE_RETRY_BACKOFF", str(RETRY_BACKOFF_BASE))))
+    except ValueError:
+        retry_scheduler.backoff_base = RETRY_BACKOFF_BASE
+    # every run gets its own temp folder, cleaned up at exit without touching concurrent runs
+    run_id = os.getenv("TASK_ID_SUFFIX", "").strip().upper() or f"{os.getpid()}"
+    TEMP_DIR = os.path.join(SCRATCH_DIR or os.path.join(os.getcwd(), "temp"), f"run-{run_id}")
+    space_check = (args.space_check or os.getenv("UDEMY_SPACE_CHECK", "refuse")).strip().lower()
+    if space_check not in ("refuse", "wait", "off"):
+        space_check = "refuse"
+    if args.exact_plan or os.getenv("UDEMY_EXACT_PLAN", "0").strip().lower() in ("1", "true", "yes"):
+        exact_plan = True
     if args.use_continuous_lecture_numbers:
         use_continuous_lecture_numbers = args.use_continuous_lecture_numbers
     if args.chapter_filter_raw:
@@ -487,18 +790,23 @@ def pre_run():
                 pass
     
     # Auto-enable captions and translation when downloading videos
-    if not skip_lectures and not info:
+    if (not skip_lectures and not info) or translate_only:
         dl_captions = True
         caption_locale = "en"
         logger_temp = logging.getLogger("udemy-downloader")
-        logger_temp.info("Auto-enabling English captions for video downloads")
+        if not translate_only:
+            logger_temp.info("Auto-enabling English captions for video downloads")
 
         provider = os.getenv("TRANSLATE_PROVIDER")
-        if provider or os.getenv("DEEPL_API_KEY"):
+        if provider or os.getenv("DEEPL_API_KEY") or os.getenv("TRANSLATE_SERVICE_URL"):
             try:
                 translator = create_translator(provider=provider)
                 auto_translate = True
-                logger_temp.info("Auto-translation enabled (EN -> ZH) using provider: %s", provider or "deepl")
+                logger_temp.info(
+                    "Auto-translation enabled (EN -> %s) using provider: %s",
+                    ", ".join(translation_targets()),
+                    provider or "deepl",
+                )
             except Exception as e:
                 logger_temp.warning(
                     "Failed to initialize translator provider '%s': %s. Continuing without translation.",
@@ -557,6 +865,7 @@ class Udemy:
 
         self.session = None
         self.bearer_token = None
+        self._course_lists = {}
         self.auth = UdemyAuth(cache_session=False)
         if not self.session:
             self.session = self.auth.authenticate(bearer_token=bearer_token)
@@ -599,6 +908,14 @@ class Udemy:
             cj = MozillaCookieJar("cookie.txt")
             cj.load(ignore_discard=True, ignore_expires=True)
 
+    def fork(self):
+        """A copy of this client with its own HTTP session (same credentials and rate limit), for another thread."""
+        other = copy.copy(self)
+        other.session = Session()
+        other.session._headers = dict(self.session._headers)
+        other.session._throttle = self.session._throttle
+        return other
+
     def _get_quiz(self, quiz_id):
         self.session._headers.update(
             {
@@ -827,6 +1144,7 @@ class Udemy:
                             "width": width,
                             "extension": _type.replace("video/", ""),
                             "download_url": download_url,
+                            "expires": url_expiry(download_url),
                         }
                     )
         return _temp
@@ -841,6 +1159,8 @@ class Udemy:
                 if _type == "application/dash+xml":
                     out = self._extract_mpd(src)
                     if out:
+                        for item in out:
+                            item.setdefault("expires", url_expiry(src))
                         _temp.extend(out)
         return _temp
 
@@ -878,7 +1198,7 @@ class Udemy:
         _temp = []
 
         # get temp folder
-        temp_path = Path(Path.cwd(), "temp")
+        temp_path = Path(TEMP_DIR)
 
         # ensure the folder exists
         temp_path.mkdir(parents=True, exist_ok=True)
@@ -923,9 +1243,9 @@ class Udemy:
                 f.write(r.text)
 
             m3u8_object = m3u8.loads(raw_data)
-            playlists = m3u8_object.playlists
+            playlists = []
             seen = set()
-            for pl in playlists:
+            for pl in m3u8_object.playlists:
                 resolution = pl.stream_info.resolution
                 codecs = pl.stream_info.codecs
 
@@ -933,10 +1253,22 @@ class Udemy:
                     continue
                 if not codecs:
                     continue
-                width, height = resolution
-
-                if height in seen:
+                if resolution[1] in seen:
                     continue
+                seen.add(resolution[1])
+                playlists.append(pl)
+
+            if not info and playlists:
+                # only the rendition process_lecture will select needs its variant playlist fetched,
+                # using the same rule: best height, or the closest one to --quality (ties go to the higher)
+                playlists.sort(key=lambda x: x.stream_info.resolution[1], reverse=True)
+                target = playlists[0]
+                if isinstance(quality, int):
+                    target = min(playlists, key=lambda x: abs(x.stream_info.resolution[1] - quality))
+                playlists = [target]
+
+            for pl in playlists:
+                width, height = pl.stream_info.resolution
 
                 # we need to save the individual playlists to disk also
                 playlist_path = Path(temp_path, f"index_{asset_id}_{width}x{height}.m3u8")
@@ -973,7 +1305,6 @@ class Udemy:
                     _raise_for_status(r, pl.uri)
                     f.write(r.text)
 
-                seen.add(height)
                 _temp.append(
                     {
                         "type": "hls",
@@ -981,6 +1312,9 @@ class Udemy:
                         "width": width,
                         "extension": "mp4",
                         "download_url": playlist_path.as_uri(),
+                        "playlist_uri": pl.uri,
+                        "bandwidth": pl.stream_info.average_bandwidth or pl.stream_info.bandwidth,
+                        "expires": _min_expiry(url, pl.uri),
                     }
                 )
         except Exception as error:
@@ -993,7 +1327,7 @@ class Udemy:
         _temp = {}
 
         # get temp folder
-        temp_path = Path(Path.cwd(), "temp")
+        temp_path = Path(TEMP_DIR)
 
         # ensure the folder exists
         temp_path.mkdir(parents=True, exist_ok=True)
@@ -1118,6 +1452,7 @@ class Udemy:
             if not best_audio:
                 raise ValueError("No suitable audio format found in MPD")
             audio_format_id = best_audio.get("format_id")
+            audio_tbr = best_audio.get("tbr") or 0
 
             for format in formats:
                 video_format_id = format.get("format_id")
@@ -1139,6 +1474,7 @@ class Udemy:
                         "extension": extension,
                         "download_url": mpd_path.as_uri(),
                         "tbr": round(tbr),
+                        "audio_tbr": round(audio_tbr),
                     }
                 )
             # for each resolution, use only the highest bitrate
@@ -1209,7 +1545,7 @@ class Udemy:
             results = webpage.get("results", [])
         return results
 
-    def _extract_course_info_json(self, url, course_id):
+    def _extract_course_info_json(self, url, course_id, portal_name):
         self.session._headers.update({"Referer": url})
         url = COURSE_URL.format(portal_name=portal_name, course_id=course_id)
         try:
@@ -1321,7 +1657,7 @@ class Udemy:
             results = webpage.get("results", [])
         return results
 
-    def _extract_subscription_course_info(self, url):
+    def _extract_subscription_course_info(self, url, portal_name):
         url = (url or "").split("#", 1)[0]
         if portal_name:
             self.session._headers.update(
@@ -1416,8 +1752,14 @@ class Udemy:
         course_id = data_json.get("courseId", None)
         return course_id
 
+    def _cached_course_list(self, fetch, portal_name):
+        # the full course listings don't depend on the course, so batch runs only fetch them once
+        key = (fetch.__name__, portal_name)
+        if key not in self._course_lists:
+            self._course_lists[key] = fetch(portal_name=portal_name)
+        return self._course_lists[key]
+
     def _extract_course_info(self, url):
-        global portal_name
         portal_name, course_name = self.extract_course_name(url)
         course = {"portal_name": portal_name}
 
@@ -1425,18 +1767,18 @@ class Udemy:
             results = self._subscribed_courses(portal_name=portal_name, course_name=course_name)
             course = self._extract_course(response=results, course_name=course_name)
             if not course:
-                results = self._my_courses(portal_name=portal_name)
+                results = self._cached_course_list(self._my_courses, portal_name)
                 course = self._extract_course(response=results, course_name=course_name)
             if not course:
-                results = self._subscribed_collection_courses(portal_name=portal_name)
+                results = self._cached_course_list(self._subscribed_collection_courses, portal_name)
                 course = self._extract_course(response=results, course_name=course_name)
             if not course:
-                results = self._archived_courses(portal_name=portal_name)
+                results = self._cached_course_list(self._archived_courses, portal_name)
                 course = self._extract_course(response=results, course_name=course_name)
 
         if not course or is_subscription_course:
-            course_id = self._extract_subscription_course_info(url)
-            course = self._extract_course_info_json(url, course_id)
+            course_id = self._extract_subscription_course_info(url, portal_name)
+            course = self._extract_course_info_json(url, course_id, portal_name)
 
         if course:
             return course.get("id"), course
@@ -1489,7 +1831,7 @@ class Udemy:
                 if stream_urls and isinstance(stream_urls, dict):
                     sources = stream_urls.get("Video")
                     tracks = asset.get("captions")
-                    # duration = asset.get("time_estimation")
+                    duration = asset.get("time_estimation")
                     sources = self._extract_sources(sources, skip_hls)
                     subtitles = self._extract_subtitles(tracks)
                     sources_count = len(sources)
@@ -1499,6 +1841,8 @@ class Udemy:
                         **lecture,
                         "assets": retVal,
                         "assets_count": len(retVal),
+                        "duration": duration,
+                        "expires": min((x["expires"] for x in sources if x.get("expires")), default=None),
                         "sources": sources,
                         "subtitles": subtitles,
                         "subtitle_count": subtitle_count,
@@ -1527,14 +1871,15 @@ class Udemy:
                 if media_sources and isinstance(media_sources, list):
                     sources = self._extract_media_sources(media_sources)
                     tracks = asset.get("captions")
-                    # duration = asset.get("time_estimation")
+                    duration = asset.get("time_estimation")
                     subtitles = self._extract_subtitles(tracks)
                     sources_count = len(sources)
                     subtitle_count = len(subtitles)
                     lecture.pop("data")  # remove the raw data object after processing
                     lecture = {
                         **lecture,
-                        # "duration": duration,
+                        "duration": duration,
+                        "expires": min((x["expires"] for x in sources if x.get("expires")), default=None),
                         "assets": retVal,
                         "assets_count": len(retVal),
                         "video_sources": sources,
@@ -1574,10 +1919,16 @@ class Udemy:
 
 class Session(object):
     def __init__(self):
-        self._headers = HEADERS
+        self._headers = dict(HEADERS)
         self._session = requests.sessions.Session()
         if DISABLE_PROXY:
             self._session.trust_env = False
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        try:
+            self._min_interval = max(0.0, float(os.getenv("UDEMY_API_MIN_INTERVAL", "0")))
+        except ValueError:
+            self._min_interval = 0.0
         self._session.mount(
             "https://",
             SSLCiphers(
@@ -1589,6 +1940,17 @@ class Session(object):
         self._headers["Authorization"] = "Bearer {}".format(bearer_token)
         self._headers["X-Udemy-Authorization"] = "Bearer {}".format(bearer_token)
 
+    def _throttle(self):
+        # one shared limiter per session, so every course in a batch draws from the same budget
+        if self._min_interval <= 0:
+            return
+        with self._rate_lock:
+            now = time.monotonic()
+            wait = self._next_request_at - now
+            self._next_request_at = max(now, self._next_request_at) + self._min_interval
+        if wait > 0:
+            time.sleep(wait)
+
     def _get(self, url, params=None):
         last_response = None
         last_exc = None
@@ -1609,6 +1971,7 @@ class Session(object):
         except ValueError:
             backoff_max = 30.0
         for i in range(max_retries):
+            self._throttle()
             try:
                 session = self._session.get(
                     url,
@@ -1694,6 +2057,229 @@ class UdemyAuth(object):
             return None
 
 
+class OutputIndex(object):
+    """
+    In-memory listing of the course output directory.
+
+    The course directory is scanned once with os.scandir and the result drives every
+    "already downloaded" decision, so a run over an existing course doesn't stat each
+    lecture and caption separately (slow on NFS/SMB mounts). Writers keep it current
+    with add/discard, or refresh when an external tool produced the file.
+    """
+
+    def __init__(self):
+        self._roots = []
+        self._files = set()
+        self._dirs = set()
+        self._link_names = {}
+        self._lock = threading.Lock()
+
+    def scan(self, root: str) -> None:
+        root = os.path.normpath(root)
+        files, dirs = set(), set()
+        stack = [root]
+        while stack:
+            current = stack.pop()
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.add(os.path.normpath(entry.path))
+                            stack.append(entry.path)
+                        else:
+                            files.add(os.path.normpath(entry.path))
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            if root not in self._roots:
+                self._roots.append(root)
+            self._dirs.add(root)
+            self._files = {f for f in self._files if not self._under(f, root)} | files
+            self._dirs |= dirs
+        logger.debug("> Indexed %d file(s) in %d folder(s) under %s", len(files), len(dirs), root)
+
+    def _under(self, path: str, root: str) -> bool:
+        return path == root or path.startswith(root + os.sep)
+
+    def _indexed(self, path: str) -> bool:
+        return any(self._under(path, root) for root in self._roots)
+
+    def exists(self, path: str) -> bool:
+        path = os.path.normpath(path)
+        with self._lock:
+            if self._indexed(path):
+                return path in self._files
+        return os.path.isfile(path)
+
+    def dir_exists(self, path: str) -> bool:
+        path = os.path.normpath(path)
+        with self._lock:
+            if self._indexed(path):
+                return path in self._dirs
+        return os.path.isdir(path)
+
+    def add(self, path: str) -> None:
+        with self._lock:
+            self._files.add(os.path.normpath(path))
+
+    def add_dir(self, path: str) -> None:
+        with self._lock:
+            self._dirs.add(os.path.normpath(path))
+
+    def discard(self, path: str) -> None:
+        with self._lock:
+            self._files.discard(os.path.normpath(path))
+
+    def refresh(self, path: str) -> bool:
+        """Stat a single path after an external tool wrote (or failed to write) it."""
+        present = os.path.isfile(path) or background_mover.is_pending(path)
+        if present:
+            self.add(path)
+        else:
+            self.discard(path)
+        return present
+
+    def link_names(self, links_path: str) -> set:
+        """Lower-cased entries of an external-links.txt file, read at most once per run."""
+        links_path = os.path.normpath(links_path)
+        with self._lock:
+            names = self._link_names.get(links_path)
+            if names is not None:
+                return names
+        names = set()
+        if self.exists(links_path):
+            with open(links_path, encoding="utf-8", errors="ignore") as f:
+                names = {i.strip().lower() for i in f if i}
+        with self._lock:
+            return self._link_names.setdefault(links_path, names)
+
+
+output_index = OutputIndex()
+
+
+class BackgroundMover(object):
+    """
+    Moves finished lectures from the scratch folder to DOWNLOAD_DIR on a background thread.
+
+    Downloads and post-processing only ever touch the (fast) scratch volume; the copy to the
+    output volume (often a NAS) happens here, with copy_file_range or sendfile when the
+    platform has them and an optional bandwidth limit. Queued files count as downloaded;
+    when a move fails, on_failed(src, dst) is called so the lecture can be retried.
+    """
+
+    CHUNK_SIZE = 8 * 1024 * 1024
+
+    def __init__(self):
+        self.bwlimit = 0  # bytes per second, 0 means unlimited
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.on_failed = None  # re-queues the lecture of a failed move, set per course
+
+    def submit(self, src: str, dst: str) -> None:
+        with self._lock:
+            self._pending.add(os.path.normpath(dst))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="background-mover", daemon=True)
+                self._thread.start()
+        output_index.add(dst)
+        self._queue.put((src, dst))
+        logger.info("      > Queued for move to the output folder (%d pending)", self._queue.qsize())
+
+    def is_pending(self, path: str) -> bool:
+        with self._lock:
+            return os.path.normpath(path) in self._pending
+
+    def wait(self) -> None:
+        if self._thread is not None and self._pending:
+            logger.info("> Waiting for %d file(s) to be moved to the output folder...", len(self._pending))
+        self._queue.join()
+
+    def shutdown(self) -> None:
+        if self._thread is None:
+            return
+        self.wait()
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            src, dst = item
+            try:
+                start = time.time()
+                self._move(src, dst)
+                logger.debug("> Moved %s in %.2fs", os.path.basename(dst), time.time() - start)
+            except Exception:
+                logger.exception("> Failed to move '%s' to the output folder", src)
+                output_index.discard(dst)
+                if self.on_failed is not None:
+                    try:
+                        self.on_failed(src, dst)
+                    except Exception:
+                        logger.exception("> Could not re-queue the failed move of '%s'", src)
+            finally:
+                with self._lock:
+                    self._pending.discard(os.path.normpath(dst))
+                self._queue.task_done()
+
+    def move(self, src: str, dst: str) -> None:
+        """Move one file right away, on the calling thread."""
+        self._move(src, dst)
+        output_index.add(dst)
+
+    def _move(self, src: str, dst: str) -> None:
+        if os.stat(src).st_dev == os.stat(os.path.dirname(dst)).st_dev:
+            os.replace(src, dst)
+        else:
+            tmp_path = dst + ".moving"
+            self._copy(src, tmp_path)
+            shutil.copystat(src, tmp_path)
+            os.replace(tmp_path, dst)
+            os.remove(src)
+        _release_lecture_work_dir(os.path.dirname(src))
+
+    def _copy(self, src: str, dst: str) -> None:
+        size = os.path.getsize(src)
+        method = "copy_file_range" if hasattr(os, "copy_file_range") else "sendfile" if hasattr(os, "sendfile") else "read"
+        started = time.monotonic()
+        copied = 0
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            while copied < size:
+                count = min(self.CHUNK_SIZE, size - copied)
+                try:
+                    written = self._copy_chunk(method, fsrc, fdst, copied, count)
+                except OSError as exc:
+                    if method == "read" or exc.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                        raise
+                    method = "sendfile" if method == "copy_file_range" and hasattr(os, "sendfile") else "read"
+                    continue
+                if not written:
+                    raise IOError(f"Short copy of {src} ({copied} of {size} bytes)")
+                copied += written
+                if self.bwlimit:
+                    ahead = copied / self.bwlimit - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+
+    def _copy_chunk(self, method, fsrc, fdst, offset, count) -> int:
+        if method == "copy_file_range":
+            return os.copy_file_range(fsrc.fileno(), fdst.fileno(), count, offset, offset)
+        os.lseek(fdst.fileno(), offset, os.SEEK_SET)
+        if method == "sendfile":
+            return os.sendfile(fdst.fileno(), fsrc.fileno(), offset, count)
+        fsrc.seek(offset)
+        return fdst.write(fsrc.read(count))
+
+
+background_mover = BackgroundMover()
+
+
 def durationtoseconds(period):
     """
     @author Jayapraveen
@@ -1761,7 +2347,7 @@ def mux_process(
             "--keys",
             f"label=VIDEO:key_id={resolved_video_kid}:key={video_key},label=AUDIO:key_id={resolved_audio_kid}:key={audio_key}",
         ]
-        packager = subprocess.run(packager_cmd, capture_output=True, text=True, cwd=str(workdir))
+        packager = run_command(packager_cmd, "PACKAGER", cwd=str(workdir))
         if packager.returncode != 0:
             logger.error("> shaka-packager failed (code=%s) for lecture: %s", packager.returncode, video_title)
             if packager.stdout:
@@ -1787,7 +2373,7 @@ def mux_process(
             "+faststart",
             output_path,
         ]
-        ffmpeg = subprocess.run(ffmpeg_cmd, capture_output=True, text=True, cwd=str(workdir))
+        ffmpeg = run_command(ffmpeg_cmd, "FFMPEG", cwd=str(workdir), on_progress=_progress("merge"))
         if ffmpeg.returncode != 0:
             logger.error("> ffmpeg merge failed (code=%s) for lecture: %s", ffmpeg.returncode, video_title)
             if ffmpeg.stdout:
@@ -1813,12 +2399,220 @@ def mux_process(
             pass
 
 
-def handle_segments(url, format_id, lecture_id, video_title, output_path, chapter_dir):
-    os.chdir(os.path.join(chapter_dir))
+def _has_segment_journal(*output_paths) -> bool:
+    return any(os.path.isdir(path + ".segments") for path in output_paths)
+
+
+def _save_segment_journal(journal_path: Path, journal: dict) -> None:
+    tmp_path = journal_path.with_suffix(".tmp")
+    with open(tmp_path, encoding="utf8", mode="w") as f:
+        json.dump(journal, f)
+    os.replace(tmp_path, journal_path)
+
+
+def _download_segments(urls, output_path: str, label: str, adopt_prefix: Optional[str] = None) -> bool:
+    """
+    Download a list of media segments into output_path, resumably.
+
+    Each finished segment is kept as its own file in "<output_path>.segments" next to a
+    journal.json listing the completed indexes, so a failed attempt, a retry or a restarted
+    process only fetches what is missing. Segments are identified by URL path (without the
+    signed query string) so a refreshed manifest still matches its journal. adopt_prefix is
+    yt-dlp's temporary filename; complete "<adopt_prefix>-Frag<N>" files left behind by an
+    aria2c run are moved into the journal instead of being downloaded again.
+    """
+    journal_dir = Path(output_path + ".segments")
+    journal_path = journal_dir / "journal.json"
+    keys = [hashlib.sha1(urlsplit(u).path.encode("utf8")).hexdigest()[:16] for u in urls]
+
+    journal = {}
+    if journal_path.exists():
+        try:
+            with open(journal_path, encoding="utf8", mode="r") as f:
+                journal = json.load(f)
+        except Exception:
+            journal = {}
+    if journal.get("keys") != keys:
+        shutil.rmtree(journal_dir, ignore_errors=True)
+        journal = {"keys": keys, "done": []}
+    journal_dir.mkdir(parents=True, exist_ok=True)
+
+    def _segment_path(i):
+        return journal_dir / f"{i:05d}.seg"
+
+    done = {i for i in journal.get("done", []) if _segment_path(i).is_file()}
+    adopted = 0
+    if adopt_prefix:
+        for i in range(len(urls)):
+            fragment = f"{adopt_prefix}-Frag{i}"
+            if i in done or not os.path.isfile(fragment) or os.path.exists(fragment + ".aria2"):
+                continue
+            if os.path.getsize(fragment) > 0:
+                os.replace(fragment, _segment_path(i))
+                done.add(i)
+                adopted += 1
+    journal["done"] = sorted(done)
+    _save_segment_journal(journal_path, journal)
+
+    missing = [i for i in range(len(urls)) if i not in done]
+    logger.info(
+        "> %s: %d/%d segment(s) already on disk (%d adopted from aria2c), fetching %d",
+        label,
+        len(done),
+        len(urls),
+        adopted,
+        len(missing),
+    )
+
+    session = requests.Session()
+    if DISABLE_PROXY:
+        session.trust_env = False
+    expired = []
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrent_downloads)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    def _fetch(i):
+        seg_path = _segment_path(i)
+        part_path = seg_path.with_suffix(".part")
+        last_error = None
+        for attempt in range(1, 6):
+            try:
+                with session.get(urls[i], stream=True, timeout=(10, 60)) as resp:
+                    resp.raise_for_status()
+                    with open(part_path, "wb") as f:
+                        for chunk in resp.iter_content(chunk_size=256 * 1024):
+                            f.write(chunk)
+                os.replace(part_path, seg_path)
+                return
+            except requests.exceptions.HTTPError as exc:
+                if exc.response is not None and exc.response.status_code == 403:
+                    expired.append(i)
+                    raise  # the signed URL expired, retrying it won't help
+                last_error = exc
+            except requests.exceptions.RequestException as exc:
+                last_error = exc
+            time.sleep(min(30, 2**attempt))
+        raise last_error
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrent_downloads) as executor:
+            future_map = {executor.submit(_fetch, i): i for i in missing}
+            for future in as_completed(future_map):
+                i = future_map[future]
+                try:
+                    future.result()
+                except Exception as exc:
+                    logger.error("    > Segment %d of %s failed: %s", i + 1, label, exc)
+                    continue
+                done.add(i)
+                journal["done"] = sorted(done)
+                _save_segment_journal(journal_path, journal)
+    finally:
+        session.close()
+
+    if len(done) < len(urls):
+        if expired:
+            _note_failure("signed URL expired (HTTP 403)")
+        logger.warning("> %s: %d segment(s) still missing, journal kept at %s", label, len(urls) - len(done), journal_dir)
+        return False
+
+    assemble_path = output_path + ".assemble"
+    with open(assemble_path, "wb") as out:
+        for i in range(len(urls)):
+            with open(_segment_path(i), "rb") as segment:
+                shutil.copyfileobj(segment, out, 1024 * 1024)
+    os.replace(assemble_path, output_path)
+    shutil.rmtree(journal_dir, ignore_errors=True)
+    return True
+
+
+def _download_dash_resumable(url, format_id, lecture_id, work_dir: str) -> Optional[int]:
+    """Download the DRM tracks of format_id segment by segment into work_dir; None if unsupported."""
+    try:
+        ytdl = yt_dlp.YoutubeDL(
+            {"quiet": True, "no_warnings": True, "allow_unplayable_formats": True, "enable_file_urls": True}
+        )
+        results = ytdl.extract_info(url, download=False, force_generic_extractor=True)
+    except Exception as exc:
+        logger.warning("> Could not read fragment list from manifest: %s", exc)
+        return None
+
+    formats = {f.get("format_id"): f for f in results.get("formats", [])}
+    tracks = []
+    for fid in format_id.split(","):
+        fmt = formats.get(fid)
+        if not fmt or not fmt.get("fragments"):
+            return None
+        base_url = fmt.get("fragment_base_url") or ""
+        urls = [fragment.get("url") or urljoin(base_url, fragment.get("path")) for fragment in fmt["fragments"]]
+        tracks.append((os.path.join(work_dir, f"{lecture_id}.encrypted.{fmt.get('ext')}"), urls))
+
+    for track_path, urls in tracks:
+        if os.path.isfile(track_path) and not _has_segment_journal(track_path):
+            continue
+        if not _download_segments(urls, track_path, os.path.basename(track_path), adopt_prefix=track_path + ".part"):
+            return 1
+    return 0
+
+
+def _download_hls_resumable(source, lecture_path: str) -> int:
+    """Download an unencrypted HLS rendition segment by segment and remux it to lecture_path."""
+    try:
+        playlist_file = url2pathname(urlsplit(source.get("download_url")).path)
+        with open(playlist_file, encoding="utf8", mode="r") as f:
+            playlist = m3u8.loads(f.read(), uri=source.get("playlist_uri"))
+        if any(key is not None and (key.method or "NONE").upper() != "NONE" for key in playlist.keys):
+            logger.warning("      > HLS segments are encrypted, resumable download not supported")
+            return 1
+        init_section = playlist.segments[0].init_section if playlist.segments else None
+        urls = [init_section.absolute_uri] if init_section else []
+        urls.extend(segment.absolute_uri for segment in playlist.segments)
+    except Exception as exc:
+        logger.warning("      > Could not read the HLS playlist for a resumable download: %s", exc)
+        return 1
+
+    stream_path = lecture_path + (".fmp4" if init_section else ".ts")
+    if not os.path.isfile(stream_path) or _has_segment_journal(stream_path):
+        # yt-dlp only hands plain segment lists to aria2c, so fragments are adopted without an init section
+        adopt_prefix = None if init_section else lecture_path + ".part"
+        if not _download_segments(urls, stream_path, os.path.basename(lecture_path), adopt_prefix):
+            return 1
+
+    remux = run_command(
+        ["ffmpeg", "-y", "-i", stream_path, "-c", "copy", "-bsf:a", "aac_adtstoasc", "-movflags", "+faststart", lecture_path],
+        "FFMPEG",
+    )
+    if remux.returncode != 0:
+        logger.error("      > ffmpeg remux failed (code=%s): %s", remux.returncode, (remux.stderr or "").strip()[-2000:])
+        return remux.returncode
+    os.remove(stream_path)
+    return 0
+
+
+def _local_manifest_path(url) -> Optional[str]:
+    """Path of a manifest written to TEMP_DIR by _extract_mpd/_extract_m3u8, None for remote URLs."""
+    if not url or not url.startswith("file://"):
+        return None
+    return url2pathname(urlsplit(url).path)
+
+
+def _remove_local_manifest(url) -> None:
+    manifest_path = _local_manifest_path(url)
+    if manifest_path is None:
+        return
+    try:
+        os.unlink(manifest_path)
+    except OSError:
+        pass
+
 
-    video_filepath_enc = lecture_id + ".encrypted.mp4"
-    audio_filepath_enc = lecture_id + ".encrypted.m4a"
-    temp_output_path = os.path.join(chapter_dir, lecture_id + ".mp4")
+def handle_segments(url, format_id, lecture_id, video_title, output_path, work_dir):
+    # absolute paths instead of chdir: lecture retries run on other threads
+    video_filepath_enc = os.path.join(work_dir, lecture_id + ".encrypted.mp4")
+    audio_filepath_enc = os.path.join(work_dir, lecture_id + ".encrypted.m4a")
+    output_template = os.path.join(work_dir, f"{lecture_id}.encrypted.%(ext)s")
+    temp_output_path = os.path.join(work_dir, lecture_id + ".mp4")
 
     logger.info("> Downloading Lecture Tracks...")
 
@@ -1865,15 +2659,19 @@ def handle_segments(url, format_id, lecture_id, video_title, output_path, chapte
         "never",
         "-k",
         "-o",
-        f"{lecture_id}.encrypted.%(ext)s",
+        output_template,
         "-f",
         format_id,
         f"{url}",
     ]
 
     def _run_ytdlp(cmd_args):
-        result = subprocess.run(cmd_args, capture_output=True, text=True)
-        return result.returncode, (result.stdout or ""), (result.stderr or "")
+        result = run_command(
+            [cmd_args[0], "--newline", *cmd_args[1:]], "YTDLP", cwd=work_dir, on_progress=_progress(video_title)
+        )
+        if result.returncode != 0 and "HTTP Error 403" in result.stderr:
+            _note_failure("signed URL expired (HTTP 403)")
+        return result.returncode, result.stdout, result.stderr
 
     aria2_args = [
         YTDLP_PATH,
@@ -1896,29 +2694,47 @@ def handle_segments(url, format_id, lecture_id, video_title, output_path, chapte
         "never",
         "-k",
         "-o",
-        f"{lecture_id}.encrypted.%(ext)s",
+        output_template,
         "-f",
         format_id,
         f"{url}",
     ]
 
     download_method = "aria2c"
-    start_download = time.time()
-    try:
-        safe_args = list(aria2_args)
-        safe_args[-1] = _sanitize_url_for_log(url)
-        logger.info("> DRM yt-dlp args (%s, concurrent_fragments=%s): %s", download_method, concurrent_downloads, safe_args)
-    except Exception:
-        pass
-    ret_code, out, err = _run_ytdlp(aria2_args)
-    logger.info("> Lecture track download finished in %.2fs (method=%s, code=%s)", time.time() - start_download, download_method, ret_code)
-    if ret_code != 0:
-        logger.warning("Return code from downloader was non-0 (code=%s). Will retry without aria2c.", ret_code)
-        if out.strip():
-            logger.error("> yt-dlp stdout (truncated): %s", out.strip()[-4000:])
-        if err.strip():
-            logger.error("> yt-dlp stderr (truncated): %s", err.strip()[-4000:])
+    if _has_segment_journal(video_filepath_enc, audio_filepath_enc):
+        logger.info("> Found a segment journal from an earlier attempt, resuming it instead of starting over")
+        ret_code = 1
+    else:
+        start_download = time.time()
+        try:
+            safe_args = list(aria2_args)
+            safe_args[-1] = _sanitize_url_for_log(url)
+            logger.info("> DRM yt-dlp args (%s, concurrent_fragments=%s): %s", download_method, concurrent_downloads, safe_args)
+        except Exception:
+            pass
+        ret_code, out, err = _run_ytdlp(aria2_args)
+        logger.info("> Lecture track download finished in %.2fs (method=%s, code=%s)", time.time() - start_download, download_method, ret_code)
+        if ret_code != 0:
+            logger.warning("Return code from downloader was non-0 (code=%s). Will resume from the segments that arrived.", ret_code)
+            if out.strip():
+                logger.error("> yt-dlp stdout (truncated): %s", out.strip()[-4000:])
+            if err.strip():
+                logger.error("> yt-dlp stderr (truncated): %s", err.strip()[-4000:])
 
+    if ret_code != 0:
+        _stage("resume")
+        download_method = "journal"
+        start_download = time.time()
+        ret_code = _download_dash_resumable(url, format_id, lecture_id, work_dir)
+        if ret_code is not None:
+            logger.info("> Lecture track download finished in %.2fs (method=%s, code=%s)", time.time() - start_download, download_method, ret_code)
+            if ret_code != 0:
+                logger.warning("Resumable download incomplete (code=%s), the segment journal is kept for the next attempt", ret_code)
+                record_strict_failure(lecture_id, video_title, f"segment download incomplete (code={ret_code})")
+                return False
+
+    if ret_code is None:
+        # the manifest didn't expose a fragment list, fall back to a plain yt-dlp run
         fallback_args = [
             YTDLP_PATH,
             "--enable-file-urls",
@@ -1936,7 +2752,7 @@ def handle_segments(url, format_id, lecture_id, video_title, output_path, chapte
             "never",
             "-k",
             "-o",
-            f"{lecture_id}.encrypted.%(ext)s",
+            output_template,
             "-f",
             format_id,
             f"{url}",
@@ -2018,6 +2834,7 @@ def handle_segments(url, format_id, lecture_id, video_title, output_path, chapte
         #     return
         # logger.info("> Decryption complete")
         logger.info("> Merging video and audio, this might take a minute...")
+        _stage("merge")
         ret_code = mux_process(
             video_filepath_enc,
             audio_filepath_enc,
@@ -2032,23 +2849,17 @@ def handle_segments(url, format_id, lecture_id, video_title, output_path, chapte
             logger.error("> DRM muxing pipeline returned non-0 (code=%s), skipping!", ret_code)
             record_strict_failure(lecture_id, video_title, f"mux/merge failed (code={ret_code})")
             return False
-        logger.info("> Merging complete, renaming final file...")
-        os.rename(temp_output_path, output_path)
-        logger.info("> Cleaning up temporary files...")
+        logger.info("> Merging complete, cleaning up temporary files...")
         os.remove(video_filepath_enc)
         os.remove(audio_filepath_enc)
+        logger.info("> Moving final file...")
+        _finish_lecture_file(temp_output_path, output_path)
     except Exception as e:
         logger.exception(f"Muxing error: {e}")
         record_strict_failure(lecture_id, video_title, f"muxing exception: {e}")
         return False
-    finally:
-        os.chdir(HOME_DIR)
-        # if the url is a file url, we need to remove the file after we're done with it
-        if url.startswith("file://"):
-            try:
-                os.unlink(url[7:])
-            except:
-                pass
+    # only now: a failed attempt resumes its segment journal against this manifest
+    _remove_local_manifest(url)
     return True
 
 
@@ -2197,13 +3008,12 @@ def download_aria(url, file_dir, filename):
         logger.info("aria2c args: %s", safe_args)
     except Exception:
         pass
-    process = subprocess.Popen(args)
-    log_subprocess_output("ARIA2-STDOUT", process.stdout)
-    log_subprocess_output("ARIA2-STDERR", process.stderr)
-    ret_code = process.wait()
-    if ret_code != 0:
+    result = run_command(args, "ARIA2", on_progress=_progress(filename))
+    if result.returncode != 0:
+        # aria2c reports its errors on stdout
+        logger.error("> aria2c output (truncated): %s", (result.stdout + "\n" + result.stderr).strip()[-2000:])
         raise Exception("Return code from the downloader was non-0 (error)")
-    return ret_code
+    return result.returncode
 
 
 def process_caption(caption, lecture_title, lecture_dir):
@@ -2212,153 +3022,371 @@ def process_caption(caption, lecture_title, lecture_dir):
     filename = f"%s_%s.%s" % (sanitize_filename(lecture_title), caption.get("language"), caption.get("extension"))
     filename_no_ext = f"%s_%s" % (sanitize_filename(lecture_title), caption.get("language"))
     filepath = os.path.join(lecture_dir, filename)
+    is_vtt = caption.get("extension") == "vtt"
+    srt_filepath = os.path.join(lecture_dir, filename_no_ext + ".srt")
 
-    if os.path.isfile(filepath):
+    if output_index.exists(filepath) or (is_vtt and output_index.exists(srt_filepath)):
         logger.info("    > Caption '%s' already downloaded." % filename)
     else:
         logger.info(f"    >  Downloading caption: '%s'" % filename)
+        start = time.time()
         try:
-            ret_code = download_aria(caption.get("download_url"), lecture_dir, filename)
-            logger.debug(f"      > Download return code: {ret_code}")
-        except Exception as e:
-            if tries >= 3:
-                logger.error(f"    > Error downloading caption: {e}. Exceeded retries, skipping.")
-                return
+            if is_vtt:
+                # converted to SRT while it streams in, the VTT only touches disk with --keep-vtt
+                _fetch_caption(caption.get("download_url"), srt_filepath, filepath if keep_vtt else None, to_srt=True)
+                output_index.add(srt_filepath)
+                if keep_vtt:
+                    output_index.add(filepath)
             else:
-                logger.error(f"    > Error downloading caption: {e}. Will retry {3-tries} more times.")
-                process_caption(caption, lecture_title, lecture_dir, tries + 1)
-        if caption.get("extension") == "vtt":
-            try:
-                logger.info("    > Converting caption to SRT format...")
-                convert(lecture_dir, filename_no_ext)
-                logger.info("    > Caption conversion complete.")
-                if not keep_vtt:
-                    os.remove(filepath)
-            except Exception:
-                logger.exception(f"    > Error converting caption")
+                _fetch_caption(caption.get("download_url"), filepath)
+                output_index.add(filepath)
+            logger.info("    > Caption saved in %.0fms (%s)", (time.time() - start) * 1000, filename_no_ext)
+        except Exception as e:
+            logger.error(f"    > Error downloading caption: {e}. Exceeded retries, skipping.")
+            return
     
-    # Auto-translate English captions to Chinese if enabled
+    # Auto-translate English captions (to Chinese by default) if enabled
     if auto_translate and translator and caption.get("language") == "en":
+        target_langs = translation_targets()
         srt_filepath = os.path.join(lecture_dir, filename_no_ext + ".srt")
-        dual_srt_path = os.path.join(lecture_dir, f"{sanitize_filename(lecture_title)}_en_zh.srt")
-        if os.path.isfile(dual_srt_path):
+        lang_suffix = "_".join(lang.lower() for lang in target_langs)
+        dual_srt_path = os.path.join(lecture_dir, f"{sanitize_filename(lecture_title)}_en_{lang_suffix}.srt")
+        if output_index.exists(dual_srt_path):
             logger.info(
                 "    > Dual-language subtitle already exists (%s), skipping translation.",
                 os.path.basename(dual_srt_path),
             )
-            if os.path.isfile(srt_filepath):
+            if output_index.exists(srt_filepath):
                 try:
                     os.remove(srt_filepath)
+                    output_index.discard(srt_filepath)
                     logger.info("    > Removed redundant English subtitle after skipping translation.")
                 except OSError as err:
                     logger.warning("    > Could not remove redundant English subtitle: %s", err)
-        elif os.path.isfile(srt_filepath):
+        elif output_index.exists(srt_filepath):
             try:
-                import pysrt
-                logger.info("    > Translating caption to Chinese...")
-
-                def _translate_and_save(src_path: str, out_path: str, lecture_name: str):
-                    start_time = time.time()
-
-                    # Load English SRT
-                    subs = pysrt.open(src_path, encoding='utf-8')
+                logger.info("    > Translating caption to %s...", ", ".join(target_langs))
+                translate_caption(srt_filepath, dual_srt_path, lecture_title, target_langs, translation_scope)
+            except Exception as e:
+                logger.exception(f"    > Error during translation: {e}")
 
-                    # Extract all text for translation
-                    texts = [sub.text for sub in subs]
 
-                    # Translate all texts
-                    translated_texts = translator.translate_batch(
-                        texts,
-                        source_lang="EN",
-                        target_lang="ZH",
-                        max_retries=3,
-                    )
+def _translate_and_save(src_path: str, out_path: str, lecture_name: str, target_langs: List[str], scope=None):
+    import pysrt
 
-                    # Create dual-language version (EN + ZH)
-                    dual_subs = pysrt.SubRipFile()
-                    for idx, (sub, zh_text) in enumerate(zip(subs, translated_texts)):
-                        if zh_text:
-                            # Combine English and Chinese
-                            dual_text = f"{sub.text}\n{zh_text}"
-                        else:
-                            # If translation failed, keep English only
-                            dual_text = sub.text
-                            logger.warning(f"    > Translation failed for subtitle {idx + 1}, keeping English only")
-
-                        dual_sub = pysrt.SubRipItem(
-                            index=sub.index,
-                            start=sub.start,
-                            end=sub.end,
-                            text=dual_text
-                        )
-                        dual_subs.append(dual_sub)
+    start_time = time.time()
 
-                    # Save dual-language SRT
-                    dual_subs.save(out_path, encoding='utf-8')
-                    logger.info(f"    > Dual-language subtitle saved: {os.path.basename(out_path)}")
+    # Load English SRT
+    subs = pysrt.open(src_path, encoding='utf-8')
 
-                    # Remove standalone English caption to keep only the bilingual file
-                    try:
-                        os.remove(src_path)
-                        logger.info("    > Removed original English subtitle (kept EN+ZH file only)")
-                    except OSError as err:
-                        logger.warning(f"    > Could not remove English subtitle: {err}")
+    # Extract all text for translation
+    texts, groups = _translation_units(subs)
 
-                    duration = time.time() - start_time
-                    logger.info(
-                        "    > Translation finished in %.2fs (%s)",
-                        duration,
-                        os.path.basename(out_path),
-                    )
-                    return lecture_name
-
-                async_env = os.getenv("TRANSLATE_ASYNC", "1").strip().lower()
-                async_enabled = async_env not in ("0", "false", "no")
-
-                if async_enabled:
-                    _ensure_translation_executor()
-                    future = translation_executor.submit(
-                        _translate_and_save,
-                        srt_filepath,
-                        dual_srt_path,
-                        lecture_title,
-                    )
-                    with translation_lock:
-                        translation_futures.append(future)
-                    logger.info(
-                        "    > Translation task submitted (%s)",
-                        os.path.basename(srt_filepath),
-                    )
-                else:
-                    _translate_and_save(srt_filepath, dual_srt_path, lecture_title)
-                
-            except Exception as e:
-                logger.exception(f"    > Error during translation: {e}")
+    # Translate all texts, every target language in one pass
+    translated = translator.translate_batch_multi(
+        texts,
+        source_lang="EN",
+        target_langs=target_langs,
+        max_retries=3,
+        scope=scope,
+    )
+    _save_translated_srt(subs, translated, src_path, out_path, start_time, target_langs, groups)
+    return lecture_name
+
+
+def _save_translated_srt(subs, translated, src_path: str, out_path: str, start_time: float, target_langs, groups=None):
+    import pysrt
+
+    if groups is not None:
+        # sentences were translated as a whole, put them back on the original cue timings
+        source_texts = [sub.text for sub in subs]
+        translated = {lang: resplit_translations(texts, groups, source_texts) for lang, texts in translated.items()}
+
+    # Create the multi-language version (EN + one line per target language)
+    dual_subs = pysrt.SubRipFile()
+    for idx, sub in enumerate(subs):
+        lines = [sub.text]
+        for lang in target_langs:
+            text = translated[lang][idx]
+            if not text:
+                # If translation failed, keep the other languages
+                logger.warning(f"    > {lang} translation failed for subtitle {idx + 1}, leaving it out")
+            elif text.strip() != sub.text.strip() and text not in lines:
+                # passed-through cues (code, numbers, URLs) are not repeated
+                lines.append(text)
+        dual_text = "\n".join(lines)
+
+        dual_sub = pysrt.SubRipItem(
+            index=sub.index,
+            start=sub.start,
+            end=sub.end,
+            text=dual_text
+        )
+        dual_subs.append(dual_sub)
 
+    # Save dual-language SRT
+    dual_subs.save(out_path, encoding='utf-8')
+    output_index.add(out_path)
+    _get_translation_jobs().complete(out_path)
+    logger.info(f"    > Dual-language subtitle saved: {os.path.basename(out_path)}")
 
-def _ensure_translation_executor():
-    global translation_executor
-    if translation_executor is not None:
-        return
-    workers_env = os.getenv("SUBTITLE_TRANSLATE_FILE_MAX_WORKERS") or os.getenv("TRANSLATE_FILE_MAX_WORKERS")
+    # Remove standalone English caption to keep only the bilingual file
     try:
-        workers = max(1, int(workers_env)) if workers_env else 1
-    except ValueError:
-        workers = 1
-    translation_executor = ThreadPoolExecutor(max_workers=workers)
-    logger.info("    > Translation executor started (workers=%d)", workers)
+        os.remove(src_path)
+        output_index.discard(src_path)
+        logger.info("    > Removed original English subtitle (kept the multi-language file only)")
+    except OSError as err:
+        logger.warning(f"    > Could not remove English subtitle: {err}")
+
+    duration = time.time() - start_time
+    logger.info(
+        "    > Translation finished in %.2fs (%s)",
+        duration,
+        os.path.basename(out_path),
+    )
 
 
-def wait_for_translation_tasks():
-    global translation_executor, translation_futures
-    if translation_executor is None:
-        return
+def translate_caption(
+    srt_filepath: str, dual_srt_path: str, lecture_title: str, target_langs: List[str], scope: Optional[str] = None
+) -> None:
+    """
+    Translate one English SRT into dual_srt_path, in the background unless TRANSLATE_ASYNC=0.
+    Cache and translation-memory hits are counted under scope (the course).
+    """
+    import pysrt
 
     with translation_lock:
-        futures = list(translation_futures)
-        translation_futures = []
+        if os.path.normpath(dual_srt_path) in translation_outputs:
+            logger.info("    > Translation of '%s' is already queued, skipping", os.path.basename(dual_srt_path))
+            return
+        translation_outputs.add(os.path.normpath(dual_srt_path))
+
+    async_env = os.getenv("TRANSLATE_ASYNC", "1").strip().lower()
+    async_enabled = async_env not in ("0", "false", "no")
+    queue_env = os.getenv("TRANSLATE_COURSE_QUEUE", "1").strip().lower()
+
+    if async_enabled:
+        # persisted until the translated SRT is written, so a killed run can pick it up again
+        _get_translation_jobs().add(srt_filepath, dual_srt_path, lecture_title, target_langs)
+
+    if async_enabled and queue_env not in ("0", "false", "no"):
+        # cues of short lectures share LLM/DeepL requests with the rest of the course
+        subs = pysrt.open(srt_filepath, encoding='utf-8')
+        start_time = time.time()
+        texts, groups = _translation_units(subs)
+        _ensure_translation_queue(target_langs).submit(
+            texts,
+            lambda translated: _save_translated_srt(
+                subs, translated, srt_filepath, dual_srt_path, start_time, target_langs, groups
+            ),
+            name=lecture_title,
+            scope=scope,
+        )
+    elif async_enabled:
+        _ensure_translation_executor()
+        future = translation_executor.submit(
+            _translate_and_save,
+            srt_filepath,
+            dual_srt_path,
+            lecture_title,
+            target_langs,
+            scope,
+        )
+        with translation_lock:
+            translation_futures.append(future)
+        logger.info(
+            "    > Translation task submitted (%s)",
+            os.path.basename(srt_filepath),
+        )
+    else:
+        _translate_and_save(srt_filepath, dual_srt_path, lecture_title, target_langs, scope)
 
-    if not futures:
+
+def _report_translation_stats(course_name: str) -> None:
+    stats = getattr(translator, "stats", None)
+    counts = stats.pop(course_name) if stats is not None else None
+    if not counts:
+        return
+    total = sum(counts.values())
+    if not total:
+        return
+    reused = counts["cached"] + counts["memory"] + counts["fuzzy"]
+    logger.info(
+        "> Subtitle translation for '%s': %d line(s), %.1f%% reused (%d cached, %d normalised, %d near-duplicate), "
+        "%d skipped, %d sent to the provider",
+        course_name,
+        total,
+        100.0 * reused / total,
+        counts["cached"],
+        counts["memory"],
+        counts["fuzzy"],
+        counts["skipped"],
+        counts["sent"],
+    )
+    progress_events.emit("translation_stats", course=course_name, **counts)
+
+
+def resume_translation_jobs() -> int:
+    """Queue the translations a previous run left unfinished. Returns how many were resumed."""
+    resumed = 0
+    jobs = _get_translation_jobs()
+    for job in jobs.pending():
+        if os.path.exists(job["out_path"]):
+            jobs.complete(job["out_path"])
+            continue
+        if not os.path.exists(job["src_path"]):
+            logger.warning("> English subtitle for an unfinished translation is gone, dropping it: %s", job["src_path"])
+            jobs.complete(job["out_path"])
+            continue
+        logger.info("> Resuming translation of '%s'", job["title"])
+        jobs.start_attempt(job["out_path"])
+        try:
+            translate_caption(job["src_path"], job["out_path"], job["title"], job["target_langs"])
+            resumed += 1
+        except Exception as e:
+            logger.exception(f"    > Error during translation: {e}")
+    return resumed
+
+
+def _get_caption_session() -> requests.Session:
+    global caption_session
+    with caption_session_lock:
+        if caption_session is None:
+            session = requests.Session()
+            if DISABLE_PROXY:
+                session.trust_env = False
+            session.headers.update({"User-Agent": HEADERS["User-Agent"]})
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=caption_workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            caption_session = session
+    return caption_session
+
+
+def _fetch_caption(url: str, out_path: str, raw_path: Optional[str] = None, to_srt: bool = False) -> None:
+    """Stream a caption to out_path (as SRT when to_srt is set), keeping the original at raw_path if given."""
+    session = _get_caption_session()
+    for attempt in range(1, 4):
+        part_path = out_path + ".part"
+        try:
+            with session.get(url, stream=True, timeout=(10, 60)) as resp:
+                resp.raise_for_status()
+                resp.raw.decode_content = True
+                lines = io.TextIOWrapper(resp.raw, encoding="utf-8-sig", errors="ignore")
+                with open(part_path, mode="w", encoding="utf8", errors="ignore") as out:
+                    if raw_path:
+                        with open(raw_path, mode="w", encoding="utf8", errors="ignore") as raw:
+                            out.writelines(iter_srt(_tee_lines(lines, raw)) if to_srt else _tee_lines(lines, raw))
+                    else:
+                        out.writelines(iter_srt(lines) if to_srt else lines)
+            os.replace(part_path, out_path)
+            return
+        except (requests.exceptions.RequestException, OSError) as exc:
+            if attempt == 3:
+                raise
+            logger.warning("    > Caption download failed (%s), retrying (%d/3)...", exc, attempt)
+            time.sleep(attempt)
+
+
+def _tee_lines(lines, f):
+    for line in lines:
+        f.write(line)
+        yield line
+
+
+def _wait_for_captions(futures) -> None:
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            logger.exception("    > Error processing caption")
+
+
+def _translation_units(subs):
+    """
+    Texts to send for translation and, when TRANSLATE_MERGE_SENTENCES is on, the cue groups
+    they were merged from (None otherwise).
+    """
+    texts = [sub.text for sub in subs]
+    if os.getenv("TRANSLATE_MERGE_SENTENCES", "0").strip().lower() in ("0", "false", "no"):
+        return texts, None
+    gaps = [0.0] + [(subs[i].start.ordinal - subs[i - 1].end.ordinal) / 1000 for i in range(1, len(subs))]
+    units, groups = merge_cues(texts, gaps)
+    logger.info("    > Merged %d cue(s) into %d sentence(s) for translation", len(texts), len(units))
+    return units, groups
+
+
+def translation_targets() -> List[str]:
+    """Target languages from TRANSLATE_TARGET_LANGS (comma separated, default ZH)."""
+    langs = [lang.strip().upper() for lang in os.getenv("TRANSLATE_TARGET_LANGS", "ZH").split(",") if lang.strip()]
+    return langs or ["ZH"]
+
+
+def _get_translation_jobs() -> TranslationJobStore:
+    global translation_jobs
+    with translation_lock:
+        if translation_jobs is None:
+            cache_dir = getattr(translator, "cache_dir", None) or ".translation_cache"
+            translation_jobs = TranslationJobStore(os.path.join(cache_dir, "translation_jobs.sqlite3"))
+        return translation_jobs
+
+
+def _ensure_translation_queue(target_langs: Optional[List[str]] = None) -> TranslationQueue:
+    # one queue per language set: jobs resumed from an older run may ask for other languages
+    key = tuple(target_langs or translation_targets())
+    with translation_lock:
+        course_queue = translation_queues.get(key)
+        if course_queue is None:
+            course_queue = translation_queues[key] = TranslationQueue(translator, source_lang="EN", target_langs=key)
+            logger.info(
+                "    > Course translation queue started (batch<=%d chars, linger=%.0fs)",
+                course_queue.batch_chars,
+                course_queue.linger,
+            )
+        return course_queue
+
+
+def _ensure_translation_executor():
+    global translation_executor
+    if translation_executor is not None:
+        return
+    workers_env = os.getenv("SUBTITLE_TRANSLATE_FILE_MAX_WORKERS") or os.getenv("TRANSLATE_FILE_MAX_WORKERS")
+    try:
+        workers = max(1, int(workers_env)) if workers_env else 1
+    except ValueError:
+        workers = 1
+    translation_executor = ThreadPoolExecutor(max_workers=workers)
+    logger.info("    > Translation executor started (workers=%d)", workers)
+
+
+def wait_for_translation_tasks():
+    global translation_report_scopes
+    _drain_translation_tasks()
+    with translation_lock:
+        scopes, translation_report_scopes = translation_report_scopes, []
+    for course_name in scopes:
+        _report_translation_stats(course_name)
+
+
+def _drain_translation_tasks():
+    global translation_executor, translation_futures
+    with translation_lock:
+        queues = list(translation_queues.values())
+        translation_queues.clear()
+    if queues:
+        logger.info("> Waiting for queued subtitle translations to finish...")
+        start = time.time()
+        for course_queue in queues:
+            course_queue.shutdown()
+        logger.info("> Queued translations completed in %.2fs", time.time() - start)
+    if translation_executor is None:
+        return
+
+    with translation_lock:
+        futures = list(translation_futures)
+        translation_futures = []
+
+    if not futures:
         translation_executor.shutdown(wait=True)
         translation_executor = None
         return
@@ -2380,17 +3408,113 @@ def wait_for_translation_tasks():
     translation_executor = None
 
 
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _lecture_work_dir(lecture, source, chapter_dir: str) -> str:
+    """
+    Pick the folder a lecture's intermediates (fragments, encrypted tracks, mux output) go to.
+
+    Without --scratch-dir this is the chapter folder, as before. With it, every lecture gets
+    its own folder under "<scratch>/lectures" (kept across runs so segment journals can be
+    resumed). When --scratch-quota is set and the scratch volume is full, e.g. because of
+    other runs sharing it, this waits for room and falls back to the chapter folder after
+    UDEMY_SCRATCH_WAIT_MAX seconds.
+    """
+    if not SCRATCH_DIR:
+        return chapter_dir
+    work_dir = os.path.join(SCRATCH_DIR, "lectures", str(lecture.get("id")))
+    if os.path.isdir(work_dir):
+        return work_dir
+
+    if scratch_quota:
+        # encrypted tracks + decrypted tracks + mux output (or fragments + merged file)
+        needed = (_estimate_source_bytes(source, lecture.get("duration")) or 0) * 3
+        if needed > scratch_quota:
+            logger.warning(
+                "      > Lecture needs ~%s of scratch space, more than the %s quota; using the output folder",
+                _format_bytes(needed),
+                _format_bytes(scratch_quota),
+            )
+            return chapter_dir
+        try:
+            wait_max = int(os.getenv("UDEMY_SCRATCH_WAIT_MAX", "600"))
+        except ValueError:
+            wait_max = 600
+        deadline = time.time() + wait_max
+        waiting = False
+        while _dir_size(SCRATCH_DIR) + needed > scratch_quota:
+            if time.time() >= deadline:
+                logger.warning("      > Scratch quota still full after %ds, using the output folder", wait_max)
+                return chapter_dir
+            if not waiting:
+                logger.info("      > Scratch quota full (%s), waiting for room...", _format_bytes(scratch_quota))
+                waiting = True
+            time.sleep(5)
+
+    os.makedirs(work_dir, exist_ok=True)
+    return work_dir
+
+
+def _release_lecture_work_dir(work_dir: str) -> None:
+    if SCRATCH_DIR and os.path.dirname(os.path.normpath(work_dir)) == os.path.join(SCRATCH_DIR, "lectures"):
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def _finish_lecture_file(work_path: str, final_path: str) -> None:
+    """Move a finished lecture from its scratch folder to the output folder."""
+    if os.path.normpath(work_path) == os.path.normpath(final_path):
+        return
+    _stage("move")
+    if not os.path.isfile(work_path):
+        _release_lecture_work_dir(os.path.dirname(work_path))
+    elif SCRATCH_DIR and background_move:
+        background_mover.submit(work_path, final_path)
+    else:
+        shutil.move(work_path, final_path)
+        _release_lecture_work_dir(os.path.dirname(work_path))
+
+
+def _select_lecture_source(lecture):
+    """Return the video source process_lecture will download for a parsed lecture, or None."""
+    if lecture.get("is_encrypted"):
+        lecture_sources = lecture.get("video_sources") or []
+        if not lecture_sources:
+            return None
+        source = lecture_sources[-1]  # last index is the best quality
+        if isinstance(quality, int):
+            source = min(lecture_sources, key=lambda x: abs(int(x.get("height")) - quality))
+        return source
+
+    sources = lecture.get("sources") or []
+    sources = sorted(sources, key=lambda x: int(x.get("height")), reverse=True)
+    if not sources:
+        return None
+    source = sources[0]  # first index is the best quality
+    if isinstance(quality, int):
+        source = min(sources, key=lambda x: abs(int(x.get("height")) - quality))
+    return source
+
+
 def process_lecture(lecture, lecture_path, chapter_dir):
     lecture_id = lecture.get("id")
     lecture_title = lecture.get("lecture_title")
+    _event_context.lecture_id = lecture_id
+    _stage("download")
     is_encrypted = lecture.get("is_encrypted")
     lecture_sources = lecture.get("video_sources")
 
     if is_encrypted:
         if len(lecture_sources) > 0:
-            source = lecture_sources[-1]  # last index is the best quality
-            if isinstance(quality, int):
-                source = min(lecture_sources, key=lambda x: abs(int(x.get("height")) - quality))
+            source = _select_lecture_source(lecture)
             logger.info(
                 f"      > Lecture '{lecture_title}' has DRM, attempting to download. Selected quality: {source.get('height')}"
             )
@@ -2400,7 +3524,7 @@ def process_lecture(lecture, lecture_path, chapter_dir):
                 str(lecture_id),
                 lecture_title,
                 lecture_path,
-                chapter_dir,
+                _lecture_work_dir(lecture, source, chapter_dir),
             )
             if ok is False:
                 record_strict_failure(str(lecture_id), lecture_title, "DRM handler failed")
@@ -2412,19 +3536,20 @@ def process_lecture(lecture, lecture_path, chapter_dir):
         sources = lecture.get("sources")
         sources = sorted(sources, key=lambda x: int(x.get("height")), reverse=True)
         if sources:
-            if not os.path.isfile(lecture_path):
+            if not output_index.exists(lecture_path):
                 logger.info("      > Lecture doesn't have DRM, attempting to download...")
-                source = sources[0]  # first index is the best quality
-                if isinstance(quality, int):
-                    source = min(sources, key=lambda x: abs(int(x.get("height")) - quality))
+                source = _select_lecture_source(lecture)
                 try:
                     logger.info("      ====== Selected quality: %s %s", source.get("type"), source.get("height"))
                     url = source.get("download_url")
                     source_type = source.get("type")
+                    work_dir = _lecture_work_dir(lecture, source, chapter_dir)
                     if source_type == "hls":
-                        temp_filepath = lecture_path.replace(".mp4", ".%(ext)s")
+                        work_path = os.path.join(work_dir, os.path.basename(lecture_path))
+                        temp_filepath = work_path.replace(".mp4", ".%(ext)s")
                         cmd = [
                             YTDLP_PATH,
+                            "--newline",
                             "--enable-file-urls",
                             "--force-generic-extractor",
                             "--allow-unplayable-formats",
@@ -2444,14 +3569,26 @@ def process_lecture(lecture, lecture_path, chapter_dir):
                             f"{temp_filepath}",
                             f"{url}",
                         ]
-                        process = subprocess.Popen(cmd)
-                        log_subprocess_output("YTDLP-STDOUT", process.stdout)
-                        log_subprocess_output("YTDLP-STDERR", process.stderr)
-                        ret_code = process.wait()
+                        if _has_segment_journal(work_path + ".ts", work_path + ".fmp4"):
+                            logger.info("      > Found a segment journal from an earlier attempt, resuming it")
+                            ret_code = 1
+                        else:
+                            result = run_command(cmd, "YTDLP", on_progress=_progress(lecture_title))
+                            ret_code = result.returncode
+                            if ret_code != 0:
+                                logger.warning("      > yt-dlp HLS download failed (code=%s), resuming segment by segment", ret_code)
+                                if "HTTP Error 403" in result.stderr:
+                                    _note_failure("signed URL expired (HTTP 403)")
+                                if result.stderr:
+                                    logger.debug("      > yt-dlp stderr (truncated): %s", result.stderr[-4000:])
+                        if ret_code != 0:
+                            _stage("resume")
+                            ret_code = _download_hls_resumable(source, work_path)
                         if ret_code == 0:
-                            tmp_file_path = lecture_path + ".tmp"
+                            tmp_file_path = work_path + ".tmp"
                             logger.info("      > HLS Download success")
                             if use_h265:
+                                _stage("encode")
                                 codec = "hevc_nvenc" if use_nvenc else "libx265"
                                 transcode = "-hwaccel cuda -hwaccel_output_format cuda".split(" ") if use_nvenc else []
                                 cmd = [
@@ -2459,7 +3596,7 @@ def process_lecture(lecture, lecture_path, chapter_dir):
                                     *transcode,
                                     "-y",
                                     "-i",
-                                    lecture_path,
+                                    work_path,
                                     "-c:v",
                                     codec,
                                     "-c:a",
@@ -2470,24 +3607,26 @@ def process_lecture(lecture, lecture_path, chapter_dir):
                                     'comment="Downloaded with Udemy-Downloader by Sheikh Bilal (https://github.com/sheikh-bilal65)"',
                                     tmp_file_path,
                                 ]
-                                process = subprocess.Popen(cmd)
-                                log_subprocess_output("FFMPEG-STDOUT", process.stdout)
-                                log_subprocess_output("FFMPEG-STDERR", process.stderr)
-                                ret_code = process.wait()
+                                result = run_command(cmd, "FFMPEG", on_progress=_progress("encode"))
+                                ret_code = result.returncode
                                 if ret_code == 0:
-                                    os.unlink(lecture_path)
-                                    os.rename(tmp_file_path, lecture_path)
+                                    os.unlink(work_path)
+                                    os.rename(tmp_file_path, work_path)
                                     logger.info("      > Encoding complete")
                                 else:
                                     logger.error("      > Encoding returned non-zero return code")
                                     record_strict_failure(str(lecture_id), lecture_title, f"ffmpeg encode failed (code={ret_code})")
+                            _finish_lecture_file(work_path, lecture_path)
                         else:
                             logger.error("      > HLS Download returned non-zero return code (code=%s)", ret_code)
                             record_strict_failure(str(lecture_id), lecture_title, f"HLS download failed (code={ret_code})")
                             return
                     else:
-                        ret_code = download_aria(url, chapter_dir, lecture_title + ".mp4")
+                        ret_code = download_aria(url, work_dir, lecture_title + ".mp4")
                         logger.debug(f"      > Download return code: {ret_code}")
+                        _finish_lecture_file(
+                            os.path.join(work_dir, lecture_title + ".mp4"), os.path.join(chapter_dir, lecture_title + ".mp4")
+                        )
                 except Exception:
                     logger.exception(f">        Error downloading lecture")
                     record_strict_failure(str(lecture_id), lecture_title, "exception downloading lecture")
@@ -2551,6 +3690,447 @@ def process_coding_assignment(quiz, lecture, chapter_dir):
             f.write(html)
 
 
+def _raw_lecture_expiry(lecture: dict) -> Optional[float]:
+    asset = (lecture.get("data") or {}).get("asset")
+    if not isinstance(asset, dict):
+        return None
+    urls = [s.get("src") for s in asset.get("media_sources") or [] if isinstance(s, dict)]
+    stream_urls = asset.get("stream_urls")
+    if isinstance(stream_urls, dict):
+        urls.extend(s.get("file") for s in stream_urls.get("Video") or [] if isinstance(s, dict))
+    return _min_expiry(*urls)
+
+
+def _refresh_lecture(udemy: Udemy, course_id, lecture: dict) -> Optional[dict]:
+    """Fetch a single lecture again for fresh signed URLs and re-parse it; None if that fails."""
+    lecture_id = lecture.get("id")
+    url = LECTURE_URL.format(portal_name=portal_name, course_id=course_id, lecture_id=lecture_id)
+    try:
+        data = udemy.session._get(url, LECTURE_PARAMS).json()
+    except Exception as exc:
+        logger.warning("    > Could not refresh lecture %s: %s", lecture_id, exc)
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("asset"), dict):
+        logger.warning("    > Could not refresh lecture %s: the API returned no asset", lecture_id)
+        return None
+
+    raw_lecture = {key: lecture.get(key) for key in ("index", "lecture_index", "lecture_title", "_class", "id")}
+    raw_lecture["data"] = data
+    parsed_lecture = udemy._parse_lecture(raw_lecture)
+    parsed_lecture_cache[lecture_id] = parsed_lecture
+    logger.info("    > Refreshed the signed URLs of lecture '%s'", lecture.get("lecture_title"))
+    return parsed_lecture
+
+
+def _get_parsed_lecture(udemy: Udemy, lecture, course_id=None):
+    lecture_id = lecture.get("id")
+    parsed_lecture = parsed_lecture_cache.get(lecture_id)
+    if parsed_lecture is None:
+        # a curriculum loaded from file (or fetched long ago) may carry URLs that have already expired
+        expires = _raw_lecture_expiry(lecture)
+        if course_id is not None and expires is not None and expires - time.time() < url_expiry_margin:
+            parsed_lecture = _refresh_lecture(udemy, course_id, lecture)
+        if parsed_lecture is None:
+            parsed_lecture = udemy._parse_lecture(lecture)
+        parsed_lecture_cache[lecture_id] = parsed_lecture
+    return parsed_lecture
+
+
+def _lecture_download_priority(lecture: dict) -> float:
+    # lectures whose signed URLs run out first are downloaded first
+    parsed_lecture = parsed_lecture_cache.get(lecture.get("id"))
+    expires = parsed_lecture.get("expires") if parsed_lecture else _raw_lecture_expiry(lecture)
+    return expires if expires is not None else float("inf")
+
+
+def _lecture_output_path(chapter_dir, lecture_title, parsed_lecture):
+    extension = "mp4"  # video lectures dont have an extension property, so we assume its mp4
+    if parsed_lecture.get("extension") != None:
+        # if the lecture extension property isnt none, set the extension to the lecture extension
+        extension = parsed_lecture.get("extension")
+    lecture_file_name = sanitize_filename(lecture_title + "." + extension)
+    lecture_file_name = deEmojify(lecture_file_name)
+    return os.path.join(chapter_dir, lecture_file_name)
+
+
+def _format_bytes(num) -> str:
+    num = float(num or 0)
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num) < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TB"
+
+
+def _head_content_length(url: str) -> Optional[int]:
+    try:
+        resp = requests.head(url, allow_redirects=True, timeout=(10, 30))
+    except requests.exceptions.RequestException:
+        return None
+    if not resp.ok:
+        return None
+    try:
+        return int(resp.headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimate_source_bytes(source, duration) -> Optional[int]:
+    """Estimate stream size from manifest bitrates; progressive files return None and are sized via HEAD."""
+    source_type = source.get("type")
+    if not duration:
+        return None
+    if source_type == "hls":
+        bandwidth = source.get("bandwidth")  # bits per second
+        return int(bandwidth * duration / 8) if bandwidth else None
+    if source_type == "dash":
+        tbr = (source.get("tbr") or 0) + (source.get("audio_tbr") or 0)  # kbit per second
+        return int(tbr * 1000 * duration / 8) if tbr else None
+    return None
+
+
+def _raw_manifest_asset(lecture: dict) -> Optional[dict]:
+    """The asset of a curriculum lecture that _parse_lecture can only parse by fetching a DASH/HLS manifest."""
+    asset = (lecture.get("data") or {}).get("asset")
+    if not isinstance(asset, dict):
+        return None
+    stream_urls = asset.get("stream_urls")
+    if stream_urls is None:
+        sources = asset.get("media_sources") or []
+        drm = any(isinstance(s, dict) and s.get("type") == "application/dash+xml" for s in sources)
+        return asset if drm else None
+    if skip_hls or not isinstance(stream_urls, dict):
+        return None
+    videos = [s for s in stream_urls.get("Video") or [] if isinstance(s, dict) and s.get("file")]
+    hls = any(s.get("type") == "application/x-mpegURL" or "m3u8" in s.get("file") for s in videos)
+    return asset if hls else None
+
+
+def _quick_estimate_bytes(asset: dict) -> Optional[int]:
+    """Size a manifest lecture from its time_estimation and rendition height, without fetching the manifest."""
+    duration = asset.get("time_estimation")
+    if not duration:
+        return None
+    stream_urls = asset.get("stream_urls") if isinstance(asset.get("stream_urls"), dict) else {}
+    heights = [int(s.get("label")) for s in stream_urls.get("Video") or [] if str(s.get("label") or "").isdigit()]
+    if heights:
+        height = min(heights, key=lambda h: abs(h - quality)) if isinstance(quality, int) else max(heights)
+    else:
+        height = quality if isinstance(quality, int) else 1080
+    kbps = next(rate for min_height, rate in QUICK_PLAN_KBPS if height >= min_height)
+    return int(kbps * 1000 * duration / 8)
+
+
+def _plan_course(udemy: Udemy, udemy_object: dict, course_dir: str) -> dict:
+    """
+    Estimate how many bytes the run will write before anything is downloaded.
+
+    Lectures behind a DASH/HLS manifest are sized from the curriculum's time_estimation
+    and a typical bitrate for their height, and are parsed only when they are downloaded,
+    so their signed URLs stay fresh. They are parsed up front with --exact-plan, when
+    their length is unknown, or for --verify when already on disk. In that case they are
+    sized from the manifest bitrate. Everything else is parsed here (no extra requests), and
+    progressive files and assets are sized from a HEAD Content-Length. Lectures already on
+    disk count towards the course total but not towards the pending bytes.
+    """
+    plan = {
+        "lectures": {},
+        "total_bytes": 0,
+        "pending_bytes": 0,
+        "peak_bytes": 0,
+        "total_duration": 0,
+        "unknown": 0,
+    }
+    head_jobs = []
+
+    for chapter in udemy_object.get("chapters"):
+        if chapter_filter is not None and int(chapter.get("chapter_index")) not in chapter_filter:
+            continue
+        chapter_dir = os.path.join(course_dir, chapter.get("chapter_title"))
+
+        for lecture in chapter.get("lectures"):
+            if lecture.get("_class") == "quiz":
+                continue
+            lecture_id = lecture.get("id")
+            lecture_title = lecture.get("lecture_title")
+            manifest_asset = None if lecture_id in parsed_lecture_cache else _raw_manifest_asset(lecture)
+            if manifest_asset is not None:
+                lecture_path = _lecture_output_path(chapter_dir, lecture_title, {})
+                on_disk = output_index.exists(lecture_path)
+                quick_bytes = _quick_estimate_bytes(manifest_asset)
+                if not exact_plan and (quick_bytes is not None or on_disk) and not (on_disk and verify_outputs):
+                    entry = _quick_plan_entry(lecture, manifest_asset, lecture_path, chapter_dir, on_disk, quick_bytes)
+                    plan["total_duration"] += entry["duration"]
+                    supp_assets = lecture["data"].get("supplementary_assets")
+                    if dl_assets and isinstance(supp_assets, list):
+                        for asset in udemy._extract_supplementary_assets(supp_assets, lecture.get("index")):
+                            _plan_asset(entry, asset, chapter_dir, head_jobs)
+                    plan["lectures"][lecture_id] = entry
+                    continue
+            parsed_lecture = _get_parsed_lecture(udemy, lecture, udemy_object.get("course_id"))
+            lecture_path = _lecture_output_path(chapter_dir, lecture_title, parsed_lecture)
+            entry = {
+                "lecture_id": lecture_id,
+                "title": lecture_title,
+                "path": lecture_path,
+                "chapter_dir": chapter_dir,
+                "is_video": not skip_lectures and parsed_lecture.get("extension") is None,
+                "duration": parsed_lecture.get("duration") or 0,
+                "expected_bytes": None,  # size of the lecture video, when it can be known
+                "exact": False,  # expected_bytes came from a Content-Length rather than a bitrate
+                "bytes": 0,
+                "pending_bytes": 0,
+                "peak_factor": 1,
+            }
+            plan["total_duration"] += entry["duration"]
+
+            if entry["is_video"]:
+                on_disk = output_index.exists(lecture_path)
+                if on_disk:
+                    entry["bytes"] += os.path.getsize(lecture_path)
+                # --verify needs the expected size of lectures that are already on disk as well
+                source = _select_lecture_source(parsed_lecture) if not on_disk or verify_outputs else None
+                if source:
+                    source_type = source.get("type")
+                    # intermediates that coexist with the final file in the chapter directory
+                    if source_type == "dash":
+                        entry["peak_factor"] = 3  # encrypted tracks + decrypted tracks + muxed output
+                    elif source_type == "hls":
+                        entry["peak_factor"] = 3 if use_h265 else 2  # fragments + merged (+ transcode)
+                    estimate = _estimate_source_bytes(source, entry["duration"])
+                    if estimate is not None:
+                        entry["expected_bytes"] = estimate
+                        if not on_disk:
+                            entry["bytes"] += estimate
+                            entry["pending_bytes"] += estimate
+                    elif source_type in ("hls", "dash"):
+                        plan["unknown"] += 1
+                    else:
+                        head_jobs.append((lecture_id, source.get("download_url"), "lecture", on_disk))
+
+            if dl_assets:
+                for asset in parsed_lecture.get("assets") or []:
+                    _plan_asset(entry, asset, chapter_dir, head_jobs)
+
+            plan["lectures"][lecture_id] = entry
+
+    if head_jobs:
+        logger.info("> Sizing %d file(s) with HEAD requests...", len(head_jobs))
+        with ThreadPoolExecutor(max_workers=min(8, len(head_jobs))) as executor:
+            future_map = {executor.submit(_head_content_length, job[1]): job for job in head_jobs}
+            for future in as_completed(future_map):
+                lecture_id, _, kind, on_disk = future_map[future]
+                size = future.result()
+                if size is None:
+                    plan["unknown"] += 1
+                    continue
+                entry = plan["lectures"][lecture_id]
+                if kind == "lecture":
+                    entry["expected_bytes"] = size
+                    entry["exact"] = True
+                if not on_disk:
+                    entry["bytes"] += size
+                    entry["pending_bytes"] += size
+
+    for lecture_id, entry in plan["lectures"].items():
+        plan["total_bytes"] += entry["bytes"]
+        plan["pending_bytes"] += entry["pending_bytes"]
+        plan["peak_bytes"] = max(plan["peak_bytes"], (entry["peak_factor"] - 1) * entry["pending_bytes"])
+        if entry["pending_bytes"]:
+            logger.debug("    > Planned %s for '%s'", _format_bytes(entry["pending_bytes"]), entry["title"])
+
+    logger.info(
+        "> Course plan: %d lecture(s), %.1f hour(s), ~%s total, ~%s still to download (+%s peak intermediates)",
+        len(plan["lectures"]),
+        plan["total_duration"] / 3600,
+        _format_bytes(plan["total_bytes"]),
+        _format_bytes(plan["pending_bytes"]),
+        _format_bytes(plan["peak_bytes"]),
+    )
+    if plan["unknown"]:
+        logger.warning("> Could not estimate the size of %d item(s); the plan may be low", plan["unknown"])
+    return plan
+
+
+def _quick_plan_entry(lecture: dict, asset: dict, lecture_path: str, chapter_dir: str, on_disk: bool, estimate) -> dict:
+    is_video = not skip_lectures
+    pending = estimate if is_video and not on_disk else 0
+    return {
+        "lecture_id": lecture.get("id"),
+        "title": lecture.get("lecture_title"),
+        "path": lecture_path,
+        "chapter_dir": chapter_dir,
+        "is_video": is_video,
+        "duration": asset.get("time_estimation") or 0,
+        "expected_bytes": pending or None,
+        "exact": False,
+        "bytes": (os.path.getsize(lecture_path) if is_video and on_disk else 0) + pending,
+        "pending_bytes": pending,
+        # encrypted + decrypted tracks + muxed output, or fragments + merged file (+ transcode)
+        "peak_factor": 3 if asset.get("stream_urls") is None or use_h265 else 2,
+    }
+
+
+def _plan_asset(entry: dict, asset: dict, chapter_dir: str, head_jobs: list) -> None:
+    if asset.get("type") in ("article", "external_link") or not asset.get("download_url"):
+        return
+    asset_path = os.path.join(chapter_dir, asset.get("filename"))
+    if output_index.exists(asset_path):
+        entry["bytes"] += os.path.getsize(asset_path)
+    else:
+        head_jobs.append((entry["lecture_id"], asset.get("download_url"), "asset", False))
+
+
+def _load_verified(course_dir: str) -> dict:
+    verified_path = os.path.join(course_dir, ".verified.json")
+    if not os.path.isfile(verified_path):
+        return {}
+    try:
+        with open(verified_path, encoding="utf8", mode="r") as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning("> Failed to load verification cache: %s", e)
+        return {}
+
+
+def _check_lecture_output(entry) -> Optional[str]:
+    """Return None when a lecture video looks complete, otherwise the reason it failed."""
+    path = entry["path"]
+    actual = os.path.getsize(path)
+    expected = entry.get("expected_bytes")
+    if expected:
+        if entry.get("exact") and actual != expected:
+            return f"size {actual} does not match Content-Length {expected}"
+        if not entry.get("exact") and not use_h265 and actual < expected * VERIFY_MIN_SIZE_RATIO:
+            return f"size {_format_bytes(actual)} is far below the manifest estimate {_format_bytes(expected)}"
+
+    try:
+        mp4_info = read_mp4_info(path)
+    except Exception as e:
+        return f"unreadable MP4 structure ({e})"
+    if mp4_info["truncated"]:
+        return "MP4 box structure is truncated"
+    for box_type in ("moov", "mdat"):
+        if box_type not in mp4_info["boxes"]:
+            return f"missing '{box_type}' box"
+
+    duration = entry.get("duration")
+    actual_duration = mp4_info["duration"]
+    if duration and actual_duration is not None and actual_duration < duration - max(2.0, duration * 0.02):
+        return f"duration {actual_duration:.1f}s is shorter than the expected {duration}s"
+    return None
+
+
+def _verify_course_outputs(plan: dict, course_dir: str):
+    """
+    Check every downloaded lecture video in a bounded pool and remove the ones that fail.
+
+    Files that passed before (same size and mtime, tracked in .verified.json) are not
+    checked again. Returns the plan entries of the lectures that failed so they can be
+    downloaded again.
+    """
+    verified = _load_verified(course_dir)
+    to_check = []
+    for entry in plan["lectures"].values():
+        if not entry["is_video"] or not output_index.exists(entry["path"]):
+            continue
+        stat = os.stat(entry["path"])
+        key = os.path.relpath(entry["path"], course_dir)
+        if verified.get(key) == [stat.st_size, stat.st_mtime_ns]:
+            continue
+        to_check.append((entry, key, [stat.st_size, stat.st_mtime_ns]))
+
+    if not to_check:
+        return []
+
+    try:
+        workers = max(1, int(os.getenv("UDEMY_VERIFY_WORKERS", "4")))
+    except ValueError:
+        workers = 4
+    logger.info("> Verifying %d lecture file(s) (workers=%d)...", len(to_check), min(workers, len(to_check)))
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        future_map = {executor.submit(_check_lecture_output, item[0]): item for item in to_check}
+        for future in as_completed(future_map):
+            entry, key, signature = future_map[future]
+            try:
+                reason = future.result()
+            except Exception as e:
+                reason = f"verification error ({e})"
+            if reason is None:
+                verified[key] = signature
+                continue
+            logger.warning("    > '%s' failed verification: %s; queued for download", entry["title"], reason)
+            try:
+                os.remove(entry["path"])
+                output_index.discard(entry["path"])
+            except OSError as err:
+                logger.error("    > Could not remove '%s': %s", entry["path"], err)
+                continue
+            plan["pending_bytes"] += entry.get("expected_bytes") or 0
+            failed.append(entry)
+
+    try:
+        with open(os.path.join(course_dir, ".verified.json"), encoding="utf8", mode="w") as f:
+            json.dump(verified, f)
+    except Exception as e:
+        logger.warning("> Failed to save verification cache: %s", e)
+
+    logger.info("> Verification finished: %d passed, %d failed", len(to_check) - len(failed), len(failed))
+    return failed
+
+
+def _disk_free(path: str):
+    probe = Path(path)
+    while not probe.exists() and probe.parent != probe:
+        probe = probe.parent
+    return shutil.disk_usage(probe).free, os.stat(probe).st_dev
+
+
+def _admit_course(plan: dict) -> None:
+    """Refuse to start, or wait, until DOWNLOAD_DIR and TEMP_DIR have room for the planned run."""
+    if space_check == "off":
+        return
+    try:
+        reserve = int(os.getenv("UDEMY_SPACE_RESERVE_MB", "512")) * 1024 * 1024
+    except ValueError:
+        reserve = 512 * 1024 * 1024
+    try:
+        wait_interval = max(5, int(os.getenv("UDEMY_SPACE_WAIT_INTERVAL", "60")))
+    except ValueError:
+        wait_interval = 60
+
+    if SCRATCH_DIR:
+        # intermediates live on the scratch volume, only finished files land in DOWNLOAD_DIR
+        requirements = ((DOWNLOAD_DIR, plan["pending_bytes"]), (TEMP_DIR, plan["peak_bytes"]))
+    else:
+        requirements = ((DOWNLOAD_DIR, plan["pending_bytes"] + plan["peak_bytes"]), (TEMP_DIR, 0))
+    while True:
+        volumes = {}
+        for path, required in requirements:
+            free, device = _disk_free(path)
+            volume = volumes.setdefault(device, {"free": free, "required": reserve, "paths": []})
+            volume["required"] += required
+            volume["paths"].append(path)
+
+        shortfalls = [volume for volume in volumes.values() if volume["free"] < volume["required"]]
+        if not shortfalls:
+            return
+        for volume in shortfalls:
+            logger.error(
+                "> Not enough free space for %s: need ~%s, have %s",
+                ", ".join(volume["paths"]),
+                _format_bytes(volume["required"]),
+                _format_bytes(volume["free"]),
+            )
+        if space_check != "wait":
+            logger.fatal("> Refusing to start the download (use --space-check wait or off to override)")
+            sys.exit(1)
+        logger.info("> Waiting %ds for disk space to free up...", wait_interval)
+        time.sleep(wait_interval)
+
+
 def parse_new(udemy: Udemy, udemy_object: dict):
     total_chapters = udemy_object.get("total_chapters")
     total_lectures = udemy_object.get("total_lectures")
@@ -2561,8 +4141,51 @@ def parse_new(udemy: Udemy, udemy_object: dict):
     course_dir = os.path.join(DOWNLOAD_DIR, course_name)
     if not os.path.exists(course_dir):
         os.mkdir(course_dir)
+    output_index.scan(course_dir)
+    course_id = udemy_object.get("course_id")
+    retry_scheduler.refresher = lambda lecture: _refresh_lecture(udemy, course_id, lecture)
+    lecture_entries = {}  # normalized output path -> retry entry, for lectures whose background move fails
+
+    def _requeue_failed_move(src: str, dst: str) -> None:
+        entry = lecture_entries.get(os.path.normpath(dst))
+        if entry is None:
+            return
+        # the lecture was reported completed when its move was queued, take that back
+        record_strict_failure(entry["lecture_id"], entry["lecture_title"], "move to the output folder failed")
+        progress_events.emit(
+            "lecture_failed",
+            lecture_id=entry["lecture_id"],
+            title=entry["lecture_title"],
+            failure_class="move",
+            final=False,
+            withdrawn=True,
+        )
+        retry_scheduler.submit(dict(entry, move_src=src), "move")
+
+    background_mover.on_failed = _requeue_failed_move
+    global translation_scope
+    translation_scope = course_name
+    caption_executor = ThreadPoolExecutor(max_workers=caption_workers, thread_name_prefix="caption") if dl_captions else None
+    progress_events.emit(
+        "course_started", course_id=course_id, title=course_name, chapters=total_chapters, lectures=total_lectures
+    )
 
-    failed_lectures = []
+    plan = None
+    if (space_check != "off" or verify_outputs) and not (skip_lectures and not dl_assets):
+        plan = _plan_course(udemy, udemy_object, course_dir)
+        progress_events.emit(
+            "course_planned",
+            course_id=course_id,
+            lectures=len(plan["lectures"]),
+            total_bytes=plan["total_bytes"],
+            pending_bytes=plan["pending_bytes"],
+            peak_bytes=plan["peak_bytes"],
+            total_duration=plan["total_duration"],
+            unknown=plan["unknown"],
+        )
+        if verify_outputs:
+            _verify_course_outputs(plan, course_dir)
+        _admit_course(plan)
 
     for chapter in udemy_object.get("chapters"):
         current_chapter_index = int(chapter.get("chapter_index"))
@@ -2574,11 +4197,13 @@ def parse_new(udemy: Udemy, udemy_object: dict):
         chapter_title = chapter.get("chapter_title")
         chapter_index = chapter.get("chapter_index")
         chapter_dir = os.path.join(course_dir, chapter_title)
-        if not os.path.exists(chapter_dir):
-            os.mkdir(chapter_dir)
+        if not output_index.dir_exists(chapter_dir):
+            os.makedirs(chapter_dir, exist_ok=True)
+            output_index.add_dir(chapter_dir)
         logger.info(f"======= Processing chapter {chapter_index} of {total_chapters} =======")
+        caption_futures = []
 
-        for lecture in chapter.get("lectures"):
+        for lecture in sorted(chapter.get("lectures"), key=_lecture_download_priority):
             clazz = lecture.get("_class")
 
             if clazz == "quiz":
@@ -2592,23 +4217,19 @@ def parse_new(udemy: Udemy, udemy_object: dict):
             # lecture_index = lecture.get("lecture_index")  # this is the raw object index from udemy
 
             lecture_title = lecture.get("lecture_title")
-            parsed_lecture = udemy._parse_lecture(lecture)
+            parsed_lecture = _get_parsed_lecture(udemy, lecture, course_id)
 
             lecture_extension = parsed_lecture.get("extension")
-            extension = "mp4"  # video lectures dont have an extension property, so we assume its mp4
-            if lecture_extension != None:
-                # if the lecture extension property isnt none, set the extension to the lecture extension
-                extension = lecture_extension
-            lecture_file_name = sanitize_filename(lecture_title + "." + extension)
-            lecture_file_name = deEmojify(lecture_file_name)
-            lecture_path = os.path.join(chapter_dir, lecture_file_name)
+            extension = lecture_extension if lecture_extension != None else "mp4"
+            lecture_path = _lecture_output_path(chapter_dir, lecture_title, parsed_lecture)
 
             if not skip_lectures:
                 logger.info(f"  > Processing lecture {index} of {total_lectures}")
 
                 # Check if the lecture is already downloaded
-                if os.path.isfile(lecture_path):
+                if output_index.exists(lecture_path):
                     logger.info("      > Lecture '%s' is already downloaded, skipping..." % lecture_title)
+                    progress_events.emit("lecture_skipped", lecture_id=lecture.get("id"), title=lecture_title)
                 else:
                     # Check if the file is an html file
                     if extension == "html":
@@ -2619,24 +4240,47 @@ def parse_new(udemy: Udemy, udemy_object: dict):
                             try:
                                 with open(lecture_path, encoding="utf8", mode="w") as f:
                                     f.write(html_content)
+                                output_index.add(lecture_path)
                             except Exception:
                                 logger.exception("    > Failed to write html file")
                     else:
+                        if _lecture_expires_soon(parsed_lecture):
+                            parsed_lecture = _refresh_lecture(udemy, course_id, parsed_lecture) or parsed_lecture
+                        _reset_failure_note()
+                        planned = plan["lectures"].get(parsed_lecture.get("id"), {}) if plan is not None else {}
+                        progress_events.emit(
+                            "lecture_started",
+                            lecture_id=parsed_lecture.get("id"),
+                            title=lecture_title,
+                            index=index,
+                            total=total_lectures,
+                            expected_bytes=planned.get("expected_bytes"),
+                        )
+                        retry_entry = {
+                            "lecture_id": parsed_lecture.get("id"),
+                            "lecture_title": lecture_title,
+                            "lecture_path": lecture_path,
+                            "chapter_dir": chapter_dir,
+                            "lecture_data": copy.deepcopy(parsed_lecture),
+                        }
+                        lecture_entries[os.path.normpath(lecture_path)] = retry_entry
                         try:
                             process_lecture(parsed_lecture, lecture_path, chapter_dir)
-                        except Exception:
+                        except Exception as exc:
                             logger.exception("    > Error while downloading lecture '%s'", lecture_title)
+                            _note_failure(str(exc))
 
-                        if not os.path.isfile(lecture_path):
-                            failed_lectures.append(
-                                {
-                                    "lecture_id": parsed_lecture.get("id"),
-                                    "lecture_title": lecture_title,
-                                    "lecture_path": lecture_path,
-                                    "chapter_dir": chapter_dir,
-                                    "lecture_data": copy.deepcopy(parsed_lecture),
-                                }
+                        if output_index.refresh(lecture_path):
+                            progress_events.emit("lecture_completed", lecture_id=parsed_lecture.get("id"), title=lecture_title)
+                        else:
+                            progress_events.emit(
+                                "lecture_failed",
+                                lecture_id=parsed_lecture.get("id"),
+                                title=lecture_title,
+                                failure_class=_failure_class(),
+                                final=False,
                             )
+                            retry_scheduler.submit(dict(retry_entry), _failure_class())
 
             # download subtitles for this lecture
             subtitles = parsed_lecture.get("subtitles")
@@ -2645,7 +4289,9 @@ def parse_new(udemy: Udemy, udemy_object: dict):
                 for subtitle in subtitles:
                     lang = subtitle.get("language")
                     if lang == caption_locale or caption_locale == "all":
-                        process_caption(subtitle, lecture_title, chapter_dir)
+                        caption_futures.append(
+                            caption_executor.submit(process_caption, subtitle, lecture_title, chapter_dir)
+                        )
 
             if dl_assets:
                 assets = parsed_lecture.get("assets")
@@ -2685,6 +4331,7 @@ def parse_new(udemy: Udemy, udemy_object: dict):
                     ):
                         try:
                             ret_code = download_aria(download_url, chapter_dir, filename)
+                            output_index.add(os.path.join(chapter_dir, filename))
                             logger.debug(f"      > Download return code: {ret_code}")
                         except Exception:
                             logger.exception("> Error downloading asset")
@@ -2695,27 +4342,53 @@ def parse_new(udemy: Udemy, udemy_object: dict):
                         file.write("[InternetShortcut]\n")
                         file.write(f"URL={download_url}")
                         file.close()
+                        output_index.add(file_path)
 
                         # save all the external links to a single file
                         savedirs, name = os.path.split(os.path.join(chapter_dir, filename))
                         filename = "external-links.txt"
                         filename = os.path.join(savedirs, filename)
-                        file_data = []
-                        if os.path.isfile(filename):
-                            file_data = [
-                                i.strip().lower() for i in open(filename, encoding="utf-8", errors="ignore") if i
-                            ]
+                        file_data = output_index.link_names(filename)
 
                         content = "\n{}\n{}\n".format(name, download_url)
                         if name.lower() not in file_data:
                             with open(filename, "a", encoding="utf-8", errors="ignore") as f:
                                 f.write(content)
+                            file_data.update((name.lower(), download_url.strip().lower()))
+                            output_index.add(filename)
+
+        # the chapter's captions download concurrently while its lectures do; settle them per chapter
+        _wait_for_captions(caption_futures)
+
+    if caption_executor is not None:
+        caption_executor.shutdown(wait=True)
+    given_up = retry_scheduler.drain()
+    if plan is not None and verify_outputs:
+        for entry in _verify_course_outputs(plan, course_dir):
+            if entry["lecture_id"] in given_up:
+                continue
+            # the first download removed the lecture's local manifest and aged its signed URLs
+            lecture_data = parsed_lecture_cache[entry["lecture_id"]]
+            lecture_data = _refresh_lecture(udemy, course_id, lecture_data) or lecture_data
+            retry_scheduler.submit(
+                {
+                    "lecture_id": entry["lecture_id"],
+                    "lecture_title": entry["title"],
+                    "lecture_path": entry["path"],
+                    "chapter_dir": entry["chapter_dir"],
+                    "lecture_data": copy.deepcopy(lecture_data),
+                },
+                "network",
+            )
+        given_up |= retry_scheduler.drain()
+    progress_events.emit("course_completed", course_id=course_id, failed=len(given_up))
+    # background translations still add to the course's stats, wait_for_translation_tasks reports them
+    with translation_lock:
+        translation_report_scopes.append(course_name)
 
-    if failed_lectures:
-        _retry_failed_downloads(failed_lectures)
-
-def cleanup_temp_dir(temp_path: str = TEMP_DIR) -> None:
-    temp_dir = Path(temp_path)
+def cleanup_temp_dir(temp_path: Optional[str] = None) -> None:
+    # only this run's folder is removed, so concurrent runs sharing the temp/scratch root are left alone
+    temp_dir = Path(temp_path or TEMP_DIR)
     if not temp_dir.exists():
         return
     removed_any = False
@@ -2729,6 +4402,10 @@ def cleanup_temp_dir(temp_path: str = TEMP_DIR) -> None:
                 removed_any = True
         except OSError as exc:
             logger.warning("> Temp 清理失败: %s (原因: %s)", child, exc)
+    try:
+        temp_dir.rmdir()
+    except OSError:
+        pass
     if removed_any:
         logger.info("> Temp 目录已清理：%s", temp_dir)
 
@@ -2813,8 +4490,7 @@ def _print_course_info(udemy: Udemy, udemy_object: dict):
             logger.info("==========================================")
 
 
-def main():
-    global bearer_token, portal_name
+def _check_for_tools():
     aria_ret_val = check_for_aria()
     if not aria_ret_val:
         logger.fatal("> Aria2c is missing from your system or path!")
@@ -2835,193 +4511,296 @@ def main():
         logger.fatal("> Shaka Packager is missing from your system or path!")
         sys.exit(1)
 
-    if load_from_file:
-        logger.info("> 'load_from_file' was specified, data will be loaded from json files instead of fetched")
-    if save_to_file:
-        logger.info("> 'save_to_file' was specified, data will be saved to json files")
-
-    if bearer_token:
-        bearer_token = bearer_token
-    else:
-        bearer_token = os.getenv("UDEMY_BEARER")
-
-    udemy = Udemy(bearer_token)
 
+def _fetch_course_content(udemy: Udemy, url: str):
+    """Fetch the course information and the raw curriculum for a course URL."""
+    title = None
+    course_title = None
+    course_portal = udemy.extract_portal_name(url)
     logger.info("> Fetching course information, this may take a minute...")
-    if not load_from_file:
-        course_id, course_info = udemy._extract_course_info(course_url)
-        logger.info("> Course information retrieved!")
-        if course_info and isinstance(course_info, dict):
-            title = sanitize_filename(course_info.get("title"))
-            course_title = course_info.get("published_title")
+    course_id, course_info = udemy._extract_course_info(url)
+    logger.info("> Course information retrieved!")
+    if course_info and isinstance(course_info, dict):
+        title = sanitize_filename(course_info.get("title"))
+        course_title = course_info.get("published_title")
 
     logger.info("> Fetching course curriculum, this may take a minute...")
-    if load_from_file:
-        course_json = json.loads(
-            open(os.path.join(os.getcwd(), "saved", "course_content.json"), encoding="utf8", mode="r").read()
-        )
-        title = course_json.get("title")
-        course_title = course_json.get("published_title")
-        portal_name = course_json.get("portal_name")
-    else:
-        course_json = udemy._extract_course_curriculum(course_url, course_id, portal_name)
-        course_json["portal_name"] = portal_name
-
+    course_json = udemy._extract_course_curriculum(url, course_id, course_portal)
+    course_json["portal_name"] = course_portal
     logger.info("> Course curriculum retrieved!")
-    course = course_json.get("results")
-    resource = course_json.get("detail")
+    return course_id, title, course_title, course_json
 
-    if load_from_file:
-        udemy_object = json.loads(
-            open(os.path.join(os.getcwd(), "saved", "_udemy.json"), encoding="utf8", mode="r").read()
-        )
-        if info:
-            _print_course_info(udemy, udemy_object)
-        else:
-            parse_new(udemy, udemy_object)
-            if STRICT_MODE and STRICT_FAILURES:
-                logger.error("> Strict mode: %d lecture(s) failed, exiting with code 1", len(STRICT_FAILURES))
-                for item in STRICT_FAILURES[-20:]:
-                    logger.error("> Failed lecture: %s | %s | %s", item.get("id"), item.get("title"), item.get("reason"))
-                sys.exit(1)
-    else:
-        udemy_object = {}
-        udemy_object["bearer_token"] = bearer_token
-        udemy_object["course_id"] = course_id
-        udemy_object["title"] = title
-        udemy_object["course_title"] = course_title
-        udemy_object["chapters"] = []
-        chapter_index_counter = -1
-
-        if resource:
-            logger.info("> Terminating Session...")
-            udemy.session.terminate()
-            logger.info("> Session Terminated.")
-
-        if course:
-            logger.info("> Processing course data, this may take a minute. ")
-            lecture_counter = 0
-            lectures = []
-
-            for entry in course:
-                clazz = entry.get("_class")
 
-                if clazz == "chapter":
-                    # reset lecture tracking
-                    if not use_continuous_lecture_numbers:
-                        lecture_counter = 0
-                    lectures = []
+def _build_udemy_object(udemy: Udemy, course_id, title, course_title, course_json: dict):
+    course = course_json.get("results")
+    resource = course_json.get("detail")
 
+    udemy_object = {}
+    udemy_object["bearer_token"] = bearer_token
+    udemy_object["course_id"] = course_id
+    udemy_object["title"] = title
+    udemy_object["course_title"] = course_title
+    udemy_object["chapters"] = []
+    chapter_index_counter = -1
+
+    if resource:
+        logger.info("> Terminating Session...")
+        udemy.session.terminate()
+        logger.info("> Session Terminated.")
+
+    if course:
+        logger.info("> Processing course data, this may take a minute. ")
+        lecture_counter = 0
+        lectures = []
+
+        for entry in course:
+            clazz = entry.get("_class")
+
+            if clazz == "chapter":
+                # reset lecture tracking
+                if not use_continuous_lecture_numbers:
+                    lecture_counter = 0
+                lectures = []
+
+                chapter_index = entry.get("object_index")
+                chapter_title = "{0:02d} - ".format(chapter_index) + sanitize_filename(entry.get("title"))
+
+                if chapter_title not in udemy_object["chapters"]:
+                    udemy_object["chapters"].append(
+                        {
+                            "chapter_title": chapter_title,
+                            "chapter_id": entry.get("id"),
+                            "chapter_index": chapter_index,
+                            "lectures": [],
+                        }
+                    )
+                    chapter_index_counter += 1
+            elif clazz == "lecture":
+                lecture_counter += 1
+                lecture_id = entry.get("id")
+                if len(udemy_object["chapters"]) == 0:
+                    # dummy chapters to handle lectures without chapters
                     chapter_index = entry.get("object_index")
                     chapter_title = "{0:02d} - ".format(chapter_index) + sanitize_filename(entry.get("title"))
-
                     if chapter_title not in udemy_object["chapters"]:
                         udemy_object["chapters"].append(
                             {
                                 "chapter_title": chapter_title,
-                                "chapter_id": entry.get("id"),
+                                "chapter_id": lecture_id,
                                 "chapter_index": chapter_index,
                                 "lectures": [],
                             }
                         )
                         chapter_index_counter += 1
-                elif clazz == "lecture":
-                    lecture_counter += 1
-                    lecture_id = entry.get("id")
-                    if len(udemy_object["chapters"]) == 0:
-                        # dummy chapters to handle lectures without chapters
-                        chapter_index = entry.get("object_index")
-                        chapter_title = "{0:02d} - ".format(chapter_index) + sanitize_filename(entry.get("title"))
-                        if chapter_title not in udemy_object["chapters"]:
-                            udemy_object["chapters"].append(
-                                {
-                                    "chapter_title": chapter_title,
-                                    "chapter_id": lecture_id,
-                                    "chapter_index": chapter_index,
-                                    "lectures": [],
-                                }
-                            )
-                            chapter_index_counter += 1
-                    if lecture_id:
-                        logger.info(f"Processing {course.index(entry) + 1} of {len(course)}")
+                if lecture_id:
+                    logger.info(f"Processing {course.index(entry) + 1} of {len(course)}")
 
-                        lecture_index = entry.get("object_index")
-                        lecture_title = "{0:03d} ".format(lecture_counter) + sanitize_filename(entry.get("title"))
+                    lecture_index = entry.get("object_index")
+                    lecture_title = "{0:03d} ".format(lecture_counter) + sanitize_filename(entry.get("title"))
 
-                        lectures.append(
+                    lectures.append(
+                        {
+                            "index": lecture_counter,
+                            "lecture_index": lecture_index,
+                            "lecture_title": lecture_title,
+                            "_class": entry.get("_class"),
+                            "id": lecture_id,
+                            "data": entry,
+                        }
+                    )
+                else:
+                    logger.debug("Lecture: ID is None, skipping")
+            elif clazz == "quiz":
+                lecture_counter += 1
+                lecture_id = entry.get("id")
+                if len(udemy_object["chapters"]) == 0:
+                    # dummy chapters to handle lectures without chapters
+                    chapter_index = entry.get("object_index")
+                    chapter_title = "{0:02d} - ".format(chapter_index) + sanitize_filename(entry.get("title"))
+                    if chapter_title not in udemy_object["chapters"]:
+                        udemy_object["chapters"].append(
                             {
-                                "index": lecture_counter,
-                                "lecture_index": lecture_index,
-                                "lecture_title": lecture_title,
-                                "_class": entry.get("_class"),
-                                "id": lecture_id,
-                                "data": entry,
+                                "chapter_title": chapter_title,
+                                "chapter_id": lecture_id,
+                                "chapter_index": chapter_index,
+                                "lectures": [],
                             }
                         )
-                    else:
-                        logger.debug("Lecture: ID is None, skipping")
-                elif clazz == "quiz":
-                    lecture_counter += 1
-                    lecture_id = entry.get("id")
-                    if len(udemy_object["chapters"]) == 0:
-                        # dummy chapters to handle lectures without chapters
-                        chapter_index = entry.get("object_index")
-                        chapter_title = "{0:02d} - ".format(chapter_index) + sanitize_filename(entry.get("title"))
-                        if chapter_title not in udemy_object["chapters"]:
-                            udemy_object["chapters"].append(
-                                {
-                                    "chapter_title": chapter_title,
-                                    "chapter_id": lecture_id,
-                                    "chapter_index": chapter_index,
-                                    "lectures": [],
-                                }
-                            )
-                            chapter_index_counter += 1
+                        chapter_index_counter += 1
 
-                    if lecture_id:
-                        logger.info(f"Processing {course.index(entry) + 1} of {len(course)}")
+                if lecture_id:
+                    logger.info(f"Processing {course.index(entry) + 1} of {len(course)}")
 
-                        lecture_index = entry.get("object_index")
-                        lecture_title = "{0:03d} ".format(lecture_counter) + sanitize_filename(entry.get("title"))
+                    lecture_index = entry.get("object_index")
+                    lecture_title = "{0:03d} ".format(lecture_counter) + sanitize_filename(entry.get("title"))
 
-                        lectures.append(
-                            {
-                                "index": lecture_counter,
-                                "lecture_index": lecture_index,
-                                "lecture_title": lecture_title,
-                                "_class": entry.get("_class"),
-                                "id": lecture_id,
-                                "data": entry,
-                            }
-                        )
-                    else:
-                        logger.debug("Quiz: ID is None, skipping")
+                    lectures.append(
+                        {
+                            "index": lecture_counter,
+                            "lecture_index": lecture_index,
+                            "lecture_title": lecture_title,
+                            "_class": entry.get("_class"),
+                            "id": lecture_id,
+                            "data": entry,
+                        }
+                    )
+                else:
+                    logger.debug("Quiz: ID is None, skipping")
 
-                udemy_object["chapters"][chapter_index_counter]["lectures"] = lectures
-                udemy_object["chapters"][chapter_index_counter]["lecture_count"] = len(lectures)
+            udemy_object["chapters"][chapter_index_counter]["lectures"] = lectures
+            udemy_object["chapters"][chapter_index_counter]["lecture_count"] = len(lectures)
 
-            udemy_object["total_chapters"] = len(udemy_object["chapters"])
-            udemy_object["total_lectures"] = sum(
-                [entry.get("lecture_count", 0) for entry in udemy_object["chapters"] if entry]
-            )
+        udemy_object["total_chapters"] = len(udemy_object["chapters"])
+        udemy_object["total_lectures"] = sum(
+            [entry.get("lecture_count", 0) for entry in udemy_object["chapters"] if entry]
+        )
 
-        if save_to_file:
-            with open(os.path.join(os.getcwd(), "saved", "_udemy.json"), encoding="utf8", mode="w") as f:
-                # remove "bearer_token" from the object before writing
-                udemy_object.pop("bearer_token")
-                udemy_object["portal_name"] = portal_name
-                f.write(json.dumps(udemy_object))
-            logger.info("> Saved parsed data to json")
+    if save_to_file:
+        # written here, on the main thread, for the course about to download (never for a prefetched one)
+        os.makedirs(os.path.join(os.getcwd(), "saved"), exist_ok=True)
+        with open(os.path.join(os.getcwd(), "saved", "course_content.json"), encoding="utf8", mode="w") as f:
+            f.write(json.dumps(course_json))
+        with open(os.path.join(os.getcwd(), "saved", "_udemy.json"), encoding="utf8", mode="w") as f:
+            # remove "bearer_token" from the object before writing
+            udemy_object.pop("bearer_token")
+            udemy_object["portal_name"] = portal_name
+            f.write(json.dumps(udemy_object))
+        logger.info("> Saved parsed data to json")
+
+    return udemy_object
+
+
+def _run_course(udemy: Udemy, udemy_object: dict):
+    if info:
+        _print_course_info(udemy, udemy_object)
+    else:
+        parse_new(udemy, udemy_object)
 
-        if info:
-            _print_course_info(udemy, udemy_object)
-        else:
-            parse_new(udemy, udemy_object)
-            if STRICT_MODE and STRICT_FAILURES:
-                logger.error("> Strict mode: %d lecture(s) failed, exiting with code 1", len(STRICT_FAILURES))
-                for item in STRICT_FAILURES[-20:]:
-                    logger.error("> Failed lecture: %s | %s | %s", item.get("id"), item.get("title"), item.get("reason"))
-                sys.exit(1)
+
+def _exit_on_strict_failures():
+    if STRICT_MODE and STRICT_FAILURES:
+        logger.error("> Strict mode: %d lecture(s) failed, exiting with code 1", len(STRICT_FAILURES))
+        for item in STRICT_FAILURES[-20:]:
+            logger.error("> Failed lecture: %s | %s | %s", item.get("id"), item.get("title"), item.get("reason"))
+        sys.exit(1)
+
+
+def _read_batch_urls(source: str):
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, encoding="utf8", mode="r") as f:
+            lines = f.read().splitlines()
+    urls = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#") or line in urls:
+            continue
+        urls.append(line)
+    return urls
+
+
+def _run_batch(udemy: Udemy, urls):
+    """
+    Download several courses with one authenticated session, rate limiter and translation executor.
+
+    While a course is downloading, the next course's information and curriculum are fetched in
+    the background on a fork of the client, so its headers and errors never touch the session
+    of the course being downloaded. A course that can't be fetched is skipped.
+    """
+    global course_url, portal_name
+    failed_courses = []
+    prefetch_executor = ThreadPoolExecutor(max_workers=1)
+    prefetch_udemy = udemy.fork()
+
+    def _prefetch(url):
+        return prefetch_executor.submit(_fetch_course_content, prefetch_udemy, url)
+
+    pending = _prefetch(urls[0])
+    try:
+        for position, url in enumerate(urls, start=1):
+            logger.info("======= Batch course %d of %d: %s =======", position, len(urls), url)
+            next_url = urls[position] if position < len(urls) else None
+            try:
+                course_id, title, course_title, course_json = pending.result()
+            except (Exception, SystemExit) as exc:
+                logger.error("> Failed to fetch course %s: %r", url, exc)
+                failed_courses.append(url)
+                if next_url:
+                    pending = _prefetch(next_url)
+                continue
+
+            pending = _prefetch(next_url) if next_url else None
+            if course_json.get("detail"):
+                # an API error instead of a curriculum; _build_udemy_object would end the shared session
+                logger.error("> Skipping course %s: %s", url, course_json.get("detail"))
+                failed_courses.append(url)
+                continue
+
+            course_url = url
+            portal_name = course_json.get("portal_name")
+            try:
+                udemy_object = _build_udemy_object(udemy, course_id, title, course_title, course_json)
+                _run_course(udemy, udemy_object)
+            except (Exception, SystemExit) as exc:
+                logger.error("> Course %s failed: %r", url, exc)
+                failed_courses.append(url)
+    finally:
+        prefetch_executor.shutdown(wait=False)
+
+    logger.info("> Batch finished: %d of %d course(s) completed", len(urls) - len(failed_courses), len(urls))
+    for url in failed_courses:
+        logger.error("> Failed course: %s", url)
+    if failed_courses:
+        sys.exit(1)
+
+
+def main():
+    global bearer_token, portal_name
+    if translate_only:
+        if not auto_translate:
+            logger.error("> --translate-only needs a translation provider (set TRANSLATE_PROVIDER or DEEPL_API_KEY)")
+            sys.exit(1)
+        logger.info("> Resumed %d unfinished subtitle translation(s)", resume_translation_jobs())
+        return
+
+    _check_for_tools()
+    if auto_translate and resume_translation_jobs():
+        logger.info("> Unfinished subtitle translations from an earlier run were queued again")
+
+    if load_from_file:
+        logger.info("> 'load_from_file' was specified, data will be loaded from json files instead of fetched")
+    if save_to_file:
+        logger.info("> 'save_to_file' was specified, data will be saved to json files")
+
+    if bearer_token:
+        bearer_token = bearer_token
+    else:
+        bearer_token = os.getenv("UDEMY_BEARER")
+
+    udemy = Udemy(bearer_token)
+
+    if batch_urls:
+        _run_batch(udemy, batch_urls)
+        _exit_on_strict_failures()
+        return
+
+    if load_from_file:
+        course_json = json.loads(
+            open(os.path.join(os.getcwd(), "saved", "course_content.json"), encoding="utf8", mode="r").read()
+        )
+        portal_name = course_json.get("portal_name")
+        udemy_object = json.loads(
+            open(os.path.join(os.getcwd(), "saved", "_udemy.json"), encoding="utf8", mode="r").read()
+        )
+        logger.info("> Course curriculum loaded!")
+    else:
+        course_id, title, course_title, course_json = _fetch_course_content(udemy, course_url)
+        portal_name = course_json.get("portal_name")
+        udemy_object = _build_udemy_object(udemy, course_id, title, course_title, course_json)
+
+    _run_course(udemy, udemy_object)
+    _exit_on_strict_failures()
 
 
 if __name__ == "__main__":
@@ -3032,4 +4811,6 @@ if __name__ == "__main__":
         main()
     finally:
         wait_for_translation_tasks()
+        background_mover.shutdown()
         cleanup_temp_dir()
+        progress_events.close()
@@ -0,0 +1,85 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger("udemy-downloader")
+
+
+class EventStream(object):
+    """
+    Newline-delimited JSON progress events for machine consumers (the webapp, schedulers).
+
+    The target is "fd:<N>" for an inherited file descriptor, "unix:<path>" for a Unix
+    socket, or a plain file path. Every line is one object with "ts" and "event" keys.
+    A consumer that goes away only disables the stream, it never fails the download.
+    """
+
+    def __init__(self):
+        self._file = None
+        self._sock = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self._file is not None
+
+    def open(self, target: str) -> None:
+        if target.startswith("fd:"):
+            self._file = os.fdopen(int(target[3:]), mode="w", encoding="utf8", buffering=1)
+        elif target.startswith("unix:"):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.connect(target[5:])
+            self._file = self._sock.makefile(mode="w", encoding="utf8", buffering=1)
+        else:
+            self._file = open(target, mode="a", encoding="utf8", buffering=1)
+
+    def emit(self, event: str, **fields) -> None:
+        if self._file is None:
+            return
+        line = json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str)
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                self._file.write(line + "\n")
+            except (OSError, ValueError) as exc:
+                logger.warning("> Progress event stream closed (%s), no further events will be sent", exc)
+                self._close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+    def _close(self) -> None:
+        for handle in (self._file, self._sock):
+            try:
+                if handle is not None:
+                    handle.close()
+            except OSError:
+                pass
+        self._file = None
+        self._sock = None
+
+
+stream = EventStream()
+
+
+def open_stream(target: Optional[str]) -> None:
+    if not target:
+        return
+    try:
+        stream.open(target)
+    except (OSError, ValueError) as exc:
+        logger.warning("> Could not open progress event stream '%s': %s", target, exc)
+
+
+def emit(event: str, **fields) -> None:
+    stream.emit(event, **fields)
+
+
+def close() -> None:
+    stream.close()
@@ -0,0 +1,190 @@
+import collections
+import logging
+import os
+import re
+import subprocess
+import threading
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+logger = logging.getLogger("udemy-downloader")
+
+_SIZE = r"[\d.]+\s*[KMGT]?i?B"
+_YTDLP_RE = re.compile(
+    r"^\[download\]\s+(?P<percent>[\d.]+)%\s+of\s+~?\s*(?P<total>" + _SIZE + r")"
+    r"(?:.*?\bat\s+(?P<speed>" + _SIZE + r")/s)?(?:.*?\bETA\s+(?P<eta>[\d:]+))?"
+)
+_ARIA2_RE = re.compile(
+    r"\[#\w+\s+(?P<done>" + _SIZE + r")/(?P<total>" + _SIZE + r")\((?P<percent>\d+)%\)"
+    r"(?:.*?\bDL:(?P<speed>" + _SIZE + r"))?(?:.*?\bETA:(?P<eta>[\dhms]+))?"
+)
+_FFMPEG_RE = re.compile(
+    r"(?:size=\s*(?P<size>\d+)(?P<unit>[kKmMgG]i?B)\s+)?time=\s*(?P<time>[\d:.]+).*?speed=\s*(?P<speed>[\d.]+)x"
+)
+_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+class CommandResult(NamedTuple):
+    returncode: int
+    stdout: str  # bounded tail, not the full output
+    stderr: str
+
+
+def _parse_size(text: Optional[str]) -> Optional[int]:
+    if not text:
+        return None
+    match = re.match(r"([\d.]+)\s*([KMGT]?)", text.strip(), re.IGNORECASE)
+    if not match:
+        return None
+    return int(float(match.group(1)) * _UNITS[match.group(2).upper()])
+
+
+def _parse_duration(text: Optional[str]) -> Optional[float]:
+    if not text:
+        return None
+    if ":" in text:
+        seconds = 0.0
+        for part in text.split(":"):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    units = {unit: value for value, unit in re.findall(r"(\d+)([hms])", text)}
+    if not units:
+        return None
+    return int(units.get("h", 0)) * 3600 + int(units.get("m", 0)) * 60 + int(units.get("s", 0))
+
+
+def parse_progress(tool: str, line: str) -> Optional[dict]:
+    """Turn one yt-dlp, aria2c or ffmpeg progress line into an event dict, None for anything else."""
+    if tool == "yt-dlp":
+        match = _YTDLP_RE.search(line)
+        if match:
+            total = _parse_size(match.group("total"))
+            percent = float(match.group("percent"))
+            return {
+                "tool": tool,
+                "percent": percent,
+                "bytes": int(total * percent / 100) if total else None,
+                "total_bytes": total,
+                "speed": _parse_size(match.group("speed")),
+                "eta": _parse_duration(match.group("eta")),
+            }
+    elif tool == "aria2c":
+        match = _ARIA2_RE.search(line)
+        if match:
+            return {
+                "tool": tool,
+                "percent": float(match.group("percent")),
+                "bytes": _parse_size(match.group("done")),
+                "total_bytes": _parse_size(match.group("total")),
+                "speed": _parse_size(match.group("speed")),
+                "eta": _parse_duration(match.group("eta")),
+            }
+    elif tool == "ffmpeg":
+        match = _FFMPEG_RE.search(line)
+        if match:
+            size = match.group("size")
+            return {
+                "tool": tool,
+                "percent": None,
+                "bytes": int(size) * _UNITS[match.group("unit")[0].upper()] if size else None,
+                "total_bytes": None,
+                "out_time": _parse_duration(match.group("time")),
+                "speed": float(match.group("speed")),  # realtime factor, not bytes/s
+                "eta": None,
+            }
+    return None
+
+
+def _tool_name(args: List[str]) -> str:
+    name = os.path.basename(str(args[0])).lower()
+    for tool in ("yt-dlp", "aria2c", "ffmpeg"):
+        if tool in name:
+            return tool
+    return name
+
+
+def run_command(
+    args: List[str],
+    label: str,
+    cwd: Optional[str] = None,
+    on_progress: Optional[Callable[[dict], None]] = None,
+    tail_lines: int = 200,
+) -> CommandResult:
+    """
+    Run a command, reading stdout and stderr line by line on background threads.
+
+    Lines are split on both \\n and \\r (progress bars redraw with \\r). Progress lines are
+    parsed into events for on_progress, everything else is logged at debug level, and only
+    the last tail_lines lines of each stream are kept for error reporting.
+    """
+    tool = _tool_name(args)
+    process = subprocess.Popen(args, cwd=cwd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    tails = {"stdout": collections.deque(maxlen=tail_lines), "stderr": collections.deque(maxlen=tail_lines)}
+
+    def _handle(stream: str, raw: bytes) -> None:
+        line = raw.decode("utf8", errors="replace").strip()
+        if not line:
+            return
+        event = parse_progress(tool, line)
+        if event is not None:
+            if on_progress is not None:
+                try:
+                    on_progress(event)
+                except Exception:
+                    logger.debug("Progress callback failed for %s", label, exc_info=True)
+            return
+        tails[stream].append(line)
+        logger.debug("[%s-%s]: %s", label, stream.upper(), line)
+
+    def _reader(stream: str, pipe) -> None:
+        pending = b""
+        fd = pipe.fileno()
+        while True:
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                break
+            parts = re.split(rb"[\r\n]", pending + chunk)
+            pending = parts.pop()
+            for part in parts:
+                _handle(stream, part)
+        if pending:
+            _handle(stream, pending)
+        pipe.close()
+
+    readers = [
+        threading.Thread(target=_reader, args=("stdout", process.stdout), daemon=True),
+        threading.Thread(target=_reader, args=("stderr", process.stderr), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+    returncode = process.wait()
+    for reader in readers:
+        reader.join()
+    return CommandResult(returncode, "\n".join(tails["stdout"]), "\n".join(tails["stderr"]))
+
+
+def progress_logger(label: str, interval: float = 5.0) -> Callable[[dict], None]:
+    """on_progress callback that logs at most one progress line every interval seconds."""
+    last = [0.0]
+
+    def _log(event: dict) -> None:
+        now = time.monotonic()
+        if now - last[0] < interval and (event.get("percent") or 0) < 100:
+            return
+        last[0] = now
+        parts = []
+        if event.get("percent") is not None:
+            parts.append("%.1f%%" % event["percent"])
+        if event.get("total_bytes"):
+            parts.append("of %.1f MB" % (event["total_bytes"] / 1024**2))
+        if event.get("out_time") is not None:
+            parts.append("at %ds" % event["out_time"])
+        if event.get("speed"):
+            parts.append(
+                "%.1fx" % event["speed"] if event["tool"] == "ffmpeg" else "%.2f MB/s" % (event["speed"] / 1024**2)
+            )
+        if event.get("eta") is not None:
+            parts.append("ETA %ds" % event["eta"])
+        logger.info("      > [%s] %s", label, " ".join(parts))
+
+    return _log
@@ -0,0 +1,138 @@
+import contextlib
+import json
+import logging
+import os
+import sys
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+from subprocess_runner import CommandResult  # noqa: E402
+
+VIDEO_SEGMENTS = [f"https://cdn.example.com/video/seg-{i}.m4s?token=abc" for i in range(4)]
+AUDIO_SEGMENTS = [f"https://cdn.example.com/audio/seg-{i}.m4s?token=abc" for i in range(3)]
+
+
+class _FakeYoutubeDL(object):
+    def __init__(self, params):
+        pass
+
+    def extract_info(self, url, download=False, force_generic_extractor=False):
+        # the fragment list is read from the manifest on disk, as yt-dlp does for file:// URLs
+        with open(url2pathname(urlsplit(url).path), encoding="utf8") as f:
+            json.load(f)
+        return {
+            "formats": [
+                {"format_id": "video", "ext": "mp4", "fragments": [{"url": u} for u in VIDEO_SEGMENTS]},
+                {"format_id": "audio", "ext": "m4a", "fragments": [{"url": u} for u in AUDIO_SEGMENTS]},
+            ]
+        }
+
+
+class _FakeResponse(object):
+    def __init__(self, url):
+        self.url = url
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.url.encode("utf8")
+
+
+class _FakeSession(object):
+    def __init__(self, network):
+        self.network = network
+        self.trust_env = True
+
+    def mount(self, prefix, adapter):
+        pass
+
+    @contextlib.contextmanager
+    def get(self, url, stream=False, timeout=None):
+        if url in self.network["down"]:
+            raise requests.exceptions.ConnectionError(f"connection reset fetching {url}")
+        self.network["fetched"].append(url)
+        yield _FakeResponse(url)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def drm_lecture(tmp_path, monkeypatch):
+    network = {"down": set(), "fetched": []}
+    mux_results = []
+    work_dir = tmp_path / "work"
+    work_dir.mkdir()
+    manifest = tmp_path / "temp" / "index.mpd"
+    manifest.parent.mkdir()
+    manifest.write_text("{}", encoding="utf8")
+
+    def _run_command(args, label, cwd=None, on_progress=None, tail_lines=200):
+        # yt-dlp finds finished tracks on disk and succeeds, otherwise the aria2c run fails
+        tracks = [work_dir / "42.encrypted.mp4", work_dir / "42.encrypted.m4a"]
+        return CommandResult(0 if all(t.is_file() for t in tracks) else 1, "", "")
+
+    def _mux_process(video_in, audio_in, video_title, output_path, *args):
+        code = mux_results.pop(0)
+        if code == 0:
+            with open(output_path, "wb") as f:
+                f.write(b"muxed")
+        return code
+
+    monkeypatch.setattr(main, "logger", logging.getLogger("udemy-downloader-test"))
+    monkeypatch.setattr(main, "run_command", _run_command)
+    monkeypatch.setattr(main, "mux_process", _mux_process)
+    monkeypatch.setattr(main, "extract_kid", lambda path: "kid")
+    monkeypatch.setattr(main, "keys", {"kid": "key"})
+    monkeypatch.setattr(main.yt_dlp, "YoutubeDL", _FakeYoutubeDL)
+    monkeypatch.setattr(main.requests, "Session", lambda: _FakeSession(network))
+    monkeypatch.setattr(main.time, "sleep", lambda seconds: None)
+
+    def _attempt():
+        return main.handle_segments(
+            manifest.as_uri(), "video,audio", "42", "Lecture 42", str(tmp_path / "Lecture 42.mp4"), str(work_dir)
+        )
+
+    return {
+        "attempt": _attempt,
+        "network": network,
+        "mux_results": mux_results,
+        "manifest": manifest,
+        "work_dir": work_dir,
+        "output": tmp_path / "Lecture 42.mp4",
+    }
+
+
+def test_failed_drm_lecture_resumes_from_its_segment_journal(drm_lecture):
+    network = drm_lecture["network"]
+    journal = drm_lecture["work_dir"] / "42.encrypted.mp4.segments" / "journal.json"
+
+    # first attempt: the connection drops for the last video segment
+    network["down"].add(VIDEO_SEGMENTS[-1])
+    assert drm_lecture["attempt"]() is False
+    assert drm_lecture["manifest"].is_file()
+    with open(journal, encoding="utf8") as f:
+        assert json.load(f)["done"] == [0, 1, 2]
+    assert not drm_lecture["output"].exists()
+
+    # second attempt: only the missing segment is fetched, then muxing fails
+    network["down"].clear()
+    network["fetched"].clear()
+    drm_lecture["mux_results"].extend([1, 0])
+    assert drm_lecture["attempt"]() is False
+    assert sorted(network["fetched"]) == sorted([VIDEO_SEGMENTS[-1]] + AUDIO_SEGMENTS)
+    assert drm_lecture["manifest"].is_file()
+
+    # third attempt: the tracks are already assembled, only the mux runs again
+    network["fetched"].clear()
+    assert drm_lecture["attempt"]() is True
+    assert network["fetched"] == []
+    assert drm_lecture["output"].read_bytes() == b"muxed"
+    assert not drm_lecture["manifest"].exists()
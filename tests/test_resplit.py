@@ -0,0 +1,30 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translator import resplit_translation  # noqa: E402
+
+
+def test_every_cue_gets_a_piece_of_a_short_translation():
+    assert resplit_translation("好", ["a", "b", "c"]) == ["好", "好", "好"]
+
+
+def test_cuts_prefer_phrase_edges_over_the_plain_length():
+    pieces = resplit_translation(
+        "现在我们来看看如何配置这个服务器的环境变量以及它的日志文件",
+        ["Now let's look at how", "to configure this server's env vars", "and its log files"],
+    )
+    assert pieces == ["现在我们来看看", "如何配置这个服务器的环境变量", "以及它的日志文件"]
+
+
+def test_no_piece_is_empty():
+    rng = random.Random(0)
+    for _ in range(5000):
+        text = "".join(rng.choice("我们的 如何,。ab") for _ in range(rng.randint(1, 30)))
+        if not text.strip():
+            continue
+        cues = ["x" * rng.randint(1, 20) for _ in range(rng.randint(2, 5))]
+        pieces = resplit_translation(text, cues)
+        assert len(pieces) == len(cues) and all(pieces)
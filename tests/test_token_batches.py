@@ -0,0 +1,31 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from translator import estimate_tokens, iter_token_balanced_batches  # noqa: E402
+
+WORDS = ["the", "function", "returns", "a", "value", "configuration", "x", "42", "okay", "internationalization"]
+
+
+def _random_cues(rng, n):
+    return [(i, " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 30)))) for i in range(n)]
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_batches_stay_under_the_token_cap(seed):
+    rng = random.Random(seed)
+    pairs = _random_cues(rng, rng.randint(1, 120))
+    max_tokens = rng.randint(10, 400)
+    workers = rng.randint(1, 6)
+
+    batches = list(iter_token_balanced_batches(pairs, max_tokens, workers))
+
+    assert [pair for batch in batches for pair in batch] == pairs
+    assert all(batch for batch in batches)
+    largest_cue = max(estimate_tokens(text) for _, text in pairs)
+    for batch in batches:
+        assert sum(estimate_tokens(text) for _, text in batch) <= max(max_tokens, largest_cue)
@@ -0,0 +1,134 @@
+import argparse
+import json
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Tuple
+
+from dotenv import load_dotenv
+
+from translator import TranslationQueue, create_translator
+
+logger = logging.getLogger("udemy-downloader")
+
+
+class TranslationService(object):
+    """
+    Long-running translator shared by every downloader process on the machine.
+
+    It owns the provider client, the translation cache and the rate limits. Requests from
+    all processes go through one TranslationQueue per language set, so lines that several
+    courses (or webapp tasks) need at the same time are translated once, in shared batches.
+    """
+
+    def __init__(self, translator, linger: float = 0.5, timeout: float = 600.0):
+        self.translator = translator
+        self.linger = linger
+        self.timeout = timeout
+        self._queues = {}
+        self._lock = threading.Lock()
+
+    def _queue(self, source_lang: str, target_langs: List[str]) -> TranslationQueue:
+        key = (source_lang, tuple(target_langs))
+        with self._lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = TranslationQueue(
+                    self.translator, source_lang=source_lang, target_langs=target_langs, linger=self.linger
+                )
+            return queue
+
+    def translate(self, texts: List[str], source_lang: str, target_langs: List[str]) -> Tuple[dict, list]:
+        """Translate texts; returns ({target_lang: translations}, the kind each line was resolved as)."""
+        done = threading.Event()
+        box = {}
+
+        def _on_done(results):
+            box["results"] = results
+            done.set()
+
+        kinds = self._queue(source_lang, target_langs).submit(texts, _on_done, name=f"{len(texts)} line(s)")
+        if not done.wait(self.timeout):
+            raise TimeoutError(f"translation did not finish within {self.timeout:.0f}s")
+        return box["results"], kinds
+
+    def shutdown(self) -> None:
+        with self._lock:
+            queues = list(self._queues.values())
+            self._queues.clear()
+        for queue in queues:
+            queue.shutdown()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def _reply(self, status: int, body: dict) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            self._reply(404, {"error": "not found"})
+            return
+        translator = self.server.service.translator
+        self._reply(200, {"status": "ok", "provider": translator.provider, "model": translator.model})
+
+    def do_POST(self):
+        if self.path != "/translate":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            texts = body["texts"]
+            if not isinstance(texts, list):
+                raise ValueError("texts must be a list")
+        except (KeyError, ValueError) as e:
+            self._reply(400, {"error": f"bad request: {e}"})
+            return
+        try:
+            results, kinds = self.server.service.translate(
+                texts, body.get("source_lang", "EN"), list(body.get("target_langs") or ["ZH"])
+            )
+        except Exception as e:
+            logger.exception("Translation request failed")
+            self._reply(500, {"error": str(e)})
+            return
+        self._reply(200, {"translations": results, "kinds": kinds})
+
+    def log_message(self, format, *args):
+        logger.debug("[translation-service] " + format, *args)
+
+
+def serve(host: str, port: int, provider=None) -> None:
+    translator = create_translator(provider=provider, use_service=False)
+    try:
+        linger = float(os.getenv("TRANSLATE_SERVICE_LINGER", "0.5"))
+    except ValueError:
+        linger = 0.5
+    service = TranslationService(translator, linger=linger)
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.service = service
+    logger.info("> Translation service (%s) listening on http://%s:%d", translator.provider, host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Local translation service shared by udemy-downloader processes")
+    parser.add_argument("--host", default=os.getenv("TRANSLATE_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("TRANSLATE_SERVICE_PORT", "8765")))
+    parser.add_argument("--provider", default=None, help="Translation provider (Default is TRANSLATE_PROVIDER)")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.provider)
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import os
 import json
+import hashlib
 import logging
+import math
+import random
+import sqlite3
 import time
 import re
 import threading
@@ -12,6 +17,977 @@ import deepl
 
 logger = logging.getLogger("udemy-downloader")
 
+
+_LEGACY_OPENAI_KEY_RE = re.compile(
+    r"^openai:(?P<model>.+?):(?P<source>[A-Z]{2,3}(?:-[A-Za-z0-9]+)*):"
+    r"(?P<target>[A-Z]{2,3}(?:-[A-Za-z0-9]+)*):(?P<text>.*)$",
+    re.DOTALL,
+)
+
+
+class TranslationCache:
+    """
+    Translation cache shared by every translator, backed by SQLite in WAL mode.
+
+    Rows are keyed by provider, model, language pair and a hash of the source text, so
+    concurrent runs can read and write the same file. Nothing is loaded up front: lookups
+    and inserts are batched queries. Least recently used rows are evicted once the cache
+    grows past max_entries.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translations (
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            text_hash TEXT NOT NULL,
+            translated TEXT NOT NULL,
+            used_at REAL NOT NULL,
+            PRIMARY KEY (provider, model, source_lang, target_lang, text_hash)
+        );
+        CREATE INDEX IF NOT EXISTS translations_used_at ON translations (used_at);
+    """
+    QUERY_CHUNK = 500
+
+    def __init__(self, path, max_entries: Optional[int] = None):
+        self.path = Path(path)
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv("TRANSLATE_CACHE_MAX_ENTRIES", "500000"))
+            except ValueError:
+                max_entries = 500000
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._writes_since_evict = 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(self.SCHEMA)
+                self._import_legacy_json(conn)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def _import_legacy_json(self, conn: sqlite3.Connection) -> None:
+        """Move entries of the old translation_cache.json (if any) into the database, once."""
+        legacy = self.path.with_name("translation_cache.json")
+        if not legacy.exists():
+            return
+        try:
+            with open(legacy, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to import legacy translation cache: {e}")
+            return
+        rows = []
+        now = time.time()
+        for key, translated in data.items():
+            if not isinstance(translated, str):
+                continue
+            if key.startswith("openai:"):
+                # model names may contain ":" (gpt-4o:2024-08-06, qwen2:7b), so anchor on the language pair
+                match = _LEGACY_OPENAI_KEY_RE.match(key)
+                if match is None:
+                    continue
+                provider = "openai"
+                model, source_lang, target_lang, text = match.group("model", "source", "target", "text")
+            else:
+                parts = key.split(":", 2)
+                if len(parts) != 3:
+                    continue
+                provider, model = "deepl", ""
+                source_lang, target_lang, text = parts
+            rows.append((provider, model, source_lang, target_lang, self.text_hash(text), translated, now))
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        legacy.rename(legacy.with_name(legacy.name + ".migrated"))
+        logger.info("Imported %d entries from the legacy translation cache", len(rows))
+
+    def get_many(self, provider: str, model: str, source_lang: str, target_lang: str, texts: List[str]) -> dict:
+        """Return {text: translation} for the texts that are cached."""
+        by_hash = {self.text_hash(t): t for t in texts}
+        found = {}
+        try:
+            conn = self._connect()
+            hashes = list(by_hash)
+            for start in range(0, len(hashes), self.QUERY_CHUNK):
+                chunk = hashes[start : start + self.QUERY_CHUNK]
+                rows = conn.execute(
+                    "SELECT text_hash, translated FROM translations WHERE provider = ? AND model = ? "
+                    "AND source_lang = ? AND target_lang = ? AND text_hash IN (%s)" % ",".join("?" * len(chunk)),
+                    (provider, model, source_lang, target_lang, *chunk),
+                ).fetchall()
+                for text_hash, translated in rows:
+                    found[by_hash[text_hash]] = translated
+            if found:
+                now = time.time()
+                with conn:
+                    conn.executemany(
+                        "UPDATE translations SET used_at = ? WHERE provider = ? AND model = ? "
+                        "AND source_lang = ? AND target_lang = ? AND text_hash = ?",
+                        [(now, provider, model, source_lang, target_lang, self.text_hash(t)) for t in found],
+                    )
+        except sqlite3.Error as e:
+            logger.warning(f"Translation cache lookup failed: {e}")
+        return found
+
+    def put_many(self, provider: str, model: str, source_lang: str, target_lang: str, pairs) -> None:
+        """Store (text, translation) pairs in a single transaction."""
+        now = time.time()
+        rows = [
+            (provider, model, source_lang, target_lang, self.text_hash(text), translated, now)
+            for text, translated in pairs
+            if translated is not None
+        ]
+        if not rows:
+            return
+        try:
+            conn = self._connect()
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self._writes_since_evict += len(rows)
+            if self.max_entries and self._writes_since_evict >= 1000:
+                self._writes_since_evict = 0
+                self.evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to save translation cache: {e}")
+
+    def get(self, provider: str, model: str, source_lang: str, target_lang: str, text: str) -> Optional[str]:
+        return self.get_many(provider, model, source_lang, target_lang, [text]).get(text)
+
+    def put(self, provider: str, model: str, source_lang: str, target_lang: str, text: str, translated: str) -> None:
+        self.put_many(provider, model, source_lang, target_lang, [(text, translated)])
+
+    def evict(self) -> int:
+        """Drop the least recently used rows beyond max_entries; returns how many were removed."""
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        with conn:
+            conn.execute(
+                "DELETE FROM translations WHERE rowid IN (SELECT rowid FROM translations ORDER BY used_at LIMIT ?)",
+                (excess,),
+            )
+        logger.info("Evicted %d old translation cache entries", excess)
+        return excess
+
+
+class TranslationJobStore:
+    """
+    Lecture translation jobs persisted in SQLite, so a run that is killed can resume them.
+
+    A row is written when a lecture's English SRT is queued for translation and deleted once
+    its translated SRT is saved. Batches that finished before the crash are already in
+    TranslationCache, so a resumed job only sends the cues that never came back. attempts
+    counts the runs of a job: the first one and every resume.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS translation_jobs (
+            out_path TEXT PRIMARY KEY,
+            src_path TEXT NOT NULL,
+            title TEXT NOT NULL,
+            target_langs TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            queued_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path, max_attempts: int = 5):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(self.SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def add(self, src_path: str, out_path: str, title: str, target_langs: List[str]) -> None:
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute(
+                    "INSERT INTO translation_jobs (out_path, src_path, title, target_langs, attempts, queued_at) "
+                    "VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT(out_path) DO UPDATE SET "
+                    "src_path = excluded.src_path, title = excluded.title, target_langs = excluded.target_langs",
+                    (out_path, src_path, title, ",".join(target_langs), time.time()),
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to record translation job: {e}")
+
+    def start_attempt(self, out_path: str) -> None:
+        """Count one more run of a job that is being resumed."""
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("UPDATE translation_jobs SET attempts = attempts + 1 WHERE out_path = ?", (out_path,))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update translation job: {e}")
+
+    def complete(self, out_path: str) -> None:
+        try:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM translation_jobs WHERE out_path = ?", (out_path,))
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to clear translation job: {e}")
+
+    def pending(self) -> List[dict]:
+        """Unfinished jobs, oldest first; jobs that already failed max_attempts times are left out."""
+        try:
+            rows = self._connect().execute(
+                "SELECT out_path, src_path, title, target_langs FROM translation_jobs "
+                "WHERE attempts < ? ORDER BY queued_at",
+                (self.max_attempts,),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to read translation jobs: {e}")
+            return []
+        return [
+            {"out_path": out_path, "src_path": src_path, "title": title, "target_langs": langs.split(",")}
+            for out_path, src_path, title, langs in rows
+        ]
+
+
+def iter_char_limited_batches(pairs: List[Tuple[int, str]], max_chars: int, max_items: Optional[int] = None):
+    """Group (index, text) pairs into consecutive batches of at most max_chars characters (and max_items texts)."""
+    batch: List[Tuple[int, str]] = []
+    current = 0
+    for idx, text in pairs:
+        size = len(text)
+        if batch and (current + size > max_chars or (max_items and len(batch) >= max_items)):
+            yield batch
+            batch = [(idx, text)]
+            current = size
+            continue
+        batch.append((idx, text))
+        current += size
+    if batch:
+        yield batch
+
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+_TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough BPE token estimate without a tokenizer: one token per CJK character or symbol,
+    one per four letters of a word and per three digits, plus the JSON string quoting.
+    """
+    cjk = len(_CJK_RE.findall(text))
+    rest = _CJK_RE.sub(" ", text) if cjk else text
+    tokens = cjk
+    for piece in _TOKEN_PIECE_RE.findall(rest):
+        if piece[0].isalpha():
+            tokens += math.ceil(len(piece) / 4)
+        elif piece[0].isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens + 2
+
+
+def iter_token_balanced_batches(pairs: List[Tuple[int, str]], max_tokens: int, workers: int = 1):
+    """
+    Split (index, text) pairs into consecutive batches of roughly equal estimated token count.
+
+    The batch count is the smallest that keeps every batch under max_tokens, rounded up to a
+    multiple of workers so parallel batches finish together instead of leaving a small tail.
+    No batch goes over max_tokens unless a single cue does; when the cap forces an early cut,
+    the tokens left are spread over a fresh set of batches.
+    """
+    if not pairs:
+        return
+    weights = [estimate_tokens(text) for _, text in pairs]
+
+    def _batch_count(tokens: int, items: int) -> int:
+        count = max(1, math.ceil(tokens / max(1, max_tokens)))
+        if count > 1 and workers > 1:
+            count = math.ceil(count / workers) * workers
+        return min(count, items)
+
+    total = sum(weights)
+    count = _batch_count(total, len(pairs))
+    target = total / count
+    start = 0  # tokens before the current set of batches
+    planned = 0  # batches yielded from the current set
+    done = 0  # tokens in batches already yielded
+
+    batch: List[Tuple[int, str]] = []
+    current = 0
+    for i, (pair, weight) in enumerate(zip(pairs, weights)):
+        if batch:
+            over = current + weight > max_tokens
+            # otherwise cut where the running total crosses the next multiple of target,
+            # the last batch of the set takes whatever is left of it
+            boundary = start + target * (planned + 1)
+            if over or (planned < count - 1 and done + current + weight / 2 > boundary):
+                yield batch
+                done += current
+                batch = []
+                current = 0
+                if over:
+                    start = done
+                    planned = 0
+                    count = _batch_count(total - done, len(pairs) - i)
+                    target = (total - done) / count
+                else:
+                    planned += 1
+        batch.append(pair)
+        current += weight
+    if batch:
+        yield batch
+
+
+# Cues that never need a translation request: sound tags, numbers, URLs, code and fillers.
+# Known ones map to a fixed translation per target language, the rest pass through unchanged.
+# Only sound tags and pure fillers are listed: one-word answers ("Right?", "So,", "No.") depend
+# on their context and go to the model.
+CUE_RULES = {
+    "ZH": {
+        "music": "[音乐]",
+        "upbeat music": "[欢快的音乐]",
+        "applause": "[掌声]",
+        "laughter": "[笑声]",
+        "laughs": "[笑声]",
+        "silence": "[静音]",
+        "no audio": "[无声]",
+        "inaudible": "[听不清]",
+        "typing": "[打字声]",
+        "keyboard clicking": "[键盘声]",
+        "um": "嗯",
+        "uh": "呃",
+        "hmm": "嗯",
+    },
+}
+_SOUND_TAG_RE = re.compile(r"^\s*[\[(]\s*([^\])]{1,40}?)\s*[\])]\s*$")
+_MUSIC_RE = re.compile(r"^[\s♪♫♬#*~-]+$|^\s*♪.*♪\s*$")
+_NON_WORD_RE = re.compile(r"^[\d\s.,:;!?%+\-–—/\\()\[\]{}#*=<>$€£@&|'\"`^_~]+$")
+_URL_RE = re.compile(r"^\s*(?:https?://|www\.)\S+\s*$|^\s*[\w.+-]+@[\w-]+\.[\w.-]+\s*$", re.IGNORECASE)
+_CODE_RE = re.compile(
+    r"^\s*(?:"
+    r"[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)+(?:\(\))?"  # dotted.path, obj.method()
+    r"|[A-Za-z_$][\w$]*\(\)"  # call()
+    r"|[a-z]+(?:_[a-z\d]+)+"  # snake_case
+    r"|`[^`]+`"  # `anything in backticks`
+    r"|[\w./-]+\.(?:py|js|ts|tsx|jsx|java|go|rs|rb|php|cpp|c|h|cs|html|css|json|yaml|yml|toml|md|txt|sh|sql)"
+    r"|--?[a-z][\w-]*"  # --flag
+    r")\s*$"
+)
+
+
+def untranslatable_cue(text: str, target_lang: str = "ZH") -> Optional[str]:
+    """
+    Return the output for a cue that needs no translation request, or None if it should be sent.
+
+    Sound tags and fillers ("um", "uh") use CUE_RULES for the target language when listed there;
+    numbers, punctuation, URLs, e-mail addresses and code-shaped cues (foo.bar, foo_bar, foo(),
+    `backticks`) are returned unchanged.
+    """
+    stripped = text.strip()
+    rules = CUE_RULES.get(target_lang.upper().split("-")[0], {})
+    tag = _SOUND_TAG_RE.match(stripped)
+    if tag:
+        name = tag.group(1).lower()
+        if name in rules:
+            return rules[name]
+        if stripped.startswith("["):
+            return stripped  # [BLANK_AUDIO], [SOUND] ... parentheses may hold real speech
+    if _MUSIC_RE.match(stripped) or _NON_WORD_RE.match(stripped) or _URL_RE.match(stripped):
+        return stripped
+    if _CODE_RE.match(stripped):
+        return stripped
+    word = stripped.lower().rstrip(".,!?…")
+    if word in rules:
+        return rules[word]
+    return None
+
+
+def prefilter_cues(texts, target_lang: str = "ZH"):
+    """
+    Resolve empty and non-translatable cues locally before any batching.
+
+    Returns (results, pending): results has those cues filled in and None elsewhere,
+    pending lists the (index, text) pairs that still need translating.
+    """
+    results = [None] * len(texts)
+    pending: List[Tuple[int, str]] = []
+    skip = os.getenv("TRANSLATE_SKIP_FILTER", "1").strip().lower() not in ("0", "false", "no")
+    for i, text in enumerate(texts):
+        if text is None or not str(text).strip():
+            results[i] = text
+            continue
+        text = str(text)
+        local = untranslatable_cue(text, target_lang) if skip else None
+        if local is not None:
+            results[i] = local
+        else:
+            pending.append((i, text))
+    return results, pending
+
+
+_SENTENCE_END_RE = re.compile(r"[.!?…。！？][\"'”’)\]]*\s*$")
+_SPLIT_AFTER_RE = re.compile(r"[，。！？；：、,.!?;:\s]")
+# Chinese has no spaces; these particles end a phrase and these words open one
+_CJK_PHRASE_END_RE = re.compile(r"[的了吧呢吗啊着过]")
+_CJK_PHRASE_START_RE = re.compile(r"和|以及|并且|然后|但是|因为|所以|如果|如何|或者|而且|还有|比如|就是|也就是")
+MAX_MERGED_CUES = 4
+MAX_MERGED_CHARS = 400
+
+
+def merge_cues(texts, gaps: Optional[List[float]] = None, max_gap: float = 1.5):
+    """
+    Join cues that split one sentence into sentence units for translation.
+
+    gaps[i] is the pause in seconds before cue i; a long pause, a sentence-ending mark,
+    MAX_MERGED_CUES or MAX_MERGED_CHARS closes a unit. Empty and non-translatable cues
+    always stay on their own. Returns (units, groups) where groups[k] lists the cue
+    indices merged into units[k].
+    """
+    units: List[Optional[str]] = []
+    groups: List[List[int]] = []
+    current: List[int] = []
+
+    def _close():
+        if current:
+            units.append(" ".join(" ".join(str(texts[i]).split()) for i in current))
+            groups.append(list(current))
+            current.clear()
+
+    for i, text in enumerate(texts):
+        if text is None or not str(text).strip() or untranslatable_cue(str(text)) is not None:
+            _close()
+            units.append(text)
+            groups.append([i])
+            continue
+        if current and (
+            (gaps is not None and gaps[i] > max_gap)
+            or len(current) >= MAX_MERGED_CUES
+            or sum(len(str(texts[j])) for j in current) + len(str(text)) > MAX_MERGED_CHARS
+        ):
+            _close()
+        current.append(i)
+        if _SENTENCE_END_RE.search(str(text)):
+            _close()
+    _close()
+    return units, groups
+
+
+def resplit_translation(translated: Optional[str], pieces: List[str]) -> List[Optional[str]]:
+    """
+    Split one translated sentence back over the cues it came from, in proportion to the
+    source length of each cue. Each cut moves to the nearest punctuation or space, then to a
+    change of script (CJK / Latin) or a Chinese phrase edge, and only then falls on the plain
+    length. Every cue gets a non-empty piece; a translation too short to share out is
+    repeated on each cue.
+    """
+    if translated is None:
+        return [None] * len(pieces)
+    if len(pieces) == 1:
+        return [translated]
+    text = " ".join(translated.split())
+    if not text:
+        return [None] * len(pieces)
+    length = len(text)
+    # solid[i]: non-space characters in text[:i], so a cut can leave room for the cues after it
+    solid = [0]
+    for char in text:
+        solid.append(solid[-1] + (not char.isspace()))
+    if solid[-1] < 2 * len(pieces):
+        return [text] * len(pieces)
+
+    def _script_change(pos: int) -> bool:
+        return bool(_CJK_RE.match(text[pos - 1])) != bool(_CJK_RE.match(text[pos]))
+
+    def _phrase_edge(pos: int) -> bool:
+        return bool(_CJK_PHRASE_END_RE.match(text[pos - 1]) or _CJK_PHRASE_START_RE.match(text, pos))
+
+    def _splits_word(pos: int) -> bool:
+        left, right = text[pos - 1], text[pos]
+        return left.isascii() and left.isalnum() and right.isascii() and right.isalnum()
+
+    weights = [max(1, len(str(p))) for p in pieces]
+    total = sum(weights)
+    cuts = []
+    done = 0
+    previous = 0
+    for n, weight in enumerate(weights[:-1]):
+        done += weight
+        ideal = round(length * done / total)
+        window = max(2, int(length * weight / total * 0.3))
+        after = len(pieces) - n - 1  # cues that still need a piece
+        allowed = [
+            pos
+            for pos in range(previous + 1, length)
+            if solid[pos] > solid[previous] and solid[-1] - solid[pos] >= after
+        ]
+        by_distance = sorted(allowed, key=lambda pos: abs(pos - ideal))
+        best = next(
+            (pos for pos in by_distance if abs(pos - ideal) <= window and _SPLIT_AFTER_RE.match(text[pos - 1])), None
+        )
+        if best is None:
+            best = next((pos for pos in by_distance if abs(pos - ideal) <= 2 * window and _script_change(pos)), None)
+        if best is None:
+            best = next((pos for pos in by_distance if abs(pos - ideal) <= 2 * window and _phrase_edge(pos)), None)
+        if best is None:
+            best = next((pos for pos in by_distance if not _splits_word(pos)), by_distance[0])
+        cuts.append(best)
+        previous = best
+    return [text[start:end].strip() for start, end in zip([0] + cuts, cuts + [length])]
+
+
+def resplit_translations(translated_units, groups: List[List[int]], texts) -> List[Optional[str]]:
+    """Map translations of merge_cues units back onto the original cues."""
+    results: List[Optional[str]] = [None] * len(texts)
+    for unit, group in zip(translated_units, groups):
+        for i, part in zip(group, resplit_translation(unit, [texts[j] for j in group])):
+            results[i] = part
+    return results
+
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,:]\d+)*")
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_QUOTES = str.maketrans({"‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-"})
+_MINHASH_PRIME = (1 << 61) - 1
+
+
+def normalize_cue(text: str) -> Tuple[str, List[str]]:
+    """
+    Translation-memory key for a cue: lower case, straight quotes, single spaces, no edge
+    punctuation, and every number replaced by "#". The numbers are returned separately.
+    """
+    folded = " ".join(text.translate(_QUOTES).lower().split())
+    numbers = _NUMBER_RE.findall(folded)
+    key = _NUMBER_RE.sub("#", folded).strip(" .,;:!?…-\"'")
+    return key, numbers
+
+
+def substitute_numbers(translated: str, old: List[str], new: List[str]) -> Optional[str]:
+    """Swap the numbers of a remembered translation for the new cue's numbers, None if they can't be matched up."""
+    if old == new:
+        return translated
+    found = _NUMBER_RE.findall(translated)
+    if len(old) != len(new) or found != old:
+        return None  # numbers reordered or spelled out in the translation
+    parts = iter(new)
+    return _NUMBER_RE.sub(lambda _: next(parts), translated)
+
+
+class TranslationMemory:
+    """
+    Near-duplicate translation reuse on top of the exact TranslationCache.
+
+    Every stored translation is also indexed by its normalize_cue key, so lines that differ
+    only in case, punctuation, spacing or numbers ("In lecture 12 we..." / "In lecture 13 we...")
+    reuse it with the numbers swapped. Longer lines are additionally indexed with MinHash
+    LSH over character 4-grams; a candidate whose Jaccard similarity reaches threshold and
+    whose words are the same, in the same order (so only inner punctuation or numbers
+    differ), is reused the same way. Lives in the cache's SQLite file, in its own tables.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS memory (
+            id INTEGER PRIMARY KEY,
+            provider TEXT NOT NULL,
+            model TEXT NOT NULL,
+            source_lang TEXT NOT NULL,
+            target_lang TEXT NOT NULL,
+            key_hash TEXT NOT NULL,
+            source_text TEXT NOT NULL,
+            translated TEXT NOT NULL,
+            used_at REAL NOT NULL,
+            UNIQUE (provider, model, source_lang, target_lang, key_hash)
+        );
+        CREATE INDEX IF NOT EXISTS memory_used_at ON memory (used_at);
+        CREATE TABLE IF NOT EXISTS memory_bands (
+            band TEXT NOT NULL,
+            memory_id INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS memory_bands_band ON memory_bands (band);
+    """
+    BANDS = 8
+    ROWS = 4
+    SHINGLE = 4
+    MIN_FUZZY_CHARS = 24  # shorter lines change meaning with a single word
+
+    def __init__(self, path, threshold: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = Path(path)
+        if threshold is None:
+            try:
+                threshold = float(os.getenv("TRANSLATE_MEMORY_THRESHOLD", "0.85"))
+            except ValueError:
+                threshold = 0.85
+        self.threshold = threshold
+        if max_entries is None:
+            try:
+                max_entries = int(os.getenv("TRANSLATE_CACHE_MAX_ENTRIES", "500000"))
+            except ValueError:
+                max_entries = 500000
+        self.max_entries = max_entries
+        rng = random.Random(0x5EED)
+        self._perms = [
+            (rng.randrange(1, _MINHASH_PRIME), rng.randrange(0, _MINHASH_PRIME))
+            for _ in range(self.BANDS * self.ROWS)
+        ]
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._writes_since_evict = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(self.SCHEMA)
+                self._initialized = True
+        self._local.conn = conn
+        return conn
+
+    def _shingles(self, key: str) -> set:
+        padded = f" {key} "
+        if len(padded) <= self.SHINGLE:
+            return {padded}
+        return {padded[i : i + self.SHINGLE] for i in range(len(padded) - self.SHINGLE + 1)}
+
+    def _bands(self, scope: str, key: str) -> List[str]:
+        if len(key) < self.MIN_FUZZY_CHARS:
+            return []
+        hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in self._shingles(key)]
+        signature = [min((a * h + b) % _MINHASH_PRIME for h in hashes) for a, b in self._perms]
+        bands = []
+        for band in range(self.BANDS):
+            rows = signature[band * self.ROWS : (band + 1) * self.ROWS]
+            bands.append(hashlib.sha1(f"{scope}|{band}|{rows}".encode("utf-8")).hexdigest()[:20])
+        return bands
+
+    def put_many(self, provider: str, model: str, source_lang: str, target_lang: str, pairs) -> None:
+        scope = f"{provider}|{model}|{source_lang}|{target_lang}"
+        now = time.time()
+        try:
+            conn = self._connect()
+            with conn:
+                written = 0
+                for text, translated in pairs:
+                    if translated is None:
+                        continue
+                    key, _ = normalize_cue(text)
+                    if not key:
+                        continue
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO memory (provider, model, source_lang, target_lang, key_hash, "
+                        "source_text, translated, used_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (provider, model, source_lang, target_lang, TranslationCache.text_hash(key), text, translated, now),
+                    )
+                    if cursor.rowcount:
+                        written += 1
+                        conn.executemany(
+                            "INSERT INTO memory_bands VALUES (?, ?)",
+                            [(band, cursor.lastrowid) for band in self._bands(scope, key)],
+                        )
+            self._writes_since_evict += written
+            if self.max_entries and self._writes_since_evict >= 1000:
+                self._writes_since_evict = 0
+                self.evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to save translation memory: {e}")
+
+    def find_many(self, provider: str, model: str, source_lang: str, target_lang: str, texts: List[str]) -> dict:
+        """Return {text: (translation, "memory" | "fuzzy")} for the texts the memory can answer."""
+        scope = f"{provider}|{model}|{source_lang}|{target_lang}"
+        found = {}
+        try:
+            conn = self._connect()
+            for text in texts:
+                key, numbers = normalize_cue(text)
+                if not key:
+                    continue
+                row = conn.execute(
+                    "SELECT id, source_text, translated FROM memory WHERE provider = ? AND model = ? "
+                    "AND source_lang = ? AND target_lang = ? AND key_hash = ?",
+                    (provider, model, source_lang, target_lang, TranslationCache.text_hash(key)),
+                ).fetchone()
+                kind = "memory"
+                if row is None:
+                    row = self._best_candidate(conn, scope, key)
+                    kind = "fuzzy"
+                if row is None:
+                    continue
+                memory_id, source_text, translated = row
+                reused = substitute_numbers(translated, normalize_cue(source_text)[1], numbers)
+                if reused is None:
+                    continue
+                found[text] = (reused, kind)
+                conn.execute("UPDATE memory SET used_at = ? WHERE id = ?", (time.time(), memory_id))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Translation memory lookup failed: {e}")
+        return found
+
+    def _best_candidate(self, conn: sqlite3.Connection, scope: str, key: str):
+        bands = self._bands(scope, key)
+        if not bands:
+            return None
+        rows = conn.execute(
+            "SELECT DISTINCT m.id, m.source_text, m.translated FROM memory_bands b JOIN memory m ON m.id = b.memory_id "
+            "WHERE b.band IN (%s) LIMIT 50" % ",".join("?" * len(bands)),
+            bands,
+        ).fetchall()
+        shingles = self._shingles(key)
+        words = _WORD_RE.findall(key)
+        best, best_score = None, self.threshold
+        for row in rows:
+            other_key = normalize_cue(row[1])[0]
+            if _WORD_RE.findall(other_key) != words:
+                continue  # "enable the cache" is close to "disable the cache" but means the opposite
+            other = self._shingles(other_key)
+            score = len(shingles & other) / len(shingles | other)
+            if score >= best_score:
+                best, best_score = row, score
+        return best
+
+    def evict(self) -> int:
+        """Drop the least recently used entries beyond max_entries, with their LSH bands."""
+        conn = self._connect()
+        count = conn.execute("SELECT COUNT(*) FROM memory").fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return 0
+        with conn:
+            conn.execute("DELETE FROM memory WHERE id IN (SELECT id FROM memory ORDER BY used_at LIMIT ?)", (excess,))
+            conn.execute("DELETE FROM memory_bands WHERE memory_id NOT IN (SELECT id FROM memory)")
+        logger.info("Evicted %d old translation memory entries", excess)
+        return excess
+
+
+class TranslationStats:
+    """Thread-safe counters of how subtitle lines were resolved, grouped by a scope such as the course title."""
+
+    KINDS = ("skipped", "cached", "memory", "fuzzy", "sent")
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, scope: Optional[str], counts: dict) -> None:
+        if scope is None:
+            return
+        with self._lock:
+            totals = self._counts.setdefault(scope, dict.fromkeys(self.KINDS, 0))
+            for kind, value in counts.items():
+                totals[kind] = totals.get(kind, 0) + value
+
+    def pop(self, scope: str) -> Optional[dict]:
+        with self._lock:
+            return self._counts.pop(scope, None)
+
+    @classmethod
+    def merge(cls, *per_language) -> dict:
+        """
+        Combine resolve_locally's {index: kind} maps, one per target language, into one
+        kind per line: the costliest any language needed (KINDS is in that order).
+        """
+        merged = {}
+        for kinds in per_language:
+            for i, kind in kinds.items():
+                if cls.KINDS.index(kind) > cls.KINDS.index(merged.get(i, "skipped")):
+                    merged[i] = kind
+                else:
+                    merged.setdefault(i, kind)
+        return merged
+
+    @classmethod
+    def tally(cls, *per_language) -> dict:
+        """Count lines from resolve_locally's {index: kind} maps, each line once (see merge)."""
+        counts = dict.fromkeys(cls.KINDS, 0)
+        for kind in cls.merge(*per_language).values():
+            counts[kind] += 1
+        return counts
+
+
+def resolve_locally(translator, texts, source_lang: str, target_lang: str):
+    """
+    Answer what can be answered without a request: skip-list cues, the exact cache and the
+    translation memory. Returns (results, pending, kinds); pending lists the (index, text)
+    pairs still to translate and kinds maps the index of every non-empty line to how it was
+    resolved ("sent" for the pending ones), see TranslationStats.tally.
+    """
+    results, pending = prefilter_cues(texts, target_lang)
+    kinds = {i: "skipped" for i, t in enumerate(texts) if t is not None and str(t).strip()}
+    cache = getattr(translator, "cache", None)
+    if cache is not None and pending:
+        cached = cache.get_many(translator.provider, translator.model, source_lang, target_lang, [t for _, t in pending])
+        still = []
+        for i, text in pending:
+            if text in cached:
+                results[i] = cached[text]
+                kinds[i] = "cached"
+            else:
+                still.append((i, text))
+        pending = still
+    memory = getattr(translator, "memory", None)
+    if memory is not None and pending:
+        remembered = memory.find_many(
+            translator.provider, translator.model, source_lang, target_lang, list({t for _, t in pending})
+        )
+        still = []
+        for i, text in pending:
+            if text in remembered:
+                results[i], kinds[i] = remembered[text]
+            else:
+                still.append((i, text))
+        pending = still
+    for i, _ in pending:
+        kinds[i] = "sent"
+    return results, pending, kinds
+
+
+def store_translations(translator, source_lang: str, target_lang: str, pairs) -> None:
+    """Write fresh (text, translation) pairs to the exact cache and the translation memory."""
+    pairs = list(pairs)
+    translator.cache.put_many(translator.provider, translator.model, source_lang, target_lang, pairs)
+    memory = getattr(translator, "memory", None)
+    if memory is not None:
+        memory.put_many(translator.provider, translator.model, source_lang, target_lang, pairs)
+
+
+def create_memory(cache_dir: Path) -> Optional[TranslationMemory]:
+    if os.getenv("TRANSLATE_MEMORY", "1").strip().lower() in ("0", "false", "no"):
+        return None
+    return TranslationMemory(cache_dir / "translations.sqlite3")
+
+
+def _header_number(headers, name: str) -> Optional[float]:
+    try:
+        value = headers.get(name)
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_reset(value) -> Optional[float]:
+    """Parse rate-limit reset values such as "20ms", "1.5s", "6m0s" or plain seconds."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    seconds = 0.0
+    found = False
+    for number, unit in re.findall(r"([\d.]+)(ms|h|m|s)", str(value)):
+        found = True
+        seconds += float(number) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[unit]
+    return seconds if found else None
+
+
+class AdaptiveConcurrency:
+    """
+    In-flight request limit for the async translation client, steered by the provider's
+    x-ratelimit-remaining-requests/-tokens headers.
+
+    The limit grows additively while the headers show headroom (or are absent) and is cut
+    when they run low; a 429 halves it and holds new requests back for its retry-after.
+    All methods run on the client's event loop.
+    """
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._cond: Optional[asyncio.Condition] = None
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        async with self._cond:
+            while self.in_flight >= int(self.limit):
+                await self._cond.wait()
+            self.in_flight += 1
+        delay = self._paused_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def release(self) -> None:
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_headers(self, headers, request_tokens: int) -> None:
+        remaining_requests = _header_number(headers, "x-ratelimit-remaining-requests")
+        remaining_tokens = _header_number(headers, "x-ratelimit-remaining-tokens")
+        if remaining_requests == 0 or remaining_tokens == 0:
+            reset = max(
+                _parse_reset(headers.get("x-ratelimit-reset-requests")) or 0.0,
+                _parse_reset(headers.get("x-ratelimit-reset-tokens")) or 0.0,
+            )
+            self._pause(reset)
+        low = (remaining_requests is not None and remaining_requests <= self.limit * 2) or (
+            remaining_tokens is not None and remaining_tokens <= request_tokens * self.limit * 2
+        )
+        if low:
+            self._set_limit(self.limit * 0.75)
+        else:
+            self._set_limit(self.limit + 1.0 / self.limit)
+
+    def on_rate_limited(self, retry_after: float) -> None:
+        self._set_limit(self.limit / 2)
+        self._pause(retry_after)
+
+    def _pause(self, seconds: float) -> None:
+        if seconds > 0:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _set_limit(self, limit: float) -> None:
+        previous = int(self.limit)
+        self.limit = min(float(self.maximum), max(float(self.minimum), limit))
+        if int(self.limit) != previous:
+            logger.debug("Translation concurrency %d -> %d", previous, int(self.limit))
+            if int(self.limit) > previous and self._cond is not None:
+                asyncio.ensure_future(self._wake())
+
+    async def _wake(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+
 class SubtitleTranslator:
     """Handles translation of subtitles using DeepL API with caching and retry logic"""
     
@@ -29,34 +1005,22 @@ class SubtitleTranslator:
         
         self.translator = deepl.Translator(self.api_key)
         self.cache_dir = Path(cache_dir).expanduser().resolve()
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "translation_cache.json"
-        self.cache = self._load_cache()
-        self._cache_lock = threading.Lock()
-        
-    def _load_cache(self):
-        """Load translation cache from disk"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load translation cache: {e}")
-                return {}
-        return {}
-    
-    def _save_cache(self):
-        """Save translation cache to disk"""
+        self.cache = TranslationCache(self.cache_dir / "translations.sqlite3")
+        self.memory = create_memory(self.cache_dir)
+        self.stats = TranslationStats()
+        self.provider = "deepl"
+        self.model = ""
+
+        # DeepL takes up to 50 texts per request and a 128 KiB request body
         try:
-            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(self.cache, f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            logger.warning(f"Failed to save translation cache: {e}")
-    
-    def _get_cache_key(self, text, source_lang, target_lang):
-        """Generate cache key for a translation"""
-        return f"{source_lang}:{target_lang}:{text}"
+            self.chunk_size = int(os.getenv("DEEPL_CHUNK_SIZE", "30000"))
+        except ValueError:
+            self.chunk_size = 30000
+        self.max_texts_per_request = 50
+        try:
+            self.max_workers = max(1, int(os.getenv("DEEPL_MAX_WORKERS", "4")))
+        except ValueError:
+            self.max_workers = 4
     
     def translate_text(self, text, source_lang="EN", target_lang="ZH", max_retries=3):
         """
@@ -75,10 +1039,10 @@ class SubtitleTranslator:
             return text
         
         # Check cache first
-        cache_key = self._get_cache_key(text, source_lang, target_lang)
-        if cache_key in self.cache:
+        cached = self.cache.get(self.provider, self.model, source_lang, target_lang, text)
+        if cached is not None:
             logger.debug(f"Using cached translation for: {text[:50]}...")
-            return self.cache[cache_key]
+            return cached
         
         # Attempt translation with retries
         for attempt in range(max_retries):
@@ -91,8 +1055,7 @@ class SubtitleTranslator:
                 translated = result.text
                 
                 # Cache the result
-                self.cache[cache_key] = translated
-                self._save_cache()
+                store_translations(self, source_lang, target_lang, [(text, translated)])
                 
                 return translated
                 
@@ -106,27 +1069,89 @@ class SubtitleTranslator:
         
         return None
     
-    def translate_batch(self, texts, source_lang="EN", target_lang="ZH", max_retries=3):
+    def _translate_request(self, texts, source_lang, target_lang, max_retries):
+        """Send one multi-text request, retrying it as a whole"""
+        for attempt in range(max_retries):
+            try:
+                result = self.translator.translate_text(texts, source_lang=source_lang, target_lang=target_lang)
+                return [r.text for r in result]
+            except Exception as e:
+                if attempt < max_retries - 1:
+                    logger.warning(f"Translation request attempt {attempt + 1} failed: {e}. Retrying...")
+                    time.sleep(attempt + 1)
+                else:
+                    logger.error(f"Translation request failed after {max_retries} attempts: {e}")
+        return [None] * len(texts)
+
+    def translate_batch(self, texts, source_lang="EN", target_lang="ZH", max_retries=3, scope=None):
         """
-        Translate multiple texts with progress logging
+        Translate multiple texts, packing uncached ones into multi-text DeepL requests
         
         Args:
             texts: List of texts to translate
             source_lang: Source language code
             target_lang: Target language code
-            max_retries: Maximum retry attempts per text
+            max_retries: Maximum retry attempts per request
+            scope: Label (e.g. the course) to count cache and memory hits under
             
         Returns:
             List of translated texts (None for failed translations)
         """
-        results = []
-        total = len(texts)
+        if not texts:
+            return []
+        results, kinds = self._translate_language(texts, source_lang, target_lang, max_retries)
+        self.stats.add(scope, TranslationStats.tally(kinds))
+        return results
+
+    def _translate_language(self, texts, source_lang, target_lang, max_retries):
+        results, to_translate, kinds = resolve_locally(self, texts, source_lang, target_lang)
+        if not to_translate:
+            return results, kinds
+        counts = TranslationStats.tally(kinds)
+
+        batches = list(iter_char_limited_batches(to_translate, self.chunk_size, self.max_texts_per_request))
+        start = time.time()
+
+        def process_batch(batch):
+            translated = self._translate_request([t for _, t in batch], source_lang, target_lang, max_retries)
+            store_translations(self, source_lang, target_lang, [(t, tr) for (_, t), tr in zip(batch, translated)])
+            return batch, translated
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            for batch, translated in executor.map(process_batch, batches):
+                for (i, _), tr in zip(batch, translated):
+                    results[i] = tr
+
+        logger.info(
+            "    > [DeepL] Translated %d subtitle(s) in %d request(s) in %.2fs (%d cached, %d from memory, %d skipped)",
+            len(to_translate),
+            len(batches),
+            time.time() - start,
+            counts["cached"],
+            counts["memory"] + counts["fuzzy"],
+            counts["skipped"],
+        )
+        return results, kinds
+
+    def translate_batch_multi(self, texts, source_lang="EN", target_langs=("ZH",), max_retries=3, scope=None):
+        """
+        Translate texts into several languages
         
-        for idx, text in enumerate(texts, 1):
-            logger.info(f"    > Translating subtitle {idx}/{total}...")
-            translated = self.translate_text(text, source_lang, target_lang, max_retries)
-            results.append(translated)
-            
+        DeepL takes one target language per request, so this is one batch per
+        language; each language is cached separately. Every line is counted once
+        in self.stats, whatever the number of languages.
+        
+        Returns:
+            Dict of target language -> list of translated texts
+        """
+        if not texts:
+            return {lang: [] for lang in target_langs}
+        results = {}
+        kinds = []
+        for lang in target_langs:
+            results[lang], lang_kinds = self._translate_language(texts, source_lang, lang, max_retries)
+            kinds.append(lang_kinds)
+        self.stats.add(scope, TranslationStats.tally(*kinds))
         return results
 
 
@@ -187,6 +1212,34 @@ class OpenAICompatibleTranslator:
             self.max_workers = max(1, int(workers_env)) if workers_env else 1
         except ValueError:
             self.max_workers = 1
+
+        # Batch size in estimated tokens. Starts from the configured chunk size (about four
+        # characters per token for English) and adapts to observed latency and parse failures.
+        tokens_env = os.getenv("SUBTITLE_TRANSLATE_BATCH_TOKENS") or os.getenv("TRANSLATE_BATCH_TOKENS")
+        try:
+            self.batch_tokens = max(1, int(tokens_env)) if tokens_env else max(1, self.chunk_size // 4)
+        except ValueError:
+            self.batch_tokens = max(1, self.chunk_size // 4)
+        max_tokens_env = os.getenv("SUBTITLE_TRANSLATE_MAX_BATCH_TOKENS") or os.getenv("TRANSLATE_MAX_BATCH_TOKENS")
+        try:
+            self.max_batch_tokens = int(max_tokens_env) if max_tokens_env else self.batch_tokens * 4
+        except ValueError:
+            self.max_batch_tokens = self.batch_tokens * 4
+        self.min_batch_tokens = min(self.batch_tokens, 100)
+        latency_env = os.getenv("SUBTITLE_TRANSLATE_TARGET_LATENCY") or os.getenv("TRANSLATE_TARGET_LATENCY")
+        try:
+            self.target_latency = float(latency_env) if latency_env else self.request_timeout / 2
+        except ValueError:
+            self.target_latency = self.request_timeout / 2
+        self._batch_lock = threading.Lock()
+
+        async_env = os.getenv("SUBTITLE_TRANSLATE_ASYNC") or os.getenv("TRANSLATE_ASYNC_CLIENT") or "1"
+        self.use_async = async_env.strip().lower() not in ("0", "false", "no")
+        concurrency_env = os.getenv("SUBTITLE_TRANSLATE_MAX_CONCURRENCY") or os.getenv("TRANSLATE_MAX_CONCURRENCY")
+        try:
+            self.max_concurrency = max(1, int(concurrency_env)) if concurrency_env else max(8, self.max_workers * 4)
+        except ValueError:
+            self.max_concurrency = max(8, self.max_workers * 4)
  
         if not self.api_key:
             raise ValueError(
@@ -198,6 +1251,7 @@ class OpenAICompatibleTranslator:
                 APIConnectionError,
                 APIError,
                 APITimeoutError,
+                AsyncOpenAI,
                 OpenAI,
                 RateLimitError,
             )
@@ -214,34 +1268,18 @@ class OpenAICompatibleTranslator:
         if self.request_timeout:
             client_kwargs["timeout"] = self.request_timeout
         self.client = OpenAI(**client_kwargs)
+
+        self._rate_limit_error = RateLimitError
+        self.async_client = AsyncOpenAI(**client_kwargs) if self.use_async else None
+        self.limiter = AdaptiveConcurrency(self.max_workers, self.max_concurrency) if self.use_async else None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
  
         self.cache_dir = Path(cache_dir).expanduser().resolve()
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "translation_cache.json"
-        self.cache = self._load_cache()
-        self._cache_lock = threading.Lock()
- 
-    def _load_cache(self):
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load translation cache: {e}")
-                return {}
-        return {}
- 
-    def _save_cache(self):
-        with self._cache_lock:
-            try:
-                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
-                with open(self.cache_file, "w", encoding="utf-8") as f:
-                    json.dump(self.cache, f, ensure_ascii=False, indent=2)
-            except Exception as e:
-                logger.warning(f"Failed to save translation cache: {e}")
- 
-    def _get_cache_key(self, text: str, source_lang: str, target_lang: str):
-        return f"openai:{self.model}:{source_lang}:{target_lang}:{text}"
+        self.cache = TranslationCache(self.cache_dir / "translations.sqlite3")
+        self.memory = create_memory(self.cache_dir)
+        self.stats = TranslationStats()
+        self.provider = "openai"
  
     def _extract_json_payload(self, content: str) -> str:
         if not content:
@@ -295,35 +1333,90 @@ class OpenAICompatibleTranslator:
 
         raise ValueError("Unable to parse translation payload")
  
-    def _translate_batch_uncached(self, texts: List[str], source_lang: str, target_lang: str) -> List[Optional[str]]:
-        system_msg = (
-            "You are a translation engine. Translate each line faithfully from "
-            f"{source_lang} to {target_lang}. Preserve line breaks within each item. "
-            "Return ONLY a JSON array of strings with the same length and order as the input array."
-        )
+    def _parse_json_objects(self, payload: str, expected_len: int, target_langs) -> List[Optional[dict]]:
+        if not payload:
+            raise ValueError("Empty translation payload")
+        candidates = [payload]
+        bracket_match = re.search(r"\[\s*[\s\S]*\s*\]", payload)
+        if bracket_match:
+            candidates.append(bracket_match.group(0))
+        for candidate in candidates:
+            try:
+                parsed = json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(parsed, list):
+                continue
+            if len(parsed) != expected_len:
+                raise ValueError("Response array length mismatch")
+            items = []
+            for item in parsed:
+                if not isinstance(item, dict):
+                    raise ValueError("Response item is not an object")
+                upper = {str(key).upper(): value for key, value in item.items()}
+                values = {}
+                for lang in target_langs:
+                    value = upper.get(lang.upper())
+                    values[lang] = str(value) if value is not None else None
+                items.append(values)
+            return items
+        raise ValueError("Unable to parse translation payload")
+
+    def _parse_reply(self, content: str, expected_len: int, target_lang) -> list:
+        payload = self._extract_json_payload(content)
+        if isinstance(target_lang, (list, tuple)):
+            return self._parse_json_objects(payload, expected_len, target_lang)
+        return self._parse_json_array(payload, expected_len)
+
+    @staticmethod
+    def _output_factor(target_lang) -> int:
+        return len(target_lang) if isinstance(target_lang, (list, tuple)) else 1
+
+    def _build_messages(self, texts: List[str], source_lang: str, target_lang) -> List[dict]:
+        """target_lang is one language code, or a tuple of codes to get every language in one reply."""
+        if isinstance(target_lang, (list, tuple)):
+            system_msg = (
+                "You are a translation engine. Translate each line faithfully from "
+                f"{source_lang} into each of these languages: {', '.join(target_lang)}. "
+                "Preserve line breaks within each item. Return ONLY a JSON array with the same length "
+                "and order as the input array, where each element is an object mapping every "
+                "language code to that line's translation."
+            )
+            target = list(target_lang)
+        else:
+            system_msg = (
+                "You are a translation engine. Translate each line faithfully from "
+                f"{source_lang} to {target_lang}. Preserve line breaks within each item. "
+                "Return ONLY a JSON array of strings with the same length and order as the input array."
+            )
+            target = target_lang
         user_msg = json.dumps(
-            {"source_lang": source_lang, "target_lang": target_lang, "lines": texts},
+            {"source_lang": source_lang, "target_lang": target, "lines": texts},
             ensure_ascii=False,
         )
- 
+        return [
+            {"role": "system", "content": system_msg},
+            {"role": "user", "content": user_msg},
+        ]
+
+    def _translate_batch_uncached(
+        self, texts: List[str], source_lang: str, target_lang: str, max_retries: Optional[int] = None
+    ) -> List[Optional[str]]:
+        max_retries = self.max_retries if max_retries is None else max_retries
+        messages = self._build_messages(texts, source_lang, target_lang)
         last_error: Optional[Exception] = None
-        for attempt in range(1, self.max_retries + 1):
+        for attempt in range(1, max_retries + 1):
             try:
                 response = self.client.chat.completions.create(
                     model=self.model,
                     temperature=0.0,
-                    messages=[
-                        {"role": "system", "content": system_msg},
-                        {"role": "user", "content": user_msg},
-                    ],
+                    messages=messages,
                 )
                 content = response.choices[0].message.content or ""
-                payload = self._extract_json_payload(content)
-                parsed = self._parse_json_array(payload, len(texts))
-                return parsed
+                return self._parse_reply(content, len(texts), target_lang)
             except self._retryable_errors as err:
                 last_error = err
-                if attempt >= self.max_retries:
+                if attempt >= max_retries:
                     break
                 delay = self.retry_delay * attempt
                 time.sleep(delay)
@@ -336,131 +1429,378 @@ class OpenAICompatibleTranslator:
         raise RuntimeError("Translation failed")
  
     def _iter_char_limited_batches(self, pairs: List[Tuple[int, str]], max_chars: int):
-        batch: List[Tuple[int, str]] = []
-        current = 0
-        for idx, text in pairs:
-            size = len(text)
-            if batch and current + size > max_chars:
-                yield batch
-                batch = [(idx, text)]
-                current = size
-                continue
-            batch.append((idx, text))
-            current += size
-        if batch:
-            yield batch
- 
-    def translate_batch(self, texts, source_lang="EN", target_lang="ZH", max_retries=3):
-        if not texts:
-            return []
+        return iter_char_limited_batches(pairs, max_chars)
 
-        original_max_retries = self.max_retries
-        if max_retries is not None:
+    def _run_async(self, coro):
+        """Run a coroutine on the translator's event loop thread, shared by all callers."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="translate-async", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    async def _translate_batch_uncached_async(
+        self, texts: List[str], source_lang: str, target_lang: str, max_retries: Optional[int] = None
+    ) -> List[Optional[str]]:
+        max_retries = self.max_retries if max_retries is None else max_retries
+        messages = self._build_messages(texts, source_lang, target_lang)
+        text_tokens = sum(estimate_tokens(t) for t in texts) * self._output_factor(target_lang)
+        request_tokens = text_tokens * 2
+        last_error: Optional[Exception] = None
+        for attempt in range(1, max_retries + 1):
+            await self.limiter.acquire()
+            start = time.time()  # latency excludes the wait for a concurrency slot
             try:
-                self.max_retries = int(max_retries)
-            except (TypeError, ValueError):
-                self.max_retries = original_max_retries
-        try:
-            results: List[Optional[str]] = [None] * len(texts)
-            to_translate: List[Tuple[int, str]] = []
+                raw = await self.async_client.chat.completions.with_raw_response.create(
+                    model=self.model,
+                    temperature=0.0,
+                    messages=messages,
+                )
+                self.limiter.on_headers(raw.headers, request_tokens)
+                response = raw.parse()
+                content = response.choices[0].message.content or ""
+                parsed = self._parse_reply(content, len(texts), target_lang)
+                self._record_batch(text_tokens, time.time() - start)
+                return parsed
+            except self._rate_limit_error as err:
+                last_error = err
+                headers = getattr(getattr(err, "response", None), "headers", None) or {}
+                retry_after = _parse_reset(headers.get("retry-after")) or self.retry_delay * attempt
+                self.limiter.on_rate_limited(retry_after)
+                logger.info(
+                    "    > [Gemini] Rate limited, concurrency now %d, retrying in %.1fs",
+                    int(self.limiter.limit),
+                    retry_after,
+                )
+                if attempt >= max_retries:
+                    break
+            except self._retryable_errors as err:
+                last_error = err
+                if attempt >= max_retries:
+                    break
+                await asyncio.sleep(self.retry_delay * attempt)
+            except Exception as err:
+                last_error = err
+                break
+            finally:
+                await self.limiter.release()
 
-            for i, text in enumerate(texts):
-                if text is None or not str(text).strip():
-                    results[i] = text
-                    continue
-                t = str(text)
-                key = self._get_cache_key(t, source_lang, target_lang)
-                cached = self.cache.get(key)
-                if cached is not None:
-                    results[i] = cached
-                else:
-                    to_translate.append((i, t))
+        if last_error:
+            raise last_error
+        raise RuntimeError("Translation failed")
+
+    async def _translate_bisect_async(
+        self, texts: List[str], source_lang: str, target_lang: str, err: ValueError, max_retries: int
+    ) -> List[Optional[str]]:
+        if len(texts) == 1:
+            logger.warning("    > [Gemini] Giving up on subtitle %r: %s", texts[0][:60], err)
+            return [None]
+        middle = len(texts) // 2
+        logger.info(
+            "    > [Gemini] Bad reply for %d subtitles (%s), retrying as %d + %d",
+            len(texts),
+            err,
+            middle,
+            len(texts) - middle,
+        )
+
+        async def _half(half: List[str]) -> List[Optional[str]]:
+            try:
+                return await self._translate_batch_uncached_async(half, source_lang, target_lang, max_retries)
+            except ValueError as half_err:
+                return await self._translate_bisect_async(half, source_lang, target_lang, half_err, max_retries)
+            except Exception as half_err:
+                logger.error("    > [Gemini] %d subtitle(s) failed: %s", len(half), half_err)
+                return [None] * len(half)
+
+        halves = await asyncio.gather(_half(texts[:middle]), _half(texts[middle:]))
+        return halves[0] + halves[1]
+
+    async def _translate_batches_async(self, batches, source_lang: str, target_lang: str, max_retries: int):
+        total_batches = len(batches)
 
-            if not to_translate:
-                return results
+        async def _one(batch_idx: int, batch: List[Tuple[int, str]]):
+            batch_texts = [t for _, t in batch]
+            token_count = sum(estimate_tokens(t) for t in batch_texts) * self._output_factor(target_lang)
+            start = time.time()
+            try:
+                translated = await self._translate_batch_uncached_async(
+                    batch_texts, source_lang, target_lang, max_retries
+                )
+            except ValueError as err:
+                self._record_batch(token_count, 0.0, err)
+                translated = await self._translate_bisect_async(batch_texts, source_lang, target_lang, err, max_retries)
+            except Exception as err:
+                logger.error(f"Translation batch {batch_idx}/{total_batches} failed: {err}")
+                translated = [None] * len(batch_texts)
+            logger.info(
+                "    > [Gemini] Batch %d/%d: %d subtitles (~%d tokens) completed in %.2fs",
+                batch_idx,
+                total_batches,
+                len(batch_texts),
+                token_count,
+                time.time() - start,
+            )
+            return batch, translated
+
+        return await asyncio.gather(*(_one(idx, batch) for idx, batch in enumerate(batches, start=1)))
+
+    def _translate_bisect(
+        self, texts: List[str], source_lang: str, target_lang: str, err: ValueError, max_retries: int
+    ) -> List[Optional[str]]:
+        """
+        Recover a batch whose reply was malformed or had the wrong length (err): send its two
+        halves, splitting again whenever a half fails the same way. The failed batch itself is
+        not sent again; only a cue that still fails on its own is left as None.
+        """
+        if len(texts) == 1:
+            logger.warning("    > [Gemini] Giving up on subtitle %r: %s", texts[0][:60], err)
+            return [None]
+        middle = len(texts) // 2
+        logger.info(
+            "    > [Gemini] Bad reply for %d subtitles (%s), retrying as %d + %d",
+            len(texts),
+            err,
+            middle,
+            len(texts) - middle,
+        )
+        translated = []
+        for half in (texts[:middle], texts[middle:]):
+            try:
+                translated.extend(self._translate_batch_uncached(half, source_lang, target_lang, max_retries))
+            except ValueError as half_err:
+                translated.extend(self._translate_bisect(half, source_lang, target_lang, half_err, max_retries))
+            except Exception as half_err:
+                logger.error("    > [Gemini] %d subtitle(s) failed: %s", len(half), half_err)
+                translated.extend([None] * len(half))
+        return translated
+
+    def _record_batch(self, tokens: int, duration: float, error: Optional[Exception] = None) -> None:
+        """Adapt batch_tokens: halve after a malformed/short reply, shrink when slow, grow when fast."""
+        with self._batch_lock:
+            previous = self.batch_tokens
+            if isinstance(error, ValueError):
+                # wrong array length or unparsable JSON, both get likelier with larger batches
+                self.batch_tokens = max(self.min_batch_tokens, min(self.batch_tokens, tokens) // 2)
+            elif error is not None:
+                return
+            elif duration > self.target_latency:
+                self.batch_tokens = max(self.min_batch_tokens, int(self.batch_tokens * 0.75))
+            elif duration < self.target_latency / 2 and tokens >= self.batch_tokens * 0.8:
+                self.batch_tokens = min(self.max_batch_tokens, int(self.batch_tokens * 1.25))
+            if self.batch_tokens != previous:
+                logger.debug("Translation batch size %d -> %d tokens", previous, self.batch_tokens)
+ 
+    def _translate_pairs(
+        self, to_translate: List[Tuple[int, str]], source_lang: str, target_lang, store, max_retries: int
+    ) -> None:
+        """
+        Batch and send (index, text) pairs, calling store(batch, translated) as each batch
+        finishes. With a tuple of target languages every translated item is a {lang: text} dict.
+        max_retries is per call: the translator is shared by concurrent callers, so it is
+        passed down rather than set on the instance.
+        """
+        batch_tokens = max(self.min_batch_tokens, self.batch_tokens // self._output_factor(target_lang))
+        workers = int(self.limiter.limit) if self.use_async else self.max_workers
+        batches = list(iter_token_balanced_batches(to_translate, batch_tokens, workers))
+        total_batches = len(batches)
+        logger.info(
+            "    > [Gemini] Preparing %d subtitle(s) across %d batch(es) (batch<=%d tokens, %s=%d)",
+            len(to_translate),
+            total_batches,
+            batch_tokens,
+            "concurrency" if self.use_async else "workers",
+            min(workers, total_batches),
+        )
 
-            batches = list(self._iter_char_limited_batches(to_translate, max_chars=self.chunk_size))
-            total_batches = len(batches)
+        if self.use_async:
+            batches_done = self._run_async(
+                self._translate_batches_async(batches, source_lang, target_lang, max_retries)
+            )
+            for batch, translated in batches_done:
+                store(batch, translated)
+            return
+
+        def process_batch(batch_idx: int, batch: List[Tuple[int, str]]):
+            batch_texts = [t for _, t in batch]
+            token_count = sum(estimate_tokens(t) for t in batch_texts) * self._output_factor(target_lang)
             logger.info(
-                "    > [Gemini] Preparing %d subtitle(s) across %d batch(es) (chunk<=%d chars, workers=%d)",
-                len(to_translate),
+                "    > [Gemini] Batch %d/%d: %d subtitles (~%d tokens) ...",
+                batch_idx,
                 total_batches,
-                self.chunk_size,
-                min(self.max_workers, total_batches),
+                len(batch_texts),
+                token_count,
             )
+            start = time.time()
+            try:
+                translated = self._translate_batch_uncached(batch_texts, source_lang, target_lang, max_retries)
+                self._record_batch(token_count, time.time() - start)
+            except ValueError as err:
+                # one bad line should not cost the whole batch: bisect down to single cues
+                self._record_batch(token_count, time.time() - start, err)
+                translated = self._translate_bisect(batch_texts, source_lang, target_lang, err, max_retries)
+            except Exception as err:
+                # retries already exhausted; keep the other batches of the lecture going
+                self._record_batch(token_count, time.time() - start, err)
+                logger.error(f"Translation batch {batch_idx}/{total_batches} failed: {err}")
+                translated = [None] * len(batch_texts)
+            duration = time.time() - start
+            logger.info(
+                "    > [Gemini] Batch %d/%d completed in %.2fs",
+                batch_idx,
+                total_batches,
+                duration,
+            )
+            return batch, translated
 
-            cache_updated = False
+        if self.max_workers > 1 and total_batches > 1:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = [executor.submit(process_batch, idx, batch) for idx, batch in enumerate(batches, start=1)]
+                for future in as_completed(futures):
+                    store(*future.result())
+        else:
+            for idx, batch in enumerate(batches, start=1):
+                store(*process_batch(idx, batch))
 
-            def process_batch(batch_idx: int, batch: List[Tuple[int, str]]):
-                batch_indices = [i for i, _ in batch]
-                batch_texts = [t for _, t in batch]
-                char_count = sum(len(t) for t in batch_texts)
-                logger.info(
-                    "    > [Gemini] Batch %d/%d: %d subtitles (~%d chars) ...",
-                    batch_idx,
-                    total_batches,
-                    len(batch_texts),
-                    char_count,
-                )
-                start = time.time()
-                translated = self._translate_batch_uncached(batch_texts, source_lang, target_lang)
-                duration = time.time() - start
-                logger.info(
-                    "    > [Gemini] Batch %d/%d completed in %.2fs",
-                    batch_idx,
-                    total_batches,
-                    duration,
-                )
-                return batch_idx, batch_indices, translated
-
-            if self.max_workers > 1 and total_batches > 1:
-                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    future_map = {
-                        executor.submit(process_batch, idx, batch): idx
-                        for idx, batch in enumerate(batches, start=1)
-                    }
-                    for future in as_completed(future_map):
-                        batch_idx, batch_indices, translated = future.result()
-                        for i, zh in zip(batch_indices, translated):
-                            results[i] = zh
-                            if zh is not None:
-                                key = self._get_cache_key(str(texts[i]), source_lang, target_lang)
-                                with self._cache_lock:
-                                    self.cache[key] = zh
-                                    cache_updated = True
-            else:
-                for idx, batch in enumerate(batches, start=1):
-                    batch_indices = [i for i, _ in batch]
-                    batch_texts = [t for _, t in batch]
-                    try:
-                        batch_idx, _, translated = process_batch(idx, batch)
-                        for i, zh in zip(batch_indices, translated):
-                            results[i] = zh
-                            if zh is not None:
-                                key = self._get_cache_key(str(texts[i]), source_lang, target_lang)
-                                with self._cache_lock:
-                                    self.cache[key] = zh
-                                    cache_updated = True
-                    except Exception as e:
-                        logger.error(f"Translation batch failed: {e}")
-                        for i in batch_indices:
-                            results[i] = None
-
-            if cache_updated:
-                self._save_cache()
+    def _retry_limit(self, max_retries) -> int:
+        """A call's max_retries, or the configured one when it is missing or not a number."""
+        try:
+            return int(max_retries) if max_retries is not None else self.max_retries
+        except (TypeError, ValueError):
+            return self.max_retries
+
+    def translate_batch(self, texts, source_lang="EN", target_lang="ZH", max_retries=3, scope=None):
+        if not texts:
+            return []
+        return self.translate_batch_multi(texts, source_lang, [target_lang], max_retries, scope)[target_lang]
 
+    def translate_batch_multi(self, texts, source_lang="EN", target_langs=("ZH",), max_retries=3, scope=None):
+        """
+        Translate texts into every language of target_langs and return {lang: translations}.
+
+        Each language is cached on its own; a cue missing from any of them is sent once and
+        the model returns all requested languages for it in the same reply. Hits are counted
+        in self.stats under scope, once per line.
+        """
+        target_langs = list(target_langs)
+        results = {}
+        missing = {}  # lang -> indices still to translate
+        to_translate = {}
+        kinds = []
+        for lang in target_langs:
+            lang_results, pending, lang_kinds = resolve_locally(self, texts, source_lang, lang)
+            kinds.append(lang_kinds)
+            missing[lang] = {i for i, _ in pending}
+            to_translate.update(pending)
+            results[lang] = lang_results
+        self.stats.add(scope, TranslationStats.tally(*kinds))
+        if not to_translate:
             return results
-        finally:
-            self.max_retries = original_max_retries
 
+        needed = [lang for lang in target_langs if missing[lang]]
+        target = needed[0] if len(needed) == 1 else tuple(needed)
+
+        def store(batch, translated):
+            for lang in needed:
+                pairs = []
+                for (i, text), item in zip(batch, translated):
+                    if i not in missing[lang]:
+                        continue
+                    value = item.get(lang) if isinstance(item, dict) else item
+                    results[lang][i] = value
+                    pairs.append((text, value))
+                store_translations(self, source_lang, lang, pairs)
+
+        self._translate_pairs(sorted(to_translate.items()), source_lang, target, store, self._retry_limit(max_retries))
+        return results
+
+
+class TranslationServiceClient:
+    """
+    Translator that hands batches to the local translation service (translation_service.py).
+
+    The service owns the provider client, cache and rate limits, so concurrent downloader
+    processes share them instead of each translating the same lines on its own.
+    """
 
-def create_translator(provider: Optional[str] = None, cache_dir: str = ".translation_cache"):
+    def __init__(self, url: str, timeout: Optional[float] = None):
+        import requests
+
+        self.url = url.rstrip("/")
+        if timeout is None:
+            try:
+                timeout = float(os.getenv("TRANSLATE_SERVICE_TIMEOUT", "600"))
+            except ValueError:
+                timeout = 600.0
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.trust_env = False  # never send localhost traffic through a proxy
+        health = self.session.get(self.url + "/health", timeout=5)
+        health.raise_for_status()
+        info = health.json()
+        self.provider = "service"
+        self.model = f"{info.get('provider', '')}:{info.get('model', '')}"
+        self.cache = None  # the service caches
+        self.memory = None
+        self.stats = TranslationStats()
+        # the size of the batches queued here, the service re-batches for its provider
+        try:
+            self.chunk_size = int(os.getenv("TRANSLATE_SERVICE_CHUNK_SIZE") or os.getenv("TRANSLATE_CHUNK_SIZE") or "2800")
+        except ValueError:
+            self.chunk_size = 2800
+        try:
+            self.max_workers = max(1, int(os.getenv("TRANSLATE_SERVICE_MAX_WORKERS", "4")))
+        except ValueError:
+            self.max_workers = 4
+
+    def translate_batch_multi(self, texts, source_lang="EN", target_langs=("ZH",), max_retries=3, scope=None):
+        target_langs = list(target_langs)
+        if not texts:
+            return {lang: [] for lang in target_langs}
+        try:
+            response = self.session.post(
+                self.url + "/translate",
+                json={"texts": list(texts), "source_lang": source_lang, "target_langs": target_langs},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            body = response.json()
+        except Exception as e:
+            logger.error(f"Translation service request failed: {e}")
+            body = {"translations": {lang: [None] * len(texts) for lang in target_langs}}
+        # cache and memory hits happen in the service, which reports how it resolved each line
+        kinds = body.get("kinds")
+        if isinstance(kinds, list) and len(kinds) == len(texts):
+            self.stats.add(scope, TranslationStats.tally({i: kind for i, kind in enumerate(kinds) if kind}))
+        else:
+            self.stats.add(scope, TranslationStats.tally(resolve_locally(self, texts, source_lang, target_langs[0])[2]))
+        return body["translations"]
+
+    def translate_batch(self, texts, source_lang="EN", target_lang="ZH", max_retries=3, scope=None):
+        return self.translate_batch_multi(texts, source_lang, [target_lang], max_retries, scope)[target_lang]
+
+    def translate_text(self, text, source_lang="EN", target_lang="ZH", max_retries=3):
+        return self.translate_batch([text], source_lang, target_lang, max_retries)[0]
+
+
+def create_translator(provider: Optional[str] = None, cache_dir: str = ".translation_cache", use_service: bool = True):
     normalized = (
         provider
         or os.getenv("SUBTITLE_TRANSLATE_PROVIDER")
         or os.getenv("TRANSLATE_PROVIDER")
         or ""
     ).strip().lower()
+    service_url = os.getenv("TRANSLATE_SERVICE_URL")
+    if use_service and (service_url or normalized in ("service", "daemon")):
+        url = service_url or "http://127.0.0.1:%s" % os.getenv("TRANSLATE_SERVICE_PORT", "8765")
+        try:
+            client = TranslationServiceClient(url)
+            logger.info("Using the translation service at %s (%s)", url, client.model)
+            return client
+        except Exception as e:
+            if normalized in ("service", "daemon"):
+                raise ValueError(f"Translation service at {url} is not reachable: {e}") from e
+            logger.warning("Translation service at %s is not reachable (%s), translating in-process", url, e)
     if normalized in ("", "none", "false", "0"):
         deepl_key = os.getenv("DEEPL_API_KEY")
         if deepl_key:
@@ -471,3 +1811,150 @@ def create_translator(provider: Optional[str] = None, cache_dir: str = ".transla
     if normalized in ("gemini", "openai", "openai-compatible", "llm"):
         return OpenAICompatibleTranslator(cache_dir=cache_dir)
     raise ValueError(f"Unknown translation provider: {provider}")
+
+
+class TranslationQueue:
+    """
+    Course-wide translation queue that pools cues from many lectures into full-size batches.
+
+    Lectures are submitted as they finish downloading. Cached cues resolve straight away;
+    the rest wait until a batch of batch_chars characters is full (or linger seconds pass)
+    and are translated on a worker pool. Each lecture's on_done callback runs as soon as
+    all of its cues are back, whichever batches they travelled in, and receives
+    {target_lang: translations}.
+    """
+
+    def __init__(
+        self,
+        translator,
+        source_lang: str = "EN",
+        target_langs=("ZH",),
+        batch_chars: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        linger: Optional[float] = None,
+        max_retries: int = 3,
+    ):
+        self.translator = translator
+        self.source_lang = source_lang
+        self.target_langs = list(target_langs)
+        self.batch_chars = batch_chars or getattr(translator, "chunk_size", 2800)
+        self.max_retries = max_retries
+        if linger is None:
+            try:
+                linger = float(os.getenv("TRANSLATE_QUEUE_LINGER", "20"))
+            except ValueError:
+                linger = 20.0
+        self.linger = linger
+        workers = max_workers or getattr(translator, "max_workers", 1)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="translate")
+        self._cond = threading.Condition()
+        self._pending = {}  # text -> [(job, index), ...], in arrival order
+        self._pending_chars = 0
+        self._active_jobs = 0
+        self._timer = None
+
+    def submit(self, texts: List[Optional[str]], on_done, name: str = "", scope: Optional[str] = None) -> list:
+        """Queue one lecture's cues; returns how each line was resolved (None for empty lines)."""
+        job = {"name": name, "results": {}, "remaining": 0, "on_done": on_done}
+        stats = getattr(self.translator, "stats", None)
+        unresolved = {}  # index -> text, not resolved locally in at least one language
+        kinds = []
+        for lang in self.target_langs:
+            results, pending, lang_kinds = resolve_locally(self.translator, texts, self.source_lang, lang)
+            kinds.append(lang_kinds)
+            unresolved.update(pending)
+            job["results"][lang] = results
+        line_kinds = TranslationStats.merge(*kinds)
+        totals = TranslationStats.tally(line_kinds)
+        if stats is not None:
+            stats.add(scope, totals)
+
+        with self._cond:
+            for i, text in unresolved.items():
+                if text not in self._pending:
+                    self._pending[text] = []
+                    self._pending_chars += len(text)
+                self._pending[text].append((job, i))
+                job["remaining"] += 1
+            self._active_jobs += 1
+            if job["remaining"] == 0:
+                self._executor.submit(self._finish_job, job)
+            elif self._pending_chars >= self.batch_chars:
+                self._dispatch(full_only=True)
+            if self._pending and self._timer is None and self.linger > 0:
+                self._timer = threading.Timer(self.linger, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        logger.info(
+            "    > Queued %d subtitle(s) for translation (%d cached, %d from memory, %d skipped, %d chars pending)",
+            len(unresolved),
+            totals["cached"],
+            totals["memory"] + totals["fuzzy"],
+            totals["skipped"],
+            self._pending_chars,
+        )
+        return [line_kinds.get(i) for i in range(len(texts))]
+
+    def _dispatch(self, full_only: bool) -> None:
+        # caller holds self._cond
+        while self._pending and (not full_only or self._pending_chars >= self.batch_chars):
+            batch = []
+            size = 0
+            for text in list(self._pending):
+                if batch and size + len(text) > self.batch_chars:
+                    break
+                batch.append((text, self._pending.pop(text)))
+                size += len(text)
+            self._pending_chars -= size
+            self._executor.submit(self._run_batch, batch)
+        if not self._pending and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def flush(self) -> None:
+        with self._cond:
+            self._timer = None
+            self._dispatch(full_only=False)
+
+    def _run_batch(self, batch) -> None:
+        texts = [text for text, _ in batch]
+        try:
+            translated = self.translator.translate_batch_multi(
+                texts, source_lang=self.source_lang, target_langs=self.target_langs, max_retries=self.max_retries
+            )
+        except Exception as e:
+            logger.error(f"Translation batch failed: {e}")
+            translated = {lang: [None] * len(texts) for lang in self.target_langs}
+
+        finished = []
+        with self._cond:
+            for k, (_, targets) in enumerate(batch):
+                for job, i in targets:
+                    for lang in self.target_langs:
+                        job["results"][lang][i] = translated[lang][k]
+                    job["remaining"] -= 1
+                    if job["remaining"] == 0:
+                        finished.append(job)
+        for job in finished:
+            self._finish_job(job)
+
+    def _finish_job(self, job) -> None:
+        try:
+            job["on_done"](job["results"])
+        except Exception:
+            logger.exception("    > Failed to save translated subtitles (%s)", job["name"])
+        finally:
+            with self._cond:
+                self._active_jobs -= 1
+                self._cond.notify_all()
+
+    def drain(self) -> None:
+        """Send whatever is still pending and wait for every submitted lecture to be written."""
+        self.flush()
+        with self._cond:
+            while self._active_jobs:
+                self._cond.wait()
+
+    def shutdown(self) -> None:
+        self.drain()
+        self._executor.shutdown(wait=True)
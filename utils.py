@@ -1,6 +1,12 @@
 import base64
+import calendar
 import codecs
+import json
 import os
+import re
+import struct
+import time
+from urllib.parse import parse_qs, urlsplit
 
 import mp4parse
 import widevine_pssh_data_pb2
@@ -35,3 +41,123 @@ def extract_kid(mp4_file):
 
     # No Moof or PSSH header found
     return None
+
+
+def _read_mvhd_duration(f, start, end):
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", f.read(8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header_size = 16
+        if size < header_size:
+            return None
+        if box_type == b"mvhd":
+            version = f.read(4)[0]
+            if version == 1:
+                f.seek(16, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">IQ", f.read(12))
+            else:
+                f.seek(8, os.SEEK_CUR)
+                timescale, duration = struct.unpack(">II", f.read(8))
+            if not timescale or not duration:
+                return None
+            return duration / timescale
+        offset += size
+    return None
+
+
+def read_mp4_info(mp4_file):
+    """
+    Walk the top-level boxes of an MP4 file without reading the payloads
+
+    Parameters
+    ----------
+    mp4_file : str
+        Path to the MP4 file
+
+
+    Returns
+    -------
+    Dict with the top-level box types ("boxes"), whether the last box runs past
+    the end of the file ("truncated") and the mvhd duration in seconds ("duration", or None)
+
+    """
+
+    boxes = []
+    truncated = False
+    duration = None
+    file_size = os.path.getsize(mp4_file)
+    with open(mp4_file, "rb") as f:
+        offset = 0
+        while offset + 8 <= file_size:
+            f.seek(offset)
+            size, box_type = struct.unpack(">I4s", f.read(8))
+            header_size = 8
+            if size == 1:
+                size = struct.unpack(">Q", f.read(8))[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size or offset + size > file_size:
+                truncated = True
+                break
+            box_type = box_type.decode("latin-1")
+            boxes.append(box_type)
+            if box_type == "moov":
+                duration = _read_mvhd_duration(f, offset + header_size, offset + size)
+            offset += size
+        if not truncated and offset != file_size:
+            truncated = True
+    return {"boxes": boxes, "truncated": truncated, "duration": duration}
+
+
+def url_expiry(url):
+    """
+    Parameters
+    ----------
+    url : str
+        Signed media or manifest URL
+
+
+    Returns
+    -------
+    Float or None
+        Unix time at which the URL's signature expires, or None if it carries no known expiry
+        (CloudFront "Expires", S3 "X-Amz-Date"/"X-Amz-Expires", Akamai "exp=" tokens, JWT "token")
+
+    """
+
+    try:
+        query = parse_qs(urlsplit(url).query)
+    except ValueError:
+        return None
+    params = {key.lower(): values[-1] for key, values in query.items() if values}
+
+    expiries = []
+    for key in ("expires", "exp"):
+        if params.get(key, "").isdigit():
+            expiries.append(float(params[key]))
+    if "x-amz-date" in params and params.get("x-amz-expires", "").isdigit():
+        try:
+            signed_at = calendar.timegm(time.strptime(params["x-amz-date"], "%Y%m%dT%H%M%SZ"))
+            expiries.append(float(signed_at + int(params["x-amz-expires"])))
+        except ValueError:
+            pass
+    for key in ("hdnts", "hdnea", "__token__"):
+        match = re.search(r"(?:^|~)exp=(\d+)", params.get(key, ""))
+        if match:
+            expiries.append(float(match.group(1)))
+    token = params.get("token", "")
+    if token.count(".") == 2:
+        payload = token.split(".")[1]
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+            if isinstance(claims.get("exp"), (int, float)):
+                expiries.append(float(claims["exp"]))
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    return min(expiries) if expiries else None
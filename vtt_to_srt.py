@@ -1,20 +1,48 @@
-from webvtt import WebVTT
 import html
 import os
-from pysrt.srtitem import SubRipItem
-from pysrt.srttime import SubRipTime
+import re
 
+TIMING_RE = re.compile(r"^\s*((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})\s+-->\s+((?:\d+:)?\d{1,2}:\d{2}[.,]\d{1,3})")
+TAG_RE = re.compile(r"<[^>]*>")
 
-def convert(directory, filename):
+
+def _srt_time(stamp):
+    clock, _, fraction = stamp.replace(",", ".").partition(".")
+    parts = [int(p) for p in clock.split(":")]
+    if len(parts) == 2:
+        parts.insert(0, 0)
+    hours, minutes, seconds = parts
+    return "%02d:%02d:%02d,%03d" % (hours, minutes, seconds, int(fraction.ljust(3, "0")[:3]))
+
+
+def iter_srt(lines):
+    """Convert WebVTT lines to SRT blocks in a single pass, without loading the whole file."""
     index = 0
+    timing = None
+    text = []
+    for line in lines:
+        line = line.rstrip("\r\n").lstrip("\ufeff")
+        if timing is None:
+            # the header, NOTE/STYLE/REGION blocks and cue identifiers are all skipped here
+            match = TIMING_RE.match(line)
+            if match:
+                timing = "%s --> %s" % (_srt_time(match.group(1)), _srt_time(match.group(2)))
+                text = []
+            continue
+        if line.strip():
+            text.append(html.unescape(TAG_RE.sub("", line)))
+            continue
+        if text:
+            index += 1
+            yield "%d\n%s\n%s\n\n" % (index, timing, "\n".join(text))
+        timing = None
+    if timing is not None and text:
+        yield "%d\n%s\n%s\n\n" % (index + 1, timing, "\n".join(text))
+
+
+def convert(directory, filename):
     vtt_filepath = os.path.join(directory, filename + ".vtt")
     srt_filepath = os.path.join(directory, filename + ".srt")
-    srt = open(srt_filepath, mode='w', encoding='utf8', errors='ignore')
-
-    for caption in WebVTT().read(vtt_filepath):
-        index += 1
-        start = SubRipTime(0, 0, caption.start_in_seconds)
-        end = SubRipTime(0, 0, caption.end_in_seconds)
-        srt.write(
-            SubRipItem(index, start, end, html.unescape(
-                caption.text)).__str__() + "\n")
\ No newline at end of file
+    with open(vtt_filepath, mode="r", encoding="utf-8-sig", errors="ignore") as vtt:
+        with open(srt_filepath, mode="w", encoding="utf8", errors="ignore") as srt:
+            srt.writelines(iter_srt(vtt))
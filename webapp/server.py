@@ -238,6 +238,7 @@ async def list_tasks(_: str = Depends(get_token_from_request)):
             "status": task.status,
             "started_at": task.started_at.isoformat() if task.started_at else None,
             "finished_at": task.finished_at.isoformat() if task.finished_at else None,
+            "progress": task.progress_snapshot(),
         }
         for task in tasks
     ]
@@ -255,6 +256,7 @@ async def get_task(task_id: str, _: str = Depends(get_token_from_request)):
         "status": task.status,
         "started_at": task.started_at.isoformat() if task.started_at else None,
         "finished_at": task.finished_at.isoformat() if task.finished_at else None,
+        "progress": task.progress_snapshot(),
     }
 
 
@@ -1,5 +1,6 @@
 import asyncio
 from collections import deque
+import json
 import os
 import subprocess
 import sys
@@ -9,7 +10,7 @@ import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from .history import HistoryItem, HistoryStore
 
@@ -38,6 +39,7 @@ class DownloadTask:
     _lock: threading.Lock = field(default_factory=threading.Lock)
     loop: Optional[asyncio.AbstractEventLoop] = None
     is_drm: Optional[bool] = None
+    progress: Dict[str, Any] = field(default_factory=dict)
 
     def _trim_buffer(self) -> None:
         if len(self.log_buffer) > 1000:
@@ -73,6 +75,58 @@ class DownloadTask:
             if queue in self.subscribers:
                 self.subscribers.remove(queue)
 
+    def apply_event(self, event: Dict[str, Any]) -> None:
+        """Fold one progress event from main.py into the task's progress summary."""
+        kind = event.get("event")
+        with self._lock:
+            progress = self.progress
+            for key in ("completed", "skipped", "failed"):
+                progress.setdefault(key, 0)
+            current = progress.get("current")
+            same_lecture = current is not None and current.get("lecture_id") == event.get("lecture_id")
+            if kind in ("course_started", "course_planned"):
+                for key in ("lectures", "total_bytes", "pending_bytes", "total_duration"):
+                    if event.get(key) is not None:
+                        progress[key] = event[key]
+            elif kind == "lecture_started":
+                progress["current"] = {
+                    "lecture_id": event.get("lecture_id"),
+                    "title": event.get("title"),
+                    "index": event.get("index"),
+                    "stage": "download",
+                    "expected_bytes": event.get("expected_bytes"),
+                }
+            elif kind == "stage" and same_lecture:
+                current["stage"] = event.get("stage")
+            elif kind == "progress" and same_lecture:
+                for key in ("percent", "bytes", "total_bytes", "speed", "eta"):
+                    current[key] = event.get(key)
+            elif kind == "lecture_completed":
+                progress["completed"] += 1
+                if same_lecture:
+                    progress["current"] = None
+            elif kind == "lecture_skipped":
+                progress["skipped"] += 1
+            elif kind == "lecture_failed" and event.get("final"):
+                progress["failed"] += 1
+            elif kind == "lecture_failed" and event.get("withdrawn"):
+                # its background move failed after it was counted, the retry reports it again
+                progress["completed"] = max(0, progress["completed"] - 1)
+            elif kind == "course_completed":
+                progress["current"] = None
+            elif kind == "translation_stats":
+                progress["translation"] = {
+                    key: event.get(key) for key in ("skipped", "cached", "memory", "fuzzy", "sent")
+                }
+            progress["updated_at"] = event.get("ts")
+
+    def progress_snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = dict(self.progress)
+            if snapshot.get("current"):
+                snapshot["current"] = dict(snapshot["current"])
+            return snapshot
+
 
 class TaskManager:
     def __init__(self, history_store: HistoryStore, base_dir: Path):
@@ -170,6 +224,16 @@ class TaskManager:
         )
         self.history_store.add(item)
 
+    def _read_events(self, task: DownloadTask, fd: int) -> None:
+        with os.fdopen(fd, "r", encoding="utf-8", errors="replace") as events:
+            for line in events:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict):
+                    task.apply_event(event)
+
     def run_task(self, task: DownloadTask) -> None:
         def _emit(line: Optional[str]) -> None:
             task.broadcast(line)
@@ -194,19 +258,40 @@ class TaskManager:
             if os.name == "nt":
                 creationflags = getattr(subprocess, "CREATE_NEW_PROCESS_GROUP", 0)
 
-            process = subprocess.Popen(
-                task.command,
-                cwd=str(task.workdir),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
-                bufsize=1,
-                env=env,
-                creationflags=creationflags,
-            )
+            # structured progress comes over a pipe of its own, the log lines stay on stdout
+            command = list(task.command)
+            pass_fds = ()
+            event_reader = None
+            if os.name != "nt":
+                event_read_fd, event_write_fd = os.pipe()
+                pass_fds = (event_write_fd,)
+                command += ["--progress-events", f"fd:{event_write_fd}"]
+
+            try:
+                process = subprocess.Popen(
+                    command,
+                    cwd=str(task.workdir),
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    encoding="utf-8",
+                    errors="replace",
+                    bufsize=1,
+                    env=env,
+                    creationflags=creationflags,
+                    pass_fds=pass_fds,
+                )
+            except Exception:
+                # nothing will read or write the event pipe
+                if pass_fds:
+                    os.close(event_read_fd)
+                    os.close(event_write_fd)
+                raise
             task.process = process
+            if pass_fds:
+                os.close(event_write_fd)
+                event_reader = threading.Thread(target=self._read_events, args=(task, event_read_fd), daemon=True)
+                event_reader.start()
             _emit(f"[system] Spawned process PID {process.pid}")
 
             assert process.stdout is not None
@@ -222,6 +307,8 @@ class TaskManager:
                 _emit(line_clean)
 
             ret_code = process.wait()
+            if event_reader is not None:
+                event_reader.join(timeout=5)
             task.finished_at = datetime.utcnow()
             if ret_code == 0:
                 task.status = TaskStatus.SUCCESS